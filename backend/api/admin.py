@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import User, Gym, MembershipPlan, Membership, Notice, ExerciseRoutine, GymApprovalHistory
+from .models import User, Gym, MembershipPlan, Membership, Notice, ExerciseRoutine, GymApprovalHistory, AttendanceDailyRollup, AttendanceBitmap, MemberRiskScore, SyncTombstone, ArchivedNotice, Task, IdempotencyKey, GymOccupancyHour, ClassSession, ClassBooking, LeaderboardScore
 
 
 class CustomUserAdmin(UserAdmin):
@@ -38,7 +38,7 @@ class MembershipAdmin(admin.ModelAdmin):
 
 @admin.register(Notice)
 class NoticeAdmin(admin.ModelAdmin):
-    list_display = ('gym', 'title', 'created_at', 'is_active')
+    list_display = ('gym', 'title', 'created_at', 'publish_at', 'expire_at', 'is_active')
     list_filter = ('gym', 'is_active', 'created_at')
     search_fields = ('title', 'message', 'gym__name')
     readonly_fields = ('created_at', 'updated_at')
@@ -56,3 +56,77 @@ class GymApprovalHistoryAdmin(admin.ModelAdmin):
     list_filter = ('action', 'created_at')
     search_fields = ('gym__name', 'admin__username')
     readonly_fields = ('created_at',)
+
+@admin.register(AttendanceDailyRollup)
+class AttendanceDailyRollupAdmin(admin.ModelAdmin):
+    list_display = ('gym', 'date', 'checkins', 'unique_members', 'updated_at')
+    list_filter = ('date',)
+    search_fields = ('gym__name',)
+    readonly_fields = ('updated_at',)
+
+@admin.register(AttendanceBitmap)
+class AttendanceBitmapAdmin(admin.ModelAdmin):
+    list_display = ('member', 'gym', 'year', 'updated_at')
+    list_filter = ('year',)
+    search_fields = ('member__username', 'gym__name')
+    readonly_fields = ('updated_at',)
+
+@admin.register(MemberRiskScore)
+class MemberRiskScoreAdmin(admin.ModelAdmin):
+    list_display = ('member', 'gym', 'score', 'days_since_last_visit', 'computed_at')
+    list_filter = ('gym',)
+    search_fields = ('member__username', 'gym__name')
+    readonly_fields = ('computed_at',)
+
+@admin.register(SyncTombstone)
+class SyncTombstoneAdmin(admin.ModelAdmin):
+    list_display = ('resource', 'object_id', 'gym_id', 'member_id', 'deleted_at')
+    list_filter = ('resource',)
+
+@admin.register(ArchivedNotice)
+class ArchivedNoticeAdmin(admin.ModelAdmin):
+    list_display = ('title', 'gym', 'publish_at', 'expire_at', 'archived_at')
+    search_fields = ('title', 'gym__name')
+    readonly_fields = ('archived_at',)
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ('name', 'status', 'attempts', 'max_attempts', 'run_at', 'locked_by', 'finished_at')
+    list_filter = ('status', 'name')
+    readonly_fields = ('created_at', 'updated_at', 'finished_at', 'last_error')
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    list_display = ('user', 'method', 'path', 'status', 'response_status', 'created_at', 'expires_at')
+    list_filter = ('status', 'method')
+    search_fields = ('user__username', 'key', 'path')
+    readonly_fields = ('created_at', 'response_body')
+
+@admin.register(GymOccupancyHour)
+class GymOccupancyHourAdmin(admin.ModelAdmin):
+    list_display = ('gym', 'hour', 'checkins', 'checkouts', 'peak', 'occupancy')
+    list_filter = ('gym',)
+    readonly_fields = ('updated_at',)
+
+@admin.register(ClassSession)
+class ClassSessionAdmin(admin.ModelAdmin):
+    list_display = ('title', 'gym', 'starts_at', 'capacity', 'booked_count', 'is_cancelled')
+    list_filter = ('is_cancelled', 'starts_at')
+    search_fields = ('title', 'instructor', 'gym__name')
+    # Changed only through api/bookings.py so seats are never oversold
+    readonly_fields = ('booked_count', 'created_at', 'updated_at')
+
+@admin.register(ClassBooking)
+class ClassBookingAdmin(admin.ModelAdmin):
+    list_display = ('member', 'session', 'status', 'queued_at')
+    list_filter = ('status',)
+    search_fields = ('member__username', 'session__title')
+    readonly_fields = ('status', 'queued_at', 'created_at', 'updated_at')
+
+@admin.register(LeaderboardScore)
+class LeaderboardScoreAdmin(admin.ModelAdmin):
+    list_display = ('member', 'gym', 'period', 'period_start', 'checkins')
+    list_filter = ('period', 'period_start')
+    search_fields = ('member__username', 'gym__name')
+    # Counted from Attendance; fix drift with manage.py rebuild_leaderboards
+    readonly_fields = ('checkins', 'updated_at')
@@ -0,0 +1,106 @@
+"""
+Bit operations over attendance history.
+
+A history is a plain Python int where bit ``i`` is set when the member attended
+on ``origin + i days``. Python ints are arbitrary precision, so a multi-year
+history is still a single value and every query below is a handful of big-int
+operations instead of a scan over Attendance rows.
+"""
+
+from datetime import date, timedelta
+
+
+YEAR_BITS = 366
+YEAR_BYTES = (YEAR_BITS + 7) // 8
+
+
+def day_index(day):
+    """Zero-based bit position of ``day`` within its year's bitmap."""
+    return day.timetuple().tm_yday - 1
+
+
+def year_length(year):
+    return (date(year + 1, 1, 1) - date(year, 1, 1)).days
+
+
+def to_bytes(bits):
+    return bits.to_bytes(YEAR_BYTES, 'little')
+
+
+def from_bytes(value):
+    return int.from_bytes(bytes(value or b''), 'little')
+
+
+def combine_years(year_bits):
+    """
+    Concatenate ``{year: bits}`` into one history int.
+
+    Returns ``(history, origin)`` where ``origin`` is January 1st of the earliest year.
+    """
+    if not year_bits:
+        return 0, None
+    first_year = min(year_bits)
+    origin = date(first_year, 1, 1)
+    history = 0
+    for year, bits in year_bits.items():
+        offset = (date(year, 1, 1) - origin).days
+        history |= bits << offset
+    return history, origin
+
+
+def range_mask(origin, start, end):
+    """Mask selecting days ``start``..``end`` inclusive of a history beginning at ``origin``."""
+    low = max((start - origin).days, 0)
+    high = (end - origin).days
+    if high < low:
+        return 0
+    return ((1 << (high - low + 1)) - 1) << low
+
+
+def count_days(history, mask=None):
+    return (history & mask if mask is not None else history).bit_count()
+
+
+def longest_streak(history):
+    """Length of the longest run of consecutive attended days."""
+    length = 0
+    while history:
+        # Each step shortens every run of ones by one; the number of steps is the longest run.
+        history &= history >> 1
+        length += 1
+    return length
+
+
+def streak_ending_at(history, index):
+    """Length of the run of attended days ending at bit ``index`` (0 if that day is unset)."""
+    if index < 0 or not (history >> index) & 1:
+        return 0
+    gaps = ~history & ((1 << (index + 1)) - 1)
+    if not gaps:
+        return index + 1
+    return index - (gaps.bit_length() - 1)
+
+
+def latest_index(history):
+    return history.bit_length() - 1
+
+
+def current_streak(history):
+    """Run of consecutive days ending at the most recent attended day."""
+    return streak_ending_at(history, latest_index(history))
+
+
+def attended_dates(history, origin):
+    days = []
+    index = 0
+    while history:
+        if history & 1:
+            days.append(origin + timedelta(days=index))
+        history >>= 1
+        index += 1
+    return days
+
+
+def heatmap(bits, year):
+    """0/1 per calendar day of ``year`` from that year's bitmap."""
+    return [(bits >> i) & 1 for i in range(year_length(year))]
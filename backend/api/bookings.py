@@ -0,0 +1,125 @@
+"""
+Class and slot booking without overselling.
+
+``ClassSession.booked_count`` is the number of seats taken. A booking takes a
+seat with one conditional UPDATE (``booked_count < capacity``), so the
+database serializes only the writers of that session row, only for that
+statement's transaction, and never hands out more seats than there are.
+When the UPDATE matches nothing the member joins the waitlist instead.
+
+A cancelled seat goes straight to the first member on the waitlist (ordered
+by ``queued_at``) in the same transaction, so a new booker cannot take it
+from them. Raising the capacity fills the new seats from the waitlist the
+same way. ``manage.py check_class_booking_concurrency`` fires parallel
+bookings and cancellations at one session and checks these invariants.
+"""
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import ClassBooking, ClassSession
+
+
+class BookingError(Exception):
+    pass
+
+
+def book(session, member, now=None):
+    """Book ``member`` onto ``session``, or waitlist them when it is full; returns the booking."""
+    now = now or timezone.now()
+    if session.is_cancelled:
+        raise BookingError('This class has been cancelled')
+    if session.starts_at <= now:
+        raise BookingError('This class has already started')
+
+    previous = ClassBooking.objects.filter(session=session, member=member).first()
+    if previous is not None and previous.status != 'cancelled':
+        raise BookingError('You already have a booking for this class')
+
+    try:
+        with transaction.atomic():
+            seat = ClassSession.objects.filter(
+                id=session.id, is_cancelled=False, booked_count__lt=F('capacity')
+            ).update(booked_count=F('booked_count') + 1, updated_at=now)
+            status = 'booked' if seat else 'waitlisted'
+
+            if previous is None:
+                return ClassBooking.objects.create(session=session, member=member, status=status, queued_at=now)
+
+            # Booking again after cancelling: reuse the row, at the back of the queue.
+            if not ClassBooking.objects.filter(id=previous.id, status='cancelled').update(
+                status=status, queued_at=now, updated_at=now
+            ):
+                raise IntegrityError('Booking changed concurrently')
+            previous.status, previous.queued_at = status, now
+            return previous
+    except IntegrityError:
+        # Another request from the same member got there first; its seat increment was rolled back with ours.
+        raise BookingError('You already have a booking for this class')
+
+
+def _promote_next(session_id, now):
+    """Move the first waitlisted member onto a seat the caller holds; returns their booking id or None."""
+    waitlist = ClassBooking.objects.filter(session_id=session_id, status='waitlisted').order_by('queued_at', 'id')
+    if connection.features.has_select_for_update_skip_locked:
+        waitlist = waitlist.select_for_update(skip_locked=True)
+    while True:
+        booking_id = waitlist.values_list('id', flat=True).first()
+        if booking_id is None:
+            return None
+        # Conditional: the member may have cancelled their waitlist entry meanwhile.
+        if ClassBooking.objects.filter(id=booking_id, status='waitlisted').update(status='booked', updated_at=now):
+            return booking_id
+
+
+def cancel(booking, now=None):
+    """Cancel a booking or waitlist entry; a freed seat goes to the waitlist. Returns the promoted booking id."""
+    now = now or timezone.now()
+    with transaction.atomic():
+        if ClassBooking.objects.filter(id=booking.id, status='booked').update(status='cancelled', updated_at=now):
+            promoted = _promote_next(booking.session_id, now)
+            if promoted is None:
+                ClassSession.objects.filter(id=booking.session_id, booked_count__gt=0).update(
+                    booked_count=F('booked_count') - 1, updated_at=now
+                )
+        elif ClassBooking.objects.filter(id=booking.id, status='waitlisted').update(status='cancelled', updated_at=now):
+            promoted = None
+        else:
+            raise BookingError('This booking is already cancelled')
+    booking.status = 'cancelled'
+    return promoted
+
+
+def fill_from_waitlist(session_id, now=None):
+    """Give free seats (after a capacity increase) to the waitlist; returns the promoted booking ids."""
+    now = now or timezone.now()
+    promoted = []
+    while True:
+        with transaction.atomic():
+            if not ClassSession.objects.filter(
+                id=session_id, is_cancelled=False, booked_count__lt=F('capacity')
+            ).update(booked_count=F('booked_count') + 1, updated_at=now):
+                return promoted
+            booking_id = _promote_next(session_id, now)
+            if booking_id is None:
+                ClassSession.objects.filter(id=session_id).update(booked_count=F('booked_count') - 1)
+                return promoted
+        promoted.append(booking_id)
+
+
+def set_capacity(session, capacity, now=None):
+    """Change the capacity unless more seats than that are already taken; returns whether it changed."""
+    now = now or timezone.now()
+    changed = ClassSession.objects.filter(id=session.id, booked_count__lte=capacity).update(capacity=capacity, updated_at=now)
+    if changed:
+        fill_from_waitlist(session.id, now)
+    return bool(changed)
+
+
+def waitlist_position(booking):
+    if booking.status != 'waitlisted':
+        return None
+    return ClassBooking.objects.filter(session_id=booking.session_id, status='waitlisted').filter(
+        Q(queued_at__lt=booking.queued_at) | Q(queued_at=booking.queued_at, id__lt=booking.id)
+    ).count() + 1
@@ -0,0 +1,40 @@
+"""
+Per-gym cache namespaces.
+
+Cached gym data (analytics reports and similar) is keyed through
+``gym_cache_key`` which embeds a per-gym version number. Bumping the version
+with ``invalidate_gym_caches`` orphans every entry for that gym at once,
+without having to know which keys were written.
+
+A missing version (never set, or evicted) is seeded from the clock rather
+than 1, so entries written under an evicted version never become current again.
+"""
+
+from django.core.cache import cache
+import time
+
+
+def _version_key(gym_id):
+    return f'gym_cache_version:{gym_id}'
+
+
+def _seed():
+    return int(time.time() * 1000)
+
+
+def gym_cache_version(gym_id):
+    return cache.get_or_set(_version_key(gym_id), _seed, None)
+
+
+def gym_cache_key(gym_id, name, *parts):
+    suffix = ''.join(f':{part}' for part in parts)
+    return f'{name}:{gym_id}:v{gym_cache_version(gym_id)}{suffix}'
+
+
+def invalidate_gym_caches(gym_ids):
+    for gym_id in set(gym_ids):
+        try:
+            cache.incr(_version_key(gym_id))
+        except ValueError:
+            # Never set or evicted: start a version no earlier entry can carry.
+            cache.set(_version_key(gym_id), _seed(), None)
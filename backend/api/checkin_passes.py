@@ -0,0 +1,222 @@
+"""
+Signed check-in passes that a gym's kiosk verifies offline.
+
+A member's app shows a pass (as a QR code) issued for an approved membership.
+The pass is ``<payload>.<signature>``, both base64url without padding:
+
+    payload   = "v1:<member_id>:<gym_id>:<membership_id>:<key_version>:<not_before>:<not_after>:<nonce>"
+    signature = HMAC-SHA256(gym key, payload)
+
+Times are Unix seconds. A pass rotates every ``CHECKIN_PASS_ROTATE_SECONDS``
+and is valid for ``CHECKIN_PASS_TTL_SECONDS`` from the start of its rotation
+period, so a screenshot is soon useless; the random nonce lets a kiosk
+refuse the same pass twice.
+
+The kiosk fetches its gym's keys once (``GET gyms/<id>/kiosk/keys/``) and
+from then on needs no network to check someone in: it checks the signature,
+the gym id and the validity window (allowing ``CHECKIN_PASS_LEEWAY_SECONDS``
+of clock skew). It uploads the scans it accepted in batches, and the server
+verifies every pass again before recording attendance.
+
+Gym keys are derived from SECRET_KEY, the gym id and the gym's
+``checkin_key_version``. Rotating the key bumps the version. Passes signed
+with the previous version are still accepted while they are valid.
+"""
+
+from collections import namedtuple
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare, get_random_string, salted_hmac
+from datetime import datetime, time as dt_time, timedelta, timezone as dt_timezone
+import base64
+import hashlib
+import hmac
+
+from .models import Attendance, Membership
+
+
+VERSION = 'v1'
+KEY_SALT = 'api.checkin_passes.gym_key'
+
+CheckinPass = namedtuple(
+    'CheckinPass',
+    'member_id gym_id membership_id key_version not_before not_after nonce',
+)
+
+
+class InvalidPass(ValueError):
+    pass
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _b64encode(raw):
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode()
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+def gym_key(gym_id, version):
+    return salted_hmac(KEY_SALT, f'{gym_id}:{version}', algorithm='sha256').digest()
+
+
+def gym_keys(gym):
+    """``{version: key}`` a pass for ``gym`` may be signed with: the current key and the one before it."""
+    versions = [gym.checkin_key_version]
+    if gym.checkin_key_version > 1:
+        versions.append(gym.checkin_key_version - 1)
+    return {version: gym_key(gym.id, version) for version in versions}
+
+
+def _sign(key, payload):
+    return hmac.new(key, payload, hashlib.sha256).digest()
+
+
+def issue(membership, now=None):
+    """Sign a pass for an approved ``membership`` (with ``gym`` loaded) valid around ``now``."""
+    now = int((now or timezone.now()).timestamp())
+    rotate = _setting('CHECKIN_PASS_ROTATE_SECONDS', 30)
+    not_before = now - now % rotate
+    not_after = not_before + _setting('CHECKIN_PASS_TTL_SECONDS', 90)
+    if membership.end_date:
+        # Never valid past the last day of the membership.
+        last_moment = datetime.combine(membership.end_date, dt_time.max, tzinfo=timezone.get_current_timezone())
+        not_after = min(not_after, int(last_moment.timestamp()))
+
+    checkin_pass = CheckinPass(
+        member_id=membership.member_id,
+        gym_id=membership.gym_id,
+        membership_id=membership.id,
+        key_version=membership.gym.checkin_key_version,
+        not_before=not_before,
+        not_after=not_after,
+        nonce=get_random_string(12),
+    )
+    payload = ':'.join([VERSION, *(str(part) for part in checkin_pass)]).encode()
+    signature = _sign(gym_key(checkin_pass.gym_id, checkin_pass.key_version), payload)
+    return f'{_b64encode(payload)}.{_b64encode(signature)}', checkin_pass
+
+
+def verify(token, keys, gym_id, at=None):
+    """
+    Check a pass presented at ``gym_id`` at time ``at`` using ``keys`` from
+    ``gym_keys``; returns the ``CheckinPass`` or raises ``InvalidPass``.
+    Needs no database access, like the kiosk's own check.
+    """
+    try:
+        encoded_payload, encoded_signature = token.split('.')
+        payload = _b64decode(encoded_payload)
+        signature = _b64decode(encoded_signature)
+        version, *parts = payload.decode('ascii').split(':')
+        *numbers, nonce = parts
+        checkin_pass = CheckinPass(*(int(number) for number in numbers), nonce)
+    except (AttributeError, TypeError, ValueError):
+        raise InvalidPass('Malformed pass')
+    if version != VERSION:
+        raise InvalidPass('Unsupported pass version')
+
+    key = keys.get(checkin_pass.key_version)
+    if key is None or not constant_time_compare(_sign(key, payload), signature):
+        raise InvalidPass('Invalid signature')
+    if checkin_pass.gym_id != gym_id:
+        raise InvalidPass('Pass is for another gym')
+
+    moment = (at or timezone.now()).timestamp()
+    leeway = _setting('CHECKIN_PASS_LEEWAY_SECONDS', 30)
+    if moment < checkin_pass.not_before - leeway or moment > checkin_pass.not_after + leeway:
+        raise InvalidPass('Pass is expired or not yet valid')
+    return checkin_pass
+
+
+def kiosk_keys(gym):
+    return {
+        'gym_id': gym.id,
+        'algorithm': 'HMAC-SHA256',
+        'current_version': gym.checkin_key_version,
+        'keys': [
+            {'version': version, 'key': _b64encode(key)}
+            for version, key in sorted(gym_keys(gym).items(), reverse=True)
+        ],
+        'leeway_seconds': _setting('CHECKIN_PASS_LEEWAY_SECONDS', 30),
+    }
+
+
+def pass_window(checkin_pass):
+    return (
+        datetime.fromtimestamp(checkin_pass.not_before, dt_timezone.utc),
+        datetime.fromtimestamp(checkin_pass.not_after, dt_timezone.utc),
+    )
+
+
+def record_scans(gym, scans, now=None):
+    """
+    Record attendance for a kiosk's batch of ``{'token': pass, 'scanned_at': datetime}``.
+    Returns how many were recorded, how many were already checked in, and the rejected ones by index.
+    """
+    now = now or timezone.now()
+    oldest = now - timedelta(days=_setting('CHECKIN_SCAN_MAX_AGE_DAYS', 3))
+    future = now + timedelta(seconds=_setting('CHECKIN_PASS_LEEWAY_SECONDS', 30))
+    keys = gym_keys(gym)
+
+    rejected = []
+    visits = {}
+    duplicates = 0
+    for index, scan in enumerate(scans):
+        scanned_at = scan['scanned_at']
+        if not oldest <= scanned_at <= future:
+            rejected.append({'index': index, 'error': 'Scan time is too old or in the future'})
+            continue
+        try:
+            checkin_pass = verify(scan['token'], keys, gym.id, at=scanned_at)
+        except InvalidPass as e:
+            rejected.append({'index': index, 'error': str(e)})
+            continue
+        # The first scan of the day is the visit; a kiosk may upload a member more than once.
+        visit = (checkin_pass.member_id, timezone.localdate(scanned_at))
+        if visit in visits:
+            duplicates += 1
+        if visit not in visits or scanned_at < visits[visit][1]:
+            visits[visit] = (index, scanned_at, checkin_pass.membership_id)
+
+    memberships = set(
+        Membership.objects.filter(
+            id__in={membership_id for _, _, membership_id in visits.values()}, gym=gym
+        ).values_list('id', 'member_id')
+    )
+    checked_in = set(
+        Attendance.objects.filter(
+            gym=gym,
+            member_id__in={member_id for member_id, _ in visits},
+            date__in={day for _, day in visits},
+        ).values_list('member_id', 'date')
+    )
+
+    recorded = 0
+    for (member_id, day), (index, scanned_at, membership_id) in sorted(visits.items(), key=lambda item: item[0][1]):
+        if (membership_id, member_id) not in memberships:
+            rejected.append({'index': index, 'error': 'Membership no longer exists'})
+            continue
+        if (member_id, day) in checked_in:
+            duplicates += 1
+            continue
+        attendance = Attendance(member_id=member_id, gym=gym, date=day)
+        attendance.checked_in_at = scanned_at
+        try:
+            with transaction.atomic():
+                attendance.save()
+        except IntegrityError:
+            # Checked in through the app, or by another kiosk, since the lookup above.
+            duplicates += 1
+            continue
+        recorded += 1
+
+    return {
+        'recorded': recorded,
+        'duplicates': duplicates,
+        'rejected': sorted(rejected, key=lambda item: item['index']),
+    }
@@ -0,0 +1,49 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, Warning, register
+
+
+# Backends whose entries live in one process only.
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+# Backends whose incr/decr are atomic across processes.
+ATOMIC_COUNTER_CACHES = (
+    'django.core.cache.backends.redis.RedisCache',
+    'django.core.cache.backends.memcached.PyMemcacheCache',
+    'django.core.cache.backends.memcached.PyLibMCCache',
+)
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """Cache invalidation, throttles and occupancy counters only work when every process shares the default cache."""
+    backend = settings.CACHES.get('default', {}).get('BACKEND', PROCESS_LOCAL_CACHES[0])
+    if backend in PROCESS_LOCAL_CACHES:
+        return [
+            Error(
+                f'The default cache ({backend}) is not shared between processes.',
+                hint='Configure CACHES with Redis, Memcached or the database cache so web workers and run_worker see the same entries.',
+                id='api.E001',
+            )
+        ]
+    return []
+
+
+@register(Tags.caches)
+def check_atomic_counters(app_configs, **kwargs):
+    """Throttle and occupancy counters lose concurrent increments on a cache whose incr is a read and a write."""
+    aliases = {'default', getattr(settings, 'THROTTLE_CACHE', 'default')}
+    warnings = []
+    for alias in sorted(aliases):
+        backend = settings.CACHES.get(alias, {}).get('BACKEND', PROCESS_LOCAL_CACHES[0])
+        if backend not in ATOMIC_COUNTER_CACHES and backend not in PROCESS_LOCAL_CACHES:
+            warnings.append(
+                Warning(
+                    f'The {alias!r} cache ({backend}) does not increment atomically, so rate limits and live occupancy can drift under concurrent requests.',
+                    hint='Set REDIS_URL (or configure Memcached) in production.',
+                    id='api.W001',
+                )
+            )
+    return warnings
@@ -0,0 +1,136 @@
+"""
+Monthly cohort retention for a gym, computed with NumPy.
+
+Members are grouped by the month of their earliest ``Membership.start_date``.
+Attendance is read from the per-year bitmaps (``AttendanceBitmap``) and
+unpacked into day arrays in one vectorized step, so the whole matrix is built
+from array operations without a Python loop over members or check-ins.
+"""
+
+from django.core.cache import cache
+from django.conf import settings
+import numpy as np
+
+from .attendance_bits import YEAR_BYTES
+from .caching import gym_cache_key
+from .models import AttendanceBitmap, Membership
+
+
+def _month_index(days):
+    """Months since 1970-01 for an array of ``datetime64[D]`` values."""
+    return days.astype('datetime64[M]').astype(np.int64)
+
+
+def load_cohorts(gym_id):
+    """Return ``(member_ids, cohort_months)`` with each member's first start month, sorted by member id."""
+    rows = list(
+        Membership.objects.filter(gym_id=gym_id, start_date__isnull=False)
+        .values_list('member_id', 'start_date')
+    )
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+    member_ids = np.fromiter((member_id for member_id, _ in rows), dtype=np.int64, count=len(rows))
+    start_months = _month_index(np.array([start for _, start in rows], dtype='datetime64[D]'))
+
+    # Earliest membership per member: sort by (member, month) and keep the first of each member.
+    order = np.lexsort((start_months, member_ids))
+    member_ids, start_months = member_ids[order], start_months[order]
+    first = np.concatenate(([True], member_ids[1:] != member_ids[:-1]))
+    return member_ids[first], start_months[first]
+
+
+def load_attendance_days(gym_id, years=None):
+    """Return ``(member_ids, days)`` with one ``datetime64[D]`` entry per attended day at the gym."""
+    bitmaps = AttendanceBitmap.objects.filter(gym_id=gym_id)
+    if years is not None:
+        bitmaps = bitmaps.filter(year__in=years)
+    rows = list(bitmaps.values_list('member_id', 'year', 'bits'))
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype='datetime64[D]')
+
+    member_ids = np.fromiter((member_id for member_id, _, _ in rows), dtype=np.int64, count=len(rows))
+    row_years = np.fromiter((year for _, year, _ in rows), dtype=np.int64, count=len(rows))
+    packed = np.frombuffer(
+        b''.join(bytes(bits).ljust(YEAR_BYTES, b'\0') for _, _, bits in rows),
+        dtype=np.uint8,
+    ).reshape(len(rows), YEAR_BYTES)
+
+    row_index, day_index = np.nonzero(np.unpackbits(packed, axis=1, bitorder='little'))
+    year_starts = (row_years - 1970).astype('datetime64[Y]').astype('datetime64[D]')
+    days = year_starts[row_index] + day_index.astype('timedelta64[D]')
+    return member_ids[row_index], days
+
+
+def load_attendance(gym_id):
+    """Return ``(member_ids, months)`` with one entry per attended day at the gym."""
+    member_ids, days = load_attendance_days(gym_id)
+    return member_ids, _month_index(days)
+
+
+def retention_matrix(cohort_members, cohort_months, attendance_members, attendance_months, max_offset, current_month):
+    """
+    Build the retention table.
+
+    Returns ``(cohorts, sizes, retention)`` where ``retention[i, k]`` is the share
+    of cohort ``i`` that checked in during month ``cohorts[i] + k``, or NaN for
+    months that have not happened yet.
+    """
+    cohorts, cohort_of_member, sizes = np.unique(cohort_months, return_inverse=True, return_counts=True)
+    retention = np.full((len(cohorts), max_offset + 1), np.nan)
+    if not len(cohorts):
+        return cohorts, sizes, retention
+
+    # Map each attended day to its member's cohort; drop members without a start date.
+    position = np.searchsorted(cohort_members, attendance_members)
+    position = np.clip(position, 0, len(cohort_members) - 1)
+    known = cohort_members[position] == attendance_members
+    position, months = position[known], attendance_months[known]
+
+    offsets = months - cohort_months[position]
+    in_window = (offsets >= 0) & (offsets <= max_offset)
+    position, offsets = position[in_window], offsets[in_window]
+
+    # Count each member once per month offset, then sum members per (cohort, offset).
+    width = max_offset + 1
+    active = np.unique(position * width + offsets)
+    active_members, active_offsets = active // width, active % width
+    counts = np.bincount(
+        cohort_of_member[active_members] * width + active_offsets,
+        minlength=len(cohorts) * width,
+    ).reshape(len(cohorts), width)
+
+    elapsed = current_month - cohorts
+    observed = np.arange(width)[None, :] <= elapsed[:, None]
+    retention[observed] = (counts / sizes[:, None])[observed]
+    return cohorts, sizes, retention
+
+
+def cohort_retention(gym_id, max_offset=3, today=None):
+    """Uncached retention report for a gym, ready to return from a view."""
+    today = np.datetime64(today, 'D') if today is not None else np.datetime64('today', 'D')
+    current_month = int(_month_index(np.array([today]))[0])
+
+    cohort_members, cohort_months = load_cohorts(gym_id)
+    attendance_members, attendance_months = load_attendance(gym_id)
+    cohorts, sizes, retention = retention_matrix(
+        cohort_members, cohort_months, attendance_members, attendance_months, max_offset, current_month
+    )
+
+    return [
+        {
+            'cohort': str(np.datetime64(int(month), 'M')),
+            'size': int(size),
+            'retention': [None if np.isnan(value) else round(float(value), 4) for value in row],
+        }
+        for month, size, row in zip(cohorts, sizes, retention)
+    ]
+
+
+def cached_cohort_retention(gym_id, max_offset=3):
+    key = gym_cache_key(gym_id, 'cohort_retention', max_offset)
+    report = cache.get(key)
+    if report is None:
+        report = cohort_retention(gym_id, max_offset)
+        cache.set(key, report, getattr(settings, 'COHORT_RETENTION_CACHE_SECONDS', 3600))
+    return report
@@ -0,0 +1,86 @@
+"""
+Gym owner dashboard: each of the owner's gyms with its counters, plan-wise
+member distribution and the pending requests queue.
+
+Counters are correlated subqueries annotated onto the gym query rather than
+COUNTs over joins, so they neither multiply each other's rows nor pull
+memberships into Python. The dashboard is three queries however large the gym.
+"""
+
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from datetime import date
+
+from .fast_serializers import MembershipValuesSerializer
+from .models import AttendanceDailyRollup, Gym, Membership, MembershipPlan, Notice
+from .serializers import GymSerializer
+
+
+PENDING_REQUESTS_SHOWN = 20
+
+COUNTERS = ('pending_requests', 'approved_members', 'today_checkins', 'active_plans', 'active_notices', 'scheduled_notices')
+
+
+def _count(queryset):
+    counted = queryset.filter(gym=OuterRef('pk')).order_by().values('gym').annotate(total=Count('*')).values('total')
+    return Coalesce(Subquery(counted, output_field=IntegerField()), Value(0))
+
+
+def owner_dashboard(user, today=None):
+    today = today or date.today()
+
+    gyms = (
+        Gym.objects.filter(owner=user)
+        .select_related('owner')
+        .annotate(
+            pending_requests=_count(Membership.objects.filter(status='pending')),
+            approved_members=_count(Membership.objects.filter(status='approved')),
+            # Today's check-ins come from the daily rollup row instead of counting Attendance.
+            today_checkins=Coalesce(
+                Subquery(
+                    AttendanceDailyRollup.objects.filter(gym=OuterRef('pk'), date=today).values('checkins')[:1],
+                    output_field=IntegerField(),
+                ),
+                Value(0),
+            ),
+            active_plans=_count(MembershipPlan.objects.filter(is_active=True)),
+            active_notices=_count(Notice.live()),
+            scheduled_notices=_count(Notice.objects.filter(is_active=True, publish_at__gt=timezone.now())),
+        )
+        .order_by('-created_at')
+    )
+
+    plans = (
+        MembershipPlan.objects.filter(gym__owner=user)
+        .order_by('gym_id', 'duration_months')
+        .values('id', 'gym_id', 'duration_months', 'price', 'is_active')
+        .annotate(
+            approved_members=Count('memberships', filter=Q(memberships__status='approved')),
+            pending_requests=Count('memberships', filter=Q(memberships__status='pending')),
+        )
+    )
+    plans_by_gym = {}
+    for plan in plans:
+        plan['price'] = str(plan['price'])  # same as MembershipPlanSerializer
+        plans_by_gym.setdefault(plan.pop('gym_id'), []).append(plan)
+
+    dashboard = []
+    for gym in gyms:
+        data = GymSerializer(gym).data
+        data['counts'] = {name: getattr(gym, name) for name in COUNTERS}
+        gym_plans = plans_by_gym.get(gym.id, [])
+        data['plan_distribution'] = gym_plans
+        # Plan is optional on a membership; those members are counted here rather than lost.
+        data['counts']['members_without_plan'] = gym.approved_members - sum(plan['approved_members'] for plan in gym_plans)
+        dashboard.append(data)
+
+    pending = (
+        Membership.objects.filter(gym__owner=user, status='pending')
+        .order_by('created_at')[:PENDING_REQUESTS_SHOWN]
+    )
+
+    return {
+        'gyms': dashboard,
+        'pending_requests': MembershipValuesSerializer(pending).data,
+    }
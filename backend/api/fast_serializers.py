@@ -0,0 +1,137 @@
+"""
+Read-only serializers that build response dicts straight from ``values_list()`` rows.
+
+They skip model instantiation and per-field ``to_representation`` calls, and
+compute related names in SQL, which matters on list endpoints returning
+thousands of rows. Output is kept identical to the matching ModelSerializer in
+``api.serializers``; ``manage.py check_serializer_parity`` compares the two.
+"""
+
+from django.db.models import CharField, Value
+from django.db.models.functions import Concat, Trim
+from rest_framework import serializers
+
+
+_datetime_field = serializers.DateTimeField()
+
+
+def full_name(prefix):
+    """SQL equivalent of ``User.get_full_name()`` for the user behind ``prefix``."""
+    return Trim(Concat(
+        f'{prefix}__first_name', Value(' '), f'{prefix}__last_name',
+        output_field=CharField(),
+    ))
+
+
+def _datetime(value):
+    return _datetime_field.to_representation(value) if value else None
+
+
+def _date(value):
+    return value.isoformat() if value else None
+
+
+def _string(value):
+    return None if value is None else str(value)
+
+
+def _formatted(value):
+    return value.strftime('%B %d, %Y at %I:%M %p')
+
+
+class ValuesSerializer:
+    """
+    Subclasses declare ``columns`` as ``(name, source)`` pairs in output order,
+    where ``source`` is a ``values_list()`` lookup or an expression, plus
+    optional ``converters`` applied per output name.
+
+    Names listed in ``omit_if_null`` are dropped from a row when their value is
+    ``None``, mirroring DRF skipping a dotted source that crosses a null relation.
+    """
+
+    columns = ()
+    converters = {}
+    omit_if_null = ()
+
+    def __init__(self, queryset):
+        self.queryset = queryset
+
+    @property
+    def data(self):
+        names = [name for name, _ in self.columns]
+        sources = [source for _, source in self.columns]
+        converters = [self.converters.get(name) for name in names]
+        indexed = list(enumerate(zip(names, converters)))
+        omit = [names.index(name) for name in self.omit_if_null]
+
+        rows = []
+        for row in self.queryset.values_list(*sources):
+            item = {
+                name: convert(row[i]) if convert else row[i]
+                for i, (name, convert) in indexed
+            }
+            for i in omit:
+                if row[i] is None:
+                    del item[names[i]]
+            rows.append(item)
+        return rows
+
+
+class MembershipValuesSerializer(ValuesSerializer):
+    columns = (
+        ('id', 'id'),
+        ('member', 'member_id'),
+        ('member_name', full_name('member')),
+        ('gym', 'gym_id'),
+        ('gym_name', 'gym__name'),
+        ('plan', 'plan_id'),
+        ('plan_details', 'plan__duration_months'),
+        ('status', 'status'),
+        ('start_date', 'start_date'),
+        ('end_date', 'end_date'),
+        ('owner_name', full_name('gym__owner')),
+        ('created_at', 'created_at'),
+    )
+    converters = {
+        'plan_details': _string,
+        'start_date': _date,
+        'end_date': _date,
+        'created_at': _datetime,
+    }
+    omit_if_null = ('plan_details',)
+
+
+class AttendanceValuesSerializer(ValuesSerializer):
+    columns = (
+        ('id', 'id'),
+        ('member_name', full_name('member')),
+        ('gym_name', 'gym__name'),
+        ('date', 'date'),
+        ('streak_count', 'streak_count'),
+        ('created_at', 'created_at'),
+    )
+    converters = {
+        'date': _date,
+        'created_at': _datetime,
+    }
+
+
+class NoticeValuesSerializer(ValuesSerializer):
+    columns = (
+        ('id', 'id'),
+        ('gym', 'gym_id'),
+        ('gym_name', 'gym__name'),
+        ('title', 'title'),
+        ('message', 'message'),
+        ('created_at', 'created_at'),
+        ('created_at_formatted', 'created_at'),
+        ('is_active', 'is_active'),
+        ('publish_at', 'publish_at'),
+        ('expire_at', 'expire_at'),
+    )
+    converters = {
+        'created_at': _datetime,
+        'created_at_formatted': _formatted,
+        'publish_at': _datetime,
+        'expire_at': _datetime,
+    }
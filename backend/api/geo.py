@@ -0,0 +1,177 @@
+"""
+Coordinates for gyms and "near me" lookups.
+
+Geocoding is a local hook: ``settings.GYM_GEOCODER`` names a callable taking an
+address and returning ``(latitude, longitude)`` or ``None``. The default,
+``local_geocode``, needs no external service: it reads coordinates written
+into the address, or falls back to a small gazetteer of city and locality
+centres (extendable with ``settings.GEOCODER_PLACES``).
+
+Nearest-gym queries pre-filter on an indexed latitude/longitude bounding box
+and then rank the survivors by exact haversine distance with NumPy.
+"""
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+import math
+import re
+
+import numpy as np
+
+from .models import Gym
+
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+# City centres, each with optional locality centres that are more precise when named in the address.
+PLACES = {
+    'ahmedabad': ((23.0225, 72.5714), {
+        'navrangpura': (23.0365, 72.5611),
+        'satellite': (23.0300, 72.5176),
+        'vastrapur': (23.0350, 72.5290),
+        'bodakdev': (23.0395, 72.5063),
+        'jodhpur': (23.0225, 72.5250),
+        'maninagar': (22.9962, 72.5996),
+    }),
+    'mumbai': ((19.0760, 72.8777), {
+        'andheri': (19.1136, 72.8697),
+        'bandra': (19.0596, 72.8295),
+        'powai': (19.1176, 72.9060),
+    }),
+    'pune': ((18.5204, 73.8567), {
+        'kothrud': (18.5074, 73.8077),
+        'hinjewadi': (18.5913, 73.7389),
+    }),
+    'delhi': ((28.6139, 77.2090), {}),
+    'new delhi': ((28.6139, 77.2090), {}),
+    'bengaluru': ((12.9716, 77.5946), {
+        'koramangala': (12.9352, 77.6245),
+        'indiranagar': (12.9784, 77.6408),
+    }),
+    'bangalore': ((12.9716, 77.5946), {}),
+    'chennai': ((13.0827, 80.2707), {}),
+    'kolkata': ((22.5726, 88.3639), {}),
+    'hyderabad': ((17.3850, 78.4867), {}),
+    'jaipur': ((26.9124, 75.7873), {}),
+    'surat': ((21.1702, 72.8311), {}),
+    'vadodara': ((22.3072, 73.1812), {}),
+    'gandhinagar': ((23.2156, 72.6369), {}),
+    'rajkot': ((22.3039, 70.8022), {}),
+    'lucknow': ((26.8467, 80.9462), {}),
+    'nagpur': ((21.1458, 79.0882), {}),
+    'indore': ((22.7196, 75.8577), {}),
+    'chandigarh': ((30.7333, 76.7794), {}),
+    'kochi': ((9.9312, 76.2673), {}),
+    'noida': ((28.5355, 77.3910), {}),
+    'gurugram': ((28.4595, 77.0266), {}),
+}
+
+_COORDINATES = re.compile(r'(-?\d{1,2}\.\d+)\s*,\s*(-?\d{1,3}\.\d+)')
+
+
+def _places():
+    return {**PLACES, **getattr(settings, 'GEOCODER_PLACES', {})}
+
+
+def _mentions(text, name):
+    return re.search(rf'\b{re.escape(name)}\b', text) is not None
+
+
+def local_geocode(address):
+    """Best-effort ``(latitude, longitude)`` for an address without leaving the process."""
+    if not address:
+        return None
+
+    match = _COORDINATES.search(address)
+    if match:
+        latitude, longitude = float(match.group(1)), float(match.group(2))
+        if -90 <= latitude <= 90 and -180 <= longitude <= 180:
+            return latitude, longitude
+
+    # Addresses run from most to least specific, so the city is the right-most known name
+    # and a locality only counts when it appears before it ("..., Jodhpur, Ahmedabad").
+    parts = [part.strip().lower() for part in address.split(',')]
+    places = _places()
+    for position in range(len(parts) - 1, -1, -1):
+        for city, (centre, localities) in places.items():
+            if not _mentions(parts[position], city):
+                continue
+            before = ', '.join(parts[:position])
+            for locality, point in localities.items():
+                if _mentions(before, locality):
+                    return point
+            return centre
+    return None
+
+
+def geocode(address):
+    geocoder = import_string(getattr(settings, 'GYM_GEOCODER', 'api.geo.local_geocode'))
+    return geocoder(address)
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """
+    ``(min_lat, max_lat, lng_ranges)`` covering every point within ``radius_km``.
+
+    ``lng_ranges`` holds two ranges when the box crosses the antimeridian.
+    """
+    lat_delta = radius_km / KM_PER_DEGREE
+    min_lat, max_lat = latitude - lat_delta, latitude + lat_delta
+    if min_lat <= -90 or max_lat >= 90:
+        # The circle reaches a pole, so every longitude is in range.
+        return max(min_lat, -90), min(max_lat, 90), [(-180, 180)]
+
+    lng_delta = radius_km / (KM_PER_DEGREE * math.cos(math.radians(latitude)))
+    min_lng, max_lng = longitude - lng_delta, longitude + lng_delta
+    if min_lng < -180:
+        return min_lat, max_lat, [(min_lng + 360, 180), (-180, max_lng)]
+    if max_lng > 180:
+        return min_lat, max_lat, [(min_lng, 180), (-180, max_lng - 360)]
+    return min_lat, max_lat, [(min_lng, max_lng)]
+
+
+def haversine_km(latitude, longitude, latitudes, longitudes):
+    """Distances in km from one point to arrays of points."""
+    lat1, lng1 = math.radians(latitude), math.radians(longitude)
+    lat2, lng2 = np.radians(latitudes), np.radians(longitudes)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def candidates(latitude, longitude, radius_km, queryset=None):
+    """``(ids, latitudes, longitudes)`` of approved gyms inside the bounding box."""
+    from django.db.models import Q
+
+    min_lat, max_lat, lng_ranges = bounding_box(latitude, longitude, radius_km)
+    in_lng = Q()
+    for low, high in lng_ranges:
+        in_lng |= Q(longitude__gte=low, longitude__lte=high)
+
+    gyms = queryset if queryset is not None else Gym.objects.filter(status='approved')
+    rows = list(
+        gyms.filter(in_lng, latitude__gte=min_lat, latitude__lte=max_lat)
+        .values_list('id', 'latitude', 'longitude')
+    )
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty(0), np.empty(0)
+    ids, latitudes, longitudes = zip(*rows)
+    return np.array(ids, dtype=np.int64), np.array(latitudes), np.array(longitudes)
+
+
+def nearest_gyms(latitude, longitude, radius_km=10, limit=20, queryset=None):
+    """
+    Return ``(total, [(gym_id, distance_km), ...])`` for approved gyms within
+    ``radius_km``, nearest first, where ``total`` counts every gym in range.
+    """
+    ids, latitudes, longitudes = candidates(latitude, longitude, radius_km, queryset)
+    distances = haversine_km(latitude, longitude, latitudes, longitudes)
+    inside = distances <= radius_km
+    ids, distances = ids[inside], distances[inside]
+
+    if len(ids) > limit:
+        # Only the closest ``limit`` need a full sort.
+        nearest = np.argpartition(distances, limit)[:limit]
+        ids, distances = ids[nearest], distances[nearest]
+    order = np.lexsort((ids, distances))
+    return int(inside.sum()), [(int(ids[i]), float(distances[i])) for i in order]
@@ -0,0 +1,141 @@
+"""
+Everything a member's home screen shows, assembled in one request.
+
+Each section runs under a query budget. Going over it logs a warning instead of
+failing the request, so a regression (an N+1 slipping into a serializer, say)
+shows up in the logs rather than as a slow screen. Lookups are shared between
+sections: the membership list picks the active gym, the last 30 days of
+history answer "checked in today?", and the member's bitmap history feeds
+both their stats and their own leaderboard entry. The leaderboard loads
+bitmaps only for the members on its page.
+"""
+
+from contextlib import contextmanager
+from django.conf import settings
+from django.db import connection
+from datetime import date, datetime, timedelta
+import logging
+
+from . import attendance_bits
+from .fast_serializers import AttendanceValuesSerializer, MembershipValuesSerializer, NoticeValuesSerializer
+from .leaderboard import board_size, gym_leaderboard, member_entry
+from .models import Attendance, AttendanceBitmap, Membership, Notice
+from .notices import unread_count
+
+
+logger = logging.getLogger(__name__)
+
+SECTION_QUERY_BUDGETS = {
+    'memberships': 1,
+    'history': 1,
+    'stats': 1,
+    'leaderboard': 4,
+    'notices': 2,
+}
+
+
+@contextmanager
+def query_budget(section, counts):
+    executed = []
+
+    def count(execute, sql, params, many, context):
+        executed.append(sql)
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(count):
+        yield
+    counts[section] = len(executed)
+    budget = SECTION_QUERY_BUDGETS[section]
+    if len(executed) > budget:
+        logger.warning(
+            'Home screen section went over its query budget',
+            extra={'section': section, 'queries': len(executed), 'budget': budget},
+        )
+
+
+def _active_membership(memberships, gym_id=None):
+    approved = [row for row in memberships if row['status'] == 'approved']
+    if gym_id is not None:
+        approved = [row for row in approved if row['gym'] == gym_id]
+    # Most recently started membership wins when a member belongs to several gyms.
+    return max(approved, key=lambda row: (row['start_date'] or '', row['id']), default=None)
+
+
+def _start_date(membership, today):
+    if membership['start_date']:
+        return date.fromisoformat(membership['start_date'])
+    if membership['created_at']:
+        return datetime.fromisoformat(membership['created_at'].replace('Z', '+00:00')).date()
+    return today
+
+
+def _stats(history, start_date, today):
+    total_days = (today - start_date).days + 1
+    attended_days = attendance_bits.count_days(history)
+    attendance_percentage = (attended_days / total_days * 100) if total_days > 0 else 0
+    return {
+        'total_attendance': attended_days,
+        'current_streak': attendance_bits.current_streak(history),
+        'longest_streak': attendance_bits.longest_streak(history),
+        'attendance_percentage': round(attendance_percentage, 2),
+        'total_days': total_days,
+        'attended_days': attended_days,
+    }
+
+
+def member_home(user, gym_id=None, leaderboard_size=5, today=None):
+    today = today or date.today()
+    counts = {}
+
+    with query_budget('memberships', counts):
+        memberships = MembershipValuesSerializer(Membership.objects.filter(member=user).order_by('-created_at')).data
+    active = _active_membership(memberships, gym_id)
+
+    home = {
+        'gym': None,
+        'membership': active,
+        'memberships': memberships,
+        'today': None,
+        'stats': None,
+        'history': [],
+        'leaderboard': None,
+        'notices': [],
+        'unread_notices': 0,
+    }
+
+    if active is not None:
+        home['gym'] = {'id': active['gym'], 'name': active['gym_name']}
+
+        with query_budget('history', counts):
+            history = AttendanceValuesSerializer(
+                Attendance.objects.filter(member=user, gym_id=active['gym'], date__gte=today - timedelta(days=30)).order_by('-date')
+            ).data
+        today_row = next((row for row in history if row['date'] == today.isoformat()), None)
+        home['history'] = history
+        home['today'] = {'marked': today_row is not None, 'attendance': today_row}
+
+        with query_budget('stats', counts):
+            bits, _ = AttendanceBitmap.history(user.id, active['gym'])
+        home['stats'] = _stats(bits, _start_date(active, today), today)
+
+        with query_budget('leaderboard', counts):
+            # Only the top of the board is loaded; the member's own place is counted, not searched for.
+            top = gym_leaderboard(active['gym'], limit=leaderboard_size, today=today)
+            me = next((entry for entry in top if entry['member_id'] == user.id), None)
+            if me is None:
+                me = member_entry(active['gym'], user, _start_date(active, today), bits, today=today)
+            home['leaderboard'] = {
+                'top': top,
+                'me': me,
+                'size': board_size(active['gym']),
+            }
+
+    approved_gyms = {row['gym'] for row in memberships if row['status'] == 'approved'}
+    if approved_gyms:
+        with query_budget('notices', counts):
+            home['notices'] = NoticeValuesSerializer(Notice.live().filter(gym_id__in=approved_gyms)).data
+            home['unread_notices'] = unread_count(user)
+
+    if settings.DEBUG:
+        home['query_counts'] = counts
+    return home
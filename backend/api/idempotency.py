@@ -0,0 +1,208 @@
+"""
+Idempotency-Key support for mutating endpoints.
+
+A client that may retry a POST sends a unique ``Idempotency-Key`` header. The
+first request with a key runs the view and stores its response for
+``IDEMPOTENCY_KEY_TTL_SECONDS``; retries with the same key get that response
+back (marked ``Idempotent-Replayed: true``) without running the view again.
+
+* Keys are scoped to the authenticated user. Requests without the header, or
+  from anonymous users, run as usual.
+* A retry that arrives while the original is still running gets 409 with
+  ``Retry-After`` straight away, rather than holding a worker while it waits.
+* Reusing a key for a different method, path or body is rejected with 422.
+* Server errors (5xx and exceptions) are not stored: the key is released so
+  the retry runs the view again. Other responses, errors included, are replayed.
+* A request that died while holding a key is taken over once its lock
+  (``IDEMPOTENCY_LOCK_SECONDS``) has expired.
+* Retries that will be answered from a key (same user, key, method, path and
+  body) do not count against the view's rate limits (see api/throttling.py),
+  so a client retrying a timed-out request gets the stored response rather
+  than 429. Any other request with a key is counted as usual.
+
+Decorate the view method::
+
+    class MarkAttendanceView(APIView):
+        @idempotent
+        def post(self, request, gym_id):
+            ...
+"""
+
+from datetime import timedelta
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.http.request import RawPostDataException
+from django.utils import timezone
+from functools import wraps
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+import hashlib
+import json
+import logging
+import uuid
+
+from .models import IdempotencyKey
+
+
+logger = logging.getLogger(__name__)
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+RETRY_AFTER_SECONDS = 1
+
+
+class KeyReused(Exception):
+    pass
+
+
+class StillProcessing(Exception):
+    pass
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _fingerprint(request):
+    try:
+        body = request._request.body
+    except RawPostDataException:
+        # The body stream was consumed before the view ran; fall back to the parsed data.
+        body = json.dumps(request.data, cls=JSONEncoder, sort_keys=True).encode()
+    digest = hashlib.sha256()
+    for part in (request.method.encode(), request.path.encode(), body):
+        digest.update(part)
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def _acquire(request, key, fingerprint):
+    """
+    Return ``(record, token)``: a lock token when this request should run the
+    view, ``None`` when ``record`` holds a completed response to replay.
+    """
+    while True:
+        now = timezone.now()
+        token = uuid.uuid4().hex
+        locked_until = now + timedelta(seconds=_setting('IDEMPOTENCY_LOCK_SECONDS', 120))
+        try:
+            with transaction.atomic():
+                record = IdempotencyKey.objects.create(
+                    user=request.user,
+                    key=key,
+                    request_hash=fingerprint,
+                    method=request.method,
+                    path=request.path[:500],
+                    lock_token=token,
+                    locked_until=locked_until,
+                    expires_at=now + timedelta(seconds=_setting('IDEMPOTENCY_KEY_TTL_SECONDS', 86400)),
+                )
+            return record, token
+        except IntegrityError:
+            pass
+
+        record = IdempotencyKey.objects.filter(user=request.user, key=key).first()
+        if record is None:
+            # Released by a failed original (or pruned) in the meantime.
+            continue
+        if record.expires_at <= now:
+            IdempotencyKey.objects.filter(id=record.id, expires_at__lte=now).delete()
+            continue
+        if record.request_hash != fingerprint:
+            raise KeyReused()
+        if record.status == 'completed':
+            return record, None
+        if record.locked_until <= now:
+            taken = IdempotencyKey.objects.filter(
+                id=record.id, status='processing', lock_token=record.lock_token
+            ).update(lock_token=token, locked_until=locked_until)
+            if taken:
+                logger.warning('Took over abandoned idempotency key', extra={'idempotency_key_id': record.id})
+                return record, token
+            continue
+        raise StillProcessing()
+
+
+def answers_from_key(request, view):
+    """
+    Whether an ``@idempotent`` view will answer the request from its key (the
+    same method, path and body completed, or is still running), so the view
+    will not run again; throttles let such retries through.
+    """
+    handler = getattr(view, request.method.lower(), None)
+    if not getattr(handler, 'idempotent', False):
+        return False
+    key = request.headers.get(HEADER)
+    if not key or len(key) > MAX_KEY_LENGTH or not request.user.is_authenticated:
+        return False
+    now = timezone.now()
+    return IdempotencyKey.objects.filter(
+        user=request.user,
+        key=key,
+        method=request.method,
+        path=request.path[:500],
+        request_hash=_fingerprint(request),
+        expires_at__gt=now,
+    ).filter(
+        Q(status='completed') | Q(status='processing', locked_until__gt=now)
+    ).exists()
+
+
+def _replay(record):
+    return Response(
+        json.loads(record.response_body) if record.response_body else None,
+        status=record.response_status,
+        headers={'Idempotent-Replayed': 'true'},
+    )
+
+
+def idempotent(view_method):
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key or not request.user.is_authenticated:
+            return view_method(self, request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return Response({'error': f'{HEADER} must be at most {MAX_KEY_LENGTH} characters'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            record, token = _acquire(request, key, _fingerprint(request))
+        except KeyReused:
+            return Response({'error': f'{HEADER} was already used for a different request'}, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+        except StillProcessing:
+            return Response(
+                {'error': 'A request with this Idempotency-Key is still being processed'},
+                status=status.HTTP_409_CONFLICT,
+                headers={'Retry-After': str(RETRY_AFTER_SECONDS)},
+            )
+        if token is None:
+            return _replay(record)
+
+        owned = IdempotencyKey.objects.filter(id=record.id, lock_token=token, status='processing')
+        try:
+            response = view_method(self, request, *args, **kwargs)
+        except Exception:
+            owned.delete()
+            raise
+
+        if response.status_code >= 500 or not isinstance(response, Response):
+            owned.delete()
+            return response
+
+        owned.update(
+            status='completed',
+            response_status=response.status_code,
+            response_body=json.dumps(response.data, cls=JSONEncoder) if response.data is not None else '',
+            lock_token='',
+            locked_until=None,
+        )
+        return response
+    wrapper.idempotent = True
+    return wrapper
+
+
+def prune_expired(now=None):
+    deleted, _ = IdempotencyKey.objects.filter(expires_at__lte=now or timezone.now()).delete()
+    return deleted
@@ -0,0 +1,83 @@
+"""
+Background jobs run by ``manage.py run_worker`` (see api/tasks.py).
+
+Each wraps work that already exists as a management command or helper, so it
+can be queued from a request, or scheduled from cron with ``enqueue_task``.
+"""
+
+from django.conf import settings
+from django.utils import timezone
+from datetime import timedelta
+
+from .tasks import task
+
+
+@task(name='expire_memberships')
+def expire_memberships():
+    from .models import Membership
+    return Membership.expire_overdue()
+
+
+@task(name='archive_expired_notices')
+def archive_expired_notices():
+    from .models import Notice
+    days = getattr(settings, 'NOTICE_ARCHIVE_AFTER_DAYS', 7)
+    return Notice.archive_expired(timezone.now() - timedelta(days=days))
+
+
+@task(name='prune_sync_tombstones')
+def prune_sync_tombstones():
+    from .sync import prune_tombstones
+    return prune_tombstones()
+
+
+@task(name='rebuild_attendance_streaks', timeout=1800)
+def rebuild_attendance_streaks(gym_id=None):
+    """Recalculate attendance bitmaps (streaks, counts) from the Attendance table."""
+    from .models import AttendanceBitmap
+    return AttendanceBitmap.rebuild(gym_id)
+
+
+@task(name='rebuild_leaderboards', timeout=1800)
+def rebuild_leaderboards(gym_id=None):
+    """Recount the week, month and all-time leaderboard scores from the Attendance table."""
+    from .models import LeaderboardScore
+    return LeaderboardScore.rebuild(gym_id)
+
+
+@task(name='prune_leaderboard_scores')
+def prune_leaderboard_scores():
+    from .leaderboard import prune_scores
+    return prune_scores()
+
+
+@task(name='score_at_risk_members', timeout=1800)
+def score_at_risk_members(gym_id):
+    from .risk import score_gym
+    return score_gym(gym_id)
+
+
+@task(name='warm_cohort_retention', max_attempts=2)
+def warm_cohort_retention(gym_id, max_offset=3):
+    from .cohorts import cached_cohort_retention
+    cached_cohort_retention(gym_id, max_offset)
+
+
+@task(name='prune_finished_tasks')
+def prune_finished_tasks():
+    from .tasks import prune_finished
+    days = getattr(settings, 'TASK_RETENTION_DAYS', 7)
+    return prune_finished(timezone.now() - timedelta(days=days))
+
+
+@task(name='prune_idempotency_keys')
+def prune_idempotency_keys():
+    from .idempotency import prune_expired
+    return prune_expired()
+
+
+@task(name='flush_occupancy', max_attempts=1)
+def flush_occupancy():
+    """Queue every minute: folds live occupancy counters into GymOccupancyHour."""
+    from .occupancy import flush
+    return flush()
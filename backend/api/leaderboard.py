@@ -0,0 +1,146 @@
+"""
+Gym attendance leaderboards for the current week, month or all time.
+
+Check-ins per member and period are kept in ``LeaderboardScore`` as they
+happen, so the database ranks a board with RANK() and DENSE_RANK() window
+functions: members with the same number of check-ins share a rank, and the
+next rank skips past them (1, 2, 2, 4). Members with no check-ins in the
+period share the last rank. Streaks and percentages come from the attendance
+bitmaps (see api.attendance_bits) of the members on the page only.
+
+A member's own rank is one more than the number of members ahead of them,
+counted over the ``(gym, period, period_start, checkins)`` index in a single
+query, without ranking the rest of the board.
+"""
+
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db.models import Count, F, IntegerField, Max, OuterRef, Q, Subquery, Value, Window
+from django.db.models.functions import Coalesce, DenseRank, Rank
+
+from . import attendance_bits
+from .fast_serializers import full_name
+from .models import AttendanceBitmap, LeaderboardScore, Membership
+
+
+PERIODS = [period for period, _ in LeaderboardScore.PERIOD_CHOICES]
+
+
+def _scores(gym_id, period, today):
+    return LeaderboardScore.objects.filter(
+        gym_id=gym_id,
+        period=period,
+        period_start=LeaderboardScore.period_start_for(period, today)
+    )
+
+
+def _approved_members(gym_id):
+    return Membership.objects.filter(gym_id=gym_id, status='approved').values('member_id')
+
+
+def _entry(member_id, member_name, checkins, rank, dense_rank, start_date, history, period_start, today):
+    # Percentage of the days in the period the member could have come in.
+    start_date = max(start_date, period_start)
+    total_days = (today - start_date).days + 1
+    attendance_percentage = (checkins / total_days * 100) if total_days > 0 else 0
+    return {
+        'member_id': member_id,
+        'member_name': member_name,
+        'total_attendance': checkins,
+        'current_streak': attendance_bits.current_streak(history),
+        'longest_streak': attendance_bits.longest_streak(history),
+        'attendance_percentage': round(attendance_percentage, 2),
+        'rank': rank,
+        'dense_rank': dense_rank,
+    }
+
+
+def gym_leaderboard(gym_id, period='all', limit=None, today=None, histories=None):
+    """
+    Ranked entries for the approved memberships at the gym, most check-ins first.
+
+    ``limit`` returns only the top entries (ties at the cut are not extended).
+    ``histories`` may be passed in when the caller already loaded
+    ``AttendanceBitmap.gym_histories(gym_id)``.
+    """
+    today = today or date.today()
+    checkins = Coalesce(
+        Subquery(_scores(gym_id, period, today).filter(member_id=OuterRef('member_id')).values('checkins')[:1]),
+        Value(0),
+        output_field=IntegerField()
+    )
+    memberships = (
+        Membership.objects.filter(gym_id=gym_id, status='approved')
+        .annotate(
+            checkins=checkins,
+            rank=Window(Rank(), order_by=F('checkins').desc()),
+            dense_rank=Window(DenseRank(), order_by=F('checkins').desc()),
+        )
+        .order_by('-checkins', 'id')
+        .values_list('member_id', full_name('member'), 'checkins', 'rank', 'dense_rank', 'start_date', 'created_at')
+    )
+    if limit is not None:
+        memberships = memberships[:limit]
+    rows = list(memberships)
+
+    if histories is None:
+        histories = AttendanceBitmap.gym_histories(gym_id, member_ids={row[0] for row in rows})
+    period_start = LeaderboardScore.period_start_for(period, today)
+    return [
+        _entry(
+            member_id, member_name, checkins, rank, dense_rank,
+            start_date or created_at.date(), histories.get(member_id, (0, None))[0], period_start, today
+        )
+        for member_id, member_name, checkins, rank, dense_rank, start_date, created_at in rows
+    ]
+
+
+def member_rank(gym_id, member_id, period='all', today=None):
+    """
+    ``{'checkins', 'rank', 'dense_rank'}`` for one member on the gym's board, in one query.
+
+    Only scores at or above the member's are read, so the higher they are the
+    less of the index is scanned. Members count while their membership is approved.
+    """
+    today = today or date.today()
+    scores = _scores(gym_id, period, today).filter(member_id__in=_approved_members(gym_id))
+    mine = Coalesce(
+        Subquery(scores.filter(member_id=member_id).values('checkins')[:1]),
+        Value(0),
+        output_field=IntegerField()
+    )
+    ahead = Q(checkins__gt=mine)
+    row = scores.filter(checkins__gte=mine).aggregate(
+        score=Coalesce(Max('checkins', filter=Q(member_id=member_id)), Value(0)),
+        ahead=Count('id', filter=ahead),
+        scores_ahead=Count('checkins', filter=ahead, distinct=True),
+    )
+    return {
+        'checkins': row['score'],
+        'rank': row['ahead'] + 1,
+        'dense_rank': row['scores_ahead'] + 1,
+    }
+
+
+def member_entry(gym_id, member, start_date, history, period='all', today=None):
+    """``member``'s board entry, shaped like ``gym_leaderboard``'s, from ``member_rank`` and their bitmap history."""
+    today = today or date.today()
+    rank = member_rank(gym_id, member.id, period=period, today=today)
+    return _entry(
+        member.id, member.get_full_name(), rank['checkins'], rank['rank'], rank['dense_rank'],
+        start_date, history, LeaderboardScore.period_start_for(period, today), today
+    )
+
+
+def board_size(gym_id):
+    """Number of entries on the gym's board: one per approved membership."""
+    return _approved_members(gym_id).count()
+
+
+def prune_scores(today=None):
+    """Delete week and month scores for periods that started more than LEADERBOARD_RETENTION_DAYS ago."""
+    today = today or date.today()
+    cutoff = today - timedelta(days=getattr(settings, 'LEADERBOARD_RETENTION_DAYS', 400))
+    deleted, _ = LeaderboardScore.objects.filter(period__in=['week', 'month'], period_start__lt=cutoff).delete()
+    return deleted
@@ -0,0 +1,137 @@
+"""
+Structured logging helpers for the FitNexus API.
+
+Records are filtered (sampled, tagged with the request's correlation id and
+scrubbed of sensitive fields) on the calling thread, then handed to a
+QueueListener so JSON formatting and stream I/O happen off the request path.
+"""
+
+import atexit
+import contextvars
+import copy
+import json
+import logging
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+
+correlation_id = contextvars.ContextVar('correlation_id', default=None)
+
+SENSITIVE_KEYS = {
+    'password', 'confirm_password', 'old_password', 'new_password',
+    'token', 'access', 'refresh', 'authorization', 'secret', 'api_key',
+}
+REDACTED = '[REDACTED]'
+
+# Attributes every LogRecord carries; anything else was passed through ``extra``.
+_RESERVED_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+
+def get_correlation_id():
+    return correlation_id.get()
+
+
+def redact(value):
+    """Return a copy of ``value`` with sensitive keys masked, recursing into containers."""
+    if hasattr(value, 'items'):
+        return {
+            key: REDACTED if str(key).lower() in SENSITIVE_KEYS else redact(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return [redact(item) for item in value]
+    return value
+
+
+def _extra_fields(record):
+    return {key: value for key, value in vars(record).items() if key not in _RESERVED_ATTRS}
+
+
+class CorrelationIdFilter(logging.Filter):
+    def filter(self, record):
+        record.correlation_id = correlation_id.get()
+        return True
+
+
+class LevelSamplingFilter(logging.Filter):
+    """Keep only a fraction of records per level, e.g. ``{'DEBUG': 0.1}``."""
+
+    def __init__(self, rates=None):
+        super().__init__()
+        self.rates = {
+            (level if isinstance(level, int) else logging.getLevelName(level.upper())): float(rate)
+            for level, rate in (rates or {}).items()
+        }
+
+    def filter(self, record):
+        rate = self.rates.get(record.levelno)
+        if rate is None or rate >= 1:
+            return True
+        return random.random() < rate
+
+
+class RedactingFilter(logging.Filter):
+    def filter(self, record):
+        for key, value in _extra_fields(record).items():
+            if key.lower() in SENSITIVE_KEYS:
+                setattr(record, key, REDACTED)
+            else:
+                setattr(record, key, redact(value))
+        if isinstance(record.args, dict):
+            record.args = redact(record.args)
+        return True
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'timestamp': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        entry.update(_extra_fields(record))
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class AsyncQueueHandler(QueueHandler):
+    """
+    Enqueue records and write them from a background QueueListener thread.
+
+    Filters attached to this handler still run on the calling thread, so the
+    correlation id is captured before the record leaves the request context.
+    """
+
+    def __init__(self, stream=None):
+        super().__init__(queue.SimpleQueue())
+        target = logging.StreamHandler(stream or sys.stderr)
+        target.setFormatter(JSONFormatter())
+        self.listener = QueueListener(self.queue, target, respect_handler_level=True)
+        self.listener.start()
+        atexit.register(self._stop_listener)
+
+    def prepare(self, record):
+        # Only resolve the message and traceback here; JSON encoding is left to the listener.
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def _stop_listener(self):
+        if self.listener._thread is not None:
+            self.listener.stop()
+
+    def close(self):
+        self._stop_listener()
+        super().close()
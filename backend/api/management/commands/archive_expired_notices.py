@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from datetime import timedelta
+
+from api.models import Notice
+
+
+class Command(BaseCommand):
+    help = 'Move notices that expired more than NOTICE_ARCHIVE_AFTER_DAYS ago into the archive table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Notices moved per transaction')
+        parser.add_argument('--after-days', type=int, default=None, help='Override NOTICE_ARCHIVE_AFTER_DAYS')
+
+    def handle(self, *args, **options):
+        after_days = options['after_days']
+        if after_days is None:
+            after_days = getattr(settings, 'NOTICE_ARCHIVE_AFTER_DAYS', 7)
+
+        archived = Notice.archive_expired(timezone.now() - timedelta(days=after_days), batch_size=options['batch_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Archived {archived} expired notices')
+        )
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+from datetime import date
+from api.models import AttendanceDailyRollup
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily attendance rollups used by the owner trend charts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--gym', type=int, help='Only rebuild rollups for this gym id')
+        parser.add_argument('--since', help='Only rebuild days on or after this date (YYYY-MM-DD)')
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            try:
+                since = date.fromisoformat(options['since'])
+            except ValueError:
+                raise CommandError('--since must be a date in YYYY-MM-DD format')
+
+        self.stdout.write('Rebuilding attendance rollups...')
+        count = AttendanceDailyRollup.rebuild(gym_id=options['gym'], since=since)
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully rebuilt {count} daily rollups!')
+        )
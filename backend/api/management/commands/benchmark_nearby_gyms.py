@@ -0,0 +1,75 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+import random
+import statistics
+import time
+
+import numpy as np
+
+from api import geo
+from api.models import Gym, User
+
+
+class Command(BaseCommand):
+    help = 'Time nearest-gym lookups against a synthetic set of gyms (rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--gyms', type=int, default=100000, help='Synthetic gyms to insert')
+        parser.add_argument('--queries', type=int, default=200, help='Lookups to time')
+        parser.add_argument('--radius', type=float, default=10, help='Search radius in km')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        radius = options['radius']
+        centres = [centre for centre, _ in geo.PLACES.values()]
+
+        with transaction.atomic():
+            owner = User.objects.create(username=f'benchmark-owner-{rng.random()}', user_type='gym_owner')
+            gyms = []
+            for i in range(options['gyms']):
+                # Cluster around city centres with a ~15 km spread, like real gyms.
+                lat, lng = rng.choice(centres)
+                gyms.append(Gym(
+                    name=f'Benchmark Gym {i}', address='-', phone='0', email='gym@example.com',
+                    owner=owner, status='approved',
+                    latitude=lat + rng.gauss(0, 0.15), longitude=lng + rng.gauss(0, 0.15),
+                ))
+            Gym.objects.bulk_create(gyms, batch_size=5000)
+            self.stdout.write(f'Inserted {len(gyms)} gyms')
+
+            points = [(lat + rng.gauss(0, 0.1), lng + rng.gauss(0, 0.1)) for lat, lng in (rng.choice(centres) for _ in range(options['queries']))]
+
+            indexed, found = self.time_queries(points, radius, geo.nearest_gyms)
+            scanned, expected = self.time_queries(points, radius, self.full_scan)
+            if found != expected:
+                self.stdout.write(self.style.WARNING('Bounding-box results differ from the full scan'))
+
+            self.report('bounding box + haversine', indexed)
+            self.report('full table haversine', scanned)
+            transaction.set_rollback(True)
+
+    def time_queries(self, points, radius, lookup):
+        timings, results = [], []
+        for lat, lng in points:
+            started = time.perf_counter()
+            results.append(lookup(lat, lng, radius_km=radius, limit=20))
+            timings.append(time.perf_counter() - started)
+        return timings, results
+
+    def full_scan(self, latitude, longitude, radius_km, limit):
+        rows = Gym.objects.filter(status='approved', latitude__isnull=False).values_list('id', 'latitude', 'longitude')
+        ids, latitudes, longitudes = (np.array(column) for column in zip(*rows))
+        distances = geo.haversine_km(latitude, longitude, latitudes, longitudes)
+        inside = distances <= radius_km
+        order = np.lexsort((ids[inside], distances[inside]))[:limit]
+        return int(inside.sum()), [(int(ids[inside][i]), float(distances[inside][i])) for i in order]
+
+    def report(self, label, timings):
+        timings = sorted(timings)
+        p95 = timings[int(len(timings) * 0.95) - 1]
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'{label}: median {statistics.median(timings) * 1000:.2f} ms, p95 {p95 * 1000:.2f} ms'
+            )
+        )
@@ -0,0 +1,143 @@
+from django.core.management.base import BaseCommand
+from django.utils.text import compress_string
+from rest_framework.renderers import JSONRenderer
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+import time
+
+from api.renderers import FastJSONRenderer, orjson
+from api.middleware import brotli
+
+
+class Command(BaseCommand):
+    help = 'Compare JSON encode time and bytes on the wire for the heaviest API payloads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=5000, help='Rows per list payload')
+        parser.add_argument('--repeat', type=int, default=5, help='Timing repetitions (best is reported)')
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        repeat = options['repeat']
+
+        self.stdout.write(f"orjson: {'installed' if orjson else 'not installed (stdlib fallback)'}")
+        self.stdout.write(f"brotli: {'installed' if brotli else 'not installed'}")
+        self.stdout.write('')
+        self.stdout.write(
+            f"{'payload':<14}{'stdlib ms':>11}{'fast ms':>10}{'speedup':>9}"
+            f"{'raw KB':>10}{'gzip KB':>10}{'br KB':>9}"
+        )
+
+        payloads = {
+            'leaderboard': self.leaderboard_payload(rows),
+            'memberships': self.membership_payload(rows),
+            'routines': self.routine_payload(max(rows // 50, 1)),
+        }
+        stock = JSONRenderer()
+        fast = FastJSONRenderer()
+
+        for name, data in payloads.items():
+            stock_time, body = self.time_render(stock, data, repeat)
+            fast_time, fast_body = self.time_render(fast, data, repeat)
+            if fast_body != body:
+                self.stdout.write(self.style.WARNING(f'{name}: fast renderer output differs from stdlib'))
+
+            gzip_size = len(compress_string(body))
+            br_size = f'{len(brotli.compress(body, quality=5)) / 1024:.1f}' if brotli else '-'
+            self.stdout.write(
+                f'{name:<14}{stock_time * 1000:>11.2f}{fast_time * 1000:>10.2f}'
+                f'{stock_time / fast_time:>8.1f}x'
+                f'{len(body) / 1024:>10.1f}{gzip_size / 1024:>10.1f}{br_size:>9}'
+            )
+
+    def time_render(self, renderer, data, repeat):
+        best = None
+        body = b''
+        for _ in range(repeat):
+            started = time.perf_counter()
+            body = renderer.render(data, 'application/json')
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best, body
+
+    def leaderboard_payload(self, rows):
+        return [
+            {
+                'member_id': i,
+                'member_name': f'Member {i} Surname',
+                'total_attendance': rows - i,
+                'current_streak': i % 30,
+                'longest_streak': i % 90,
+                'attendance_percentage': round((rows - i) / rows * 100, 2),
+                'rank': i + 1,
+            }
+            for i in range(rows)
+        ]
+
+    def membership_payload(self, rows):
+        today = date.today()
+        created = datetime.now(timezone.utc)
+        return [
+            {
+                'id': i,
+                'member': i,
+                'member_name': f'Member {i} Surname',
+                'gym': 1,
+                'gym_name': 'FitNexus Central',
+                'plan': i % 3 + 1,
+                'plan_details': str([3, 6, 12][i % 3]),
+                'status': 'approved',
+                'start_date': today.isoformat(),
+                'end_date': (today + timedelta(days=90)).isoformat(),
+                'owner_name': 'Gym Owner',
+                'created_at': created - timedelta(minutes=i),
+            }
+            for i in range(rows)
+        ]
+
+    def routine_payload(self, rows):
+        days = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+        routine_data = {
+            'summary': 'A balanced seven day programme mixing strength, conditioning and mobility work.',
+            'weekly_routine': {
+                day: {
+                    'day': day.title(),
+                    'focus': 'Full body strength and conditioning',
+                    'warmup': ['Jumping jacks - 2 minutes', 'Arm circles - 1 minute', 'Bodyweight squats - 15 reps'],
+                    'main_workout': [
+                        {
+                            'exercise': f'Exercise {n}',
+                            'sets': 3,
+                            'reps': '10-12',
+                            'rest': '60 seconds',
+                            'notes': 'Keep a neutral spine and control the eccentric phase.',
+                        }
+                        for n in range(8)
+                    ],
+                    'cooldown': ['Hamstring stretch - 30 seconds', 'Quad stretch - 30 seconds'],
+                    'total_duration': '45 minutes',
+                }
+                for day in days
+            },
+            'safety_tips': ['Warm up before every session', 'Stay hydrated', 'Stop if you feel sharp pain'],
+            'modifications': {
+                'beginner': 'Reduce sets to two and use lighter weights.',
+                'advanced': 'Add a fourth set and shorten rest periods.',
+            },
+        }
+        created = datetime.now(timezone.utc)
+        return [
+            {
+                'id': i,
+                'user': 1,
+                'user_name': 'Member Name',
+                'age': 28,
+                'weight': Decimal('72.50'),
+                'height': Decimal('178.00'),
+                'experience_level': 'intermediate',
+                'routine_data': routine_data,
+                'created_at': created,
+                'created_at_formatted': created.strftime('%B %d, %Y at %I:%M %p'),
+            }
+            for i in range(rows)
+        ]
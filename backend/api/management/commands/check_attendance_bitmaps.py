@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+from api.models import Attendance, AttendanceBitmap
+from api import attendance_bits
+
+
+class Command(BaseCommand):
+    help = 'Compare attendance bitmaps against the Attendance table and optionally repair them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--gym', type=int, help='Only check bitmaps for this gym id')
+        parser.add_argument('--repair', action='store_true', help='Rebuild bitmaps from Attendance when they differ')
+
+    def handle(self, *args, **options):
+        gym_id = options['gym']
+        attendances = Attendance.objects.all()
+        bitmaps = AttendanceBitmap.objects.all()
+        if gym_id:
+            attendances = attendances.filter(gym_id=gym_id)
+            bitmaps = bitmaps.filter(gym_id=gym_id)
+
+        expected = {
+            key: attendance_bits.from_bytes(bitmap.bits)
+            for key, bitmap in AttendanceBitmap.build_from_attendance(attendances).items()
+        }
+        stored = {
+            (member_id, gym, year): attendance_bits.from_bytes(bits)
+            for member_id, gym, year, bits in bitmaps.values_list('member_id', 'gym_id', 'year', 'bits').iterator(chunk_size=5000)
+        }
+
+        missing = [key for key in expected if key not in stored]
+        # An all-zero stored bitmap is equivalent to having no row at all.
+        extra = [key for key in stored if key not in expected and stored[key]]
+        different = [key for key in expected if key in stored and stored[key] != expected[key]]
+
+        self.stdout.write(f'Checked {len(expected)} member/gym/year bitmaps')
+        self.stdout.write(f'Missing: {len(missing)}, unexpected: {len(extra)}, mismatched: {len(different)}')
+        for member_id, gym, year in (missing + extra + different)[:20]:
+            self.stdout.write(f'  member={member_id} gym={gym} year={year}')
+
+        if not (missing or extra or different):
+            self.stdout.write(self.style.SUCCESS('Attendance bitmaps are consistent!'))
+            return
+
+        if options['repair']:
+            count = AttendanceBitmap.rebuild(gym_id=gym_id)
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} bitmaps from attendance records'))
+        else:
+            raise CommandError('Attendance bitmaps are out of sync; re-run with --repair to rebuild them')
@@ -0,0 +1,131 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+import random
+import statistics
+import time
+
+from api import bookings
+from api.models import ClassBooking, ClassSession, Gym, Membership, SyncTombstone, User
+
+
+class Command(BaseCommand):
+    help = (
+        'Fire parallel bookings and cancellations at one class session and check it is never '
+        'oversold and the waitlist is served in order (synthetic data is deleted afterwards)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--members', type=int, default=200, help='Members booking at once')
+        parser.add_argument('--capacity', type=int, default=20)
+        parser.add_argument('--workers', type=int, default=32, help='Parallel requests')
+        parser.add_argument('--cancellations', type=int, default=10, help='Booked members who cancel in parallel')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        tag = f'booking-check-{rng.getrandbits(32):08x}'
+        owner = User.objects.create(username=f'{tag}-owner', user_type='gym_owner')
+        try:
+            self.run(owner, tag, rng, options)
+        finally:
+            gym_ids = list(owner.gyms.values_list('id', flat=True))
+            User.objects.filter(username__startswith=f'{tag}-member-').delete()
+            owner.delete()
+            # Deleting the synthetic memberships left sync tombstones behind.
+            SyncTombstone.objects.filter(gym_id__in=gym_ids).delete()
+
+    def run(self, owner, tag, rng, options):
+        capacity = options['capacity']
+        gym = Gym.objects.create(
+            name=tag, address='-', phone='0', email='gym@example.com', owner=owner, status='approved', latitude=0, longitude=0,
+        )
+        password = make_password(None)
+        members = User.objects.bulk_create([
+            User(username=f'{tag}-member-{i}', user_type='member', password=password)
+            for i in range(options['members'])
+        ])
+        Membership.objects.bulk_create([Membership(member=member, gym=gym, status='approved') for member in members])
+        session = ClassSession.objects.create(
+            gym=gym, title='Spin', capacity=capacity,
+            starts_at=timezone.now() + timedelta(days=1), ends_at=timezone.now() + timedelta(days=1, hours=1),
+        )
+
+        # Everyone books at once; each also double-taps to exercise the duplicate path.
+        attempts = members + rng.sample(members, min(len(members), options['workers']))
+        rng.shuffle(attempts)
+        outcomes, timings = self.fire(options['workers'], lambda member: bookings.book(session, member), attempts)
+        duplicates = sum(1 for outcome in outcomes if isinstance(outcome, bookings.BookingError))
+        errors = [outcome for outcome in outcomes if isinstance(outcome, Exception) and not isinstance(outcome, bookings.BookingError)]
+        if errors:
+            raise CommandError(f'{len(errors)} bookings failed unexpectedly, first: {errors[0]!r}')
+        self.report('book', timings)
+
+        expected_booked = min(capacity, len(members))
+        self.assert_invariants(session, expected_booked, len(members) - expected_booked)
+        if duplicates != len(attempts) - len(members):
+            raise CommandError(f'Expected {len(attempts) - len(members)} duplicate bookings to be refused, got {duplicates}')
+
+        booked = list(ClassBooking.objects.filter(session=session, status='booked'))
+        waitlist = list(
+            ClassBooking.objects.filter(session=session, status='waitlisted')
+            .order_by('queued_at', 'id').values_list('id', flat=True)
+        )
+        leaving = rng.sample(booked, min(options['cancellations'], len(booked)))
+        outcomes, timings = self.fire(options['workers'], bookings.cancel, leaving)
+        errors = [outcome for outcome in outcomes if isinstance(outcome, Exception)]
+        if errors:
+            raise CommandError(f'{len(errors)} cancellations failed, first: {errors[0]!r}')
+        self.report('cancel', timings)
+
+        promoted = {outcome for outcome in outcomes if outcome is not None}
+        if promoted != set(waitlist[:len(promoted)]):
+            raise CommandError('Freed seats did not go to the front of the waitlist')
+        self.assert_invariants(session, expected_booked, len(waitlist) - len(promoted))
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'{len(members)} members, capacity {capacity}: {expected_booked} booked, '
+                f'{len(waitlist)} waitlisted, {duplicates} duplicates refused, '
+                f'{len(promoted)} promoted after {len(leaving)} cancellations; never oversold'
+            )
+        )
+
+    def fire(self, workers, action, items):
+        def timed(item):
+            started = time.perf_counter()
+            try:
+                outcome = action(item)
+            except Exception as e:
+                outcome = e
+            finally:
+                connection.close()
+            return outcome, time.perf_counter() - started
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(timed, items))
+        return [outcome for outcome, _ in results], [elapsed for _, elapsed in results]
+
+    def assert_invariants(self, session, booked, waitlisted):
+        session.refresh_from_db()
+        rows = ClassBooking.objects.filter(session=session)
+        actual_booked = rows.filter(status='booked').count()
+        actual_waitlisted = rows.filter(status='waitlisted').count()
+        if session.booked_count > session.capacity or actual_booked > session.capacity:
+            raise CommandError(f'Oversold: {actual_booked} booked, counter {session.booked_count}, capacity {session.capacity}')
+        if session.booked_count != actual_booked:
+            raise CommandError(f'Seat counter {session.booked_count} does not match {actual_booked} booked rows')
+        if (actual_booked, actual_waitlisted) != (booked, waitlisted):
+            raise CommandError(
+                f'Expected {booked} booked and {waitlisted} waitlisted, found {actual_booked} and {actual_waitlisted}'
+            )
+
+    def report(self, label, timings):
+        timings = sorted(timings)
+        p95 = timings[max(int(len(timings) * 0.95) - 1, 0)]
+        self.stdout.write(
+            f'{label}: {len(timings)} calls, median {statistics.median(timings) * 1000:.1f} ms, p95 {p95 * 1000:.1f} ms'
+        )
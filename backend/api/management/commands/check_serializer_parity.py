@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand, CommandError
+from api.models import Membership, Attendance, Notice
+from api.serializers import MembershipSerializer, AttendanceSerializer, NoticeSerializer
+from api.fast_serializers import (
+    MembershipValuesSerializer, AttendanceValuesSerializer, NoticeValuesSerializer
+)
+import json
+import time
+
+
+class Command(BaseCommand):
+    help = 'Verify the values()-based read serializers match the ModelSerializer output exactly'
+
+    PAIRS = [
+        ('memberships', Membership, MembershipSerializer, MembershipValuesSerializer),
+        ('attendance', Attendance, AttendanceSerializer, AttendanceValuesSerializer),
+        ('notices', Notice, NoticeSerializer, NoticeValuesSerializer),
+    ]
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=None, help='Only compare the first N rows of each table')
+
+    def handle(self, *args, **options):
+        limit = options['limit']
+        mismatches = 0
+
+        for name, model, model_serializer, values_serializer in self.PAIRS:
+            queryset = model.objects.order_by('pk')
+            if limit:
+                queryset = queryset[:limit]
+
+            started = time.perf_counter()
+            expected = model_serializer(queryset, many=True).data
+            model_time = time.perf_counter() - started
+
+            started = time.perf_counter()
+            actual = values_serializer(queryset).data
+            values_time = time.perf_counter() - started
+
+            # Compare the rendered JSON so key order and value types both count.
+            expected_rows = [json.dumps(row) for row in expected]
+            actual_rows = [json.dumps(row) for row in actual]
+            bad = sum(1 for e, a in zip(expected_rows, actual_rows) if e != a)
+            bad += abs(len(expected_rows) - len(actual_rows))
+            mismatches += bad
+
+            speedup = model_time / values_time if values_time else 0
+            style = self.style.SUCCESS if not bad else self.style.ERROR
+            self.stdout.write(style(
+                f'{name}: {len(expected_rows)} rows, {bad} mismatches '
+                f'({model_time * 1000:.1f} ms -> {values_time * 1000:.1f} ms, {speedup:.1f}x)'
+            ))
+            if bad:
+                for e, a in zip(expected_rows, actual_rows):
+                    if e != a:
+                        self.stdout.write(f'  expected: {e}\n  actual:   {a}')
+                        break
+
+        if mismatches:
+            raise CommandError(f'{mismatches} rows differ between serializers')
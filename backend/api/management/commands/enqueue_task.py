@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+import json
+
+from api import tasks
+
+
+class Command(BaseCommand):
+    help = 'Queue a registered background task, e.g. from cron: enqueue_task expire_memberships'
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', nargs='?', help='Registered task name')
+        parser.add_argument('--args', dest='task_args', default='[]', help='JSON list of positional arguments')
+        parser.add_argument('--kwargs', dest='task_kwargs', default='{}', help='JSON object of keyword arguments')
+        parser.add_argument('--delay', type=float, default=0, help='Seconds before the task is due')
+        parser.add_argument('--list', action='store_true', help='List registered tasks')
+
+    def handle(self, *args, **options):
+        if options['list'] or not options['name']:
+            for name in sorted(tasks.REGISTRY):
+                self.stdout.write(name)
+            return
+
+        try:
+            task = tasks.enqueue(
+                options['name'],
+                args=json.loads(options['task_args']),
+                kwargs=json.loads(options['task_kwargs']),
+                delay=options['delay'],
+            )
+        except KeyError as e:
+            raise CommandError(str(e))
+        except ValueError as e:
+            raise CommandError(f'Invalid JSON: {e}')
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Queued {task.name} as task {task.id}')
+        )
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from api.models import Membership
+
+
+class Command(BaseCommand):
+    help = 'Expire approved memberships whose end date has passed (safe to run every few minutes)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Memberships updated per UPDATE statement')
+
+    def handle(self, *args, **options):
+        expired = Membership.expire_overdue(batch_size=options['batch_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Expired {expired} memberships')
+        )
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from api.geo import geocode
+from api.models import Gym
+
+
+class Command(BaseCommand):
+    help = 'Fill in gym coordinates from their addresses using settings.GYM_GEOCODER'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Re-geocode gyms that already have coordinates')
+
+    def handle(self, *args, **options):
+        gyms = Gym.objects.all() if options['all'] else Gym.objects.filter(latitude__isnull=True)
+        located = missed = 0
+        for gym in gyms.only('id', 'address').iterator():
+            point = geocode(gym.address)
+            if point is None:
+                missed += 1
+                continue
+            Gym.objects.filter(id=gym.id).update(latitude=point[0], longitude=point[1])
+            located += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully geocoded {located} gyms!')
+        )
+        if missed:
+            self.stdout.write(self.style.WARNING(f'{missed} gyms could not be geocoded'))
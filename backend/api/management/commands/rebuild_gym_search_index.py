@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from api import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index for gyms'
+
+    def handle(self, *args, **options):
+        backend = search.backend()
+        if backend != 'fts5':
+            self.stdout.write(f'Search backend is {backend}; its index is maintained by the database, nothing to rebuild.')
+            return
+
+        count = search.rebuild_index()
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully indexed {count} gyms!')
+        )
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from api.models import LeaderboardScore
+
+
+class Command(BaseCommand):
+    help = 'Recount the week, month and all-time leaderboard scores from attendance records'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--gym', type=int, help='Only rebuild scores for this gym id')
+
+    def handle(self, *args, **options):
+        self.stdout.write('Rebuilding leaderboard scores...')
+        count = LeaderboardScore.rebuild(gym_id=options['gym'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully rebuilt {count} leaderboard scores!')
+        )
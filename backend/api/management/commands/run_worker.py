@@ -0,0 +1,68 @@
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from django.core.management.base import BaseCommand
+from django.db import connections
+import os
+import signal
+import socket
+import time
+
+from api import tasks
+
+
+class Command(BaseCommand):
+    help = 'Run background tasks from the database queue (see api/tasks.py)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=4, help='Tasks run at the same time')
+        parser.add_argument('--pool', choices=['thread', 'process'], default='thread',
+                            help='thread for I/O-bound tasks, process for CPU-bound ones')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds between polls when idle')
+        parser.add_argument('--once', action='store_true', help='Exit once no task is due (for cron and tests)')
+
+    def handle(self, *args, **options):
+        concurrency = options['concurrency']
+        worker = f'{socket.gethostname()}:{os.getpid()}'
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        if options['pool'] == 'process':
+            # Children must not inherit the parent's open database connections.
+            connections.close_all()
+            pool = ProcessPoolExecutor(max_workers=concurrency)
+        else:
+            pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='task')
+
+        self.stdout.write(f'Worker {worker} started with {concurrency} {options["pool"]} slots')
+        running = set()
+        results = {}
+        with pool:
+            while not self.stopping:
+                free = concurrency - len(running)
+                claimed = tasks.claim(worker, free) if free else []
+                for task_id, token in claimed:
+                    running.add(pool.submit(tasks.execute, task_id, token))
+
+                if not running:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+                    continue
+
+                done, running = wait(running, timeout=options['poll_interval'], return_when=FIRST_COMPLETED)
+                for future in done:
+                    outcome = future.result()
+                    results[outcome] = results.get(outcome, 0) + 1
+
+            # Let claimed tasks finish; anything killed here is picked up again after its visibility timeout.
+            for future in wait(running).done:
+                outcome = future.result()
+                results[outcome] = results.get(outcome, 0) + 1
+
+        summary = ', '.join(f'{count} {outcome}' for outcome, count in sorted(results.items())) or 'no tasks'
+        self.stdout.write(
+            self.style.SUCCESS(f'Worker {worker} stopped: {summary}')
+        )
+
+    def stop(self, signum, frame):
+        self.stopping = True
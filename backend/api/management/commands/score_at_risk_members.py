@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from api.models import Gym
+from api.risk import score_gym
+
+
+class Command(BaseCommand):
+    help = 'Score approved members by churn risk from their recent attendance (run daily)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--gym', type=int, help='Only score members of this gym id')
+
+    def handle(self, *args, **options):
+        gyms = Gym.objects.filter(status='approved')
+        if options['gym']:
+            gyms = gyms.filter(id=options['gym'])
+
+        total = 0
+        for gym_id, name in gyms.values_list('id', 'name'):
+            count = score_gym(gym_id)
+            total += count
+            self.stdout.write(f'Scored {count} members at {name}')
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully scored {total} members!')
+        )
@@ -1,6 +1,17 @@
 from django.utils.deprecation import MiddlewareMixin
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence, compress_string
+from django.conf import settings
+import uuid
+
+from .log import correlation_id
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
 
 class CSRFExemptMiddleware(MiddlewareMixin):
     def process_view(self, request, view_func, view_args, view_kwargs):
@@ -8,3 +19,92 @@ class CSRFExemptMiddleware(MiddlewareMixin):
         if request.path.startswith('/api/'):
             setattr(request, '_dont_enforce_csrf_checks', True)
         return None
+
+
+class CorrelationIdMiddleware(MiddlewareMixin):
+    """Tag every log record emitted while handling a request with one id."""
+
+    header = 'HTTP_X_REQUEST_ID'
+
+    def process_request(self, request):
+        request_id = (request.META.get(self.header) or uuid.uuid4().hex)[:64]
+        request.correlation_id = request_id
+        # Left set after the response so Django's own request logging still carries it;
+        # the next request on this thread overwrites it.
+        correlation_id.set(request_id)
+
+    def process_response(self, request, response):
+        request_id = getattr(request, 'correlation_id', None)
+        if request_id:
+            response['X-Request-ID'] = request_id
+        return response
+
+
+def _accepted_encodings(header):
+    """Return the codings a client accepts, ignoring any explicitly refused with q=0."""
+    accepted = set()
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        params = params.replace(' ', '')
+        if params.startswith('q='):
+            try:
+                if float(params[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        if coding:
+            accepted.add(coding.lower())
+    return accepted
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Negotiate Brotli or gzip compression for responses above a size threshold.
+
+    Brotli is only offered when the optional ``brotli`` package is installed.
+    Streaming responses are gzipped chunk by chunk since their size is unknown.
+    """
+
+    max_random_bytes = 100
+
+    def process_response(self, request, response):
+        min_size = getattr(settings, 'API_COMPRESSION_MIN_SIZE', 1024)
+        if not response.streaming and len(response.content) < min_size:
+            return response
+        if response.has_header('Content-Encoding'):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        accepted = _accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+
+        if response.streaming:
+            if 'gzip' not in accepted or response.is_async:
+                return response
+            response.streaming_content = compress_sequence(
+                response.streaming_content,
+                max_random_bytes=self.max_random_bytes,
+            )
+            del response.headers['Content-Length']
+            encoding = 'gzip'
+        else:
+            if brotli is not None and 'br' in accepted:
+                encoding = 'br'
+                compressed = brotli.compress(
+                    response.content,
+                    quality=getattr(settings, 'API_COMPRESSION_BROTLI_QUALITY', 5),
+                )
+            elif 'gzip' in accepted:
+                encoding = 'gzip'
+                compressed = compress_string(response.content, max_random_bytes=self.max_random_bytes)
+            else:
+                return response
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-19 14:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_gym_status_update'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('checkins', models.IntegerField(default=0)),
+                ('unique_members', models.IntegerField(default=0)),
+                ('hourly_checkins', models.JSONField(default=list, help_text='24 check-in counts indexed by hour of created_at')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('gym', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='api.gym')),
+            ],
+            options={
+                'unique_together': {('gym', 'date')},
+            },
+        ),
+    ]
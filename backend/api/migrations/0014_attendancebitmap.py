@@ -0,0 +1,45 @@
+# Generated by Django 5.2.5 on 2026-10-19 14:14
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate_bitmaps(apps, schema_editor):
+    Attendance = apps.get_model('api', 'Attendance')
+    AttendanceBitmap = apps.get_model('api', 'AttendanceBitmap')
+
+    bits = {}
+    for member_id, gym_id, day in Attendance.objects.values_list('member_id', 'gym_id', 'date').iterator(chunk_size=5000):
+        key = (member_id, gym_id, day.year)
+        bits[key] = bits.get(key, 0) | (1 << (day.timetuple().tm_yday - 1))
+
+    AttendanceBitmap.objects.bulk_create([
+        AttendanceBitmap(member_id=member_id, gym_id=gym_id, year=year, bits=value.to_bytes(46, 'little'))
+        for (member_id, gym_id, year), value in bits.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_attendancedailyrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceBitmap',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.IntegerField()),
+                ('bits', models.BinaryField(default=b'\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00', help_text='366-bit little-endian bitmap, bit 0 is January 1st')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('gym', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_bitmaps', to='api.gym')),
+                ('member', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_bitmaps', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('member', 'gym', 'year')},
+            },
+        ),
+        migrations.RunPython(populate_bitmaps, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.5 on 2026-10-19 14:16
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_attendancebitmap'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MemberRiskScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(help_text='0 (engaged) to 1 (likely to churn)')),
+                ('days_since_last_visit', models.IntegerField(blank=True, null=True)),
+                ('visits_last_4_weeks', models.IntegerField(default=0)),
+                ('visits_last_12_weeks', models.IntegerField(default=0)),
+                ('current_streak', models.IntegerField(default=0)),
+                ('longest_recent_streak', models.IntegerField(default=0)),
+                ('computed_at', models.DateTimeField()),
+                ('gym', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='risk_scores', to='api.gym')),
+                ('member', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='risk_scores', to=settings.AUTH_USER_MODEL)),
+                ('membership', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='risk_score', to='api.membership')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['gym', '-score'], name='api_risk_gym_score_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.5 on 2026-10-19 14:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_memberriskscore'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='membership',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('approved', 'Approved'), ('rejected', 'Rejected'), ('terminated', 'Terminated'), ('expired', 'Expired')], default='pending', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='membership',
+            index=models.Index(fields=['status', 'end_date'], name='api_membership_status_end_idx'),
+        ),
+    ]
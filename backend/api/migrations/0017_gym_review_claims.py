@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-19 14:18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_membership_expiry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gym',
+            name='review_claimed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='gym',
+            name='review_claimed_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='claimed_gym_reviews', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='gym',
+            index=models.Index(fields=['status', 'created_at'], name='api_gym_status_created_idx'),
+        ),
+    ]
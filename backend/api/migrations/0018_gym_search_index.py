@@ -0,0 +1,52 @@
+# Full-text search index for gyms (see api/search.py)
+
+from django.db import migrations
+from django.db.utils import OperationalError
+
+
+PG_VECTOR = (
+    "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(address, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'C')"
+)
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite':
+        try:
+            schema_editor.execute(
+                "CREATE VIRTUAL TABLE api_gym_fts USING fts5("
+                "name, address, description, tokenize='unicode61 remove_diacritics 2')"
+            )
+        except OperationalError:
+            # SQLite built without FTS5: api.search falls back to icontains matching.
+            return
+        schema_editor.execute(
+            "INSERT INTO api_gym_fts (rowid, name, address, description) "
+            "SELECT id, name, address, coalesce(description, '') FROM api_gym"
+        )
+    elif connection.vendor == 'postgresql':
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        schema_editor.execute(f'CREATE INDEX api_gym_search_idx ON api_gym USING GIN (({PG_VECTOR}))')
+        schema_editor.execute('CREATE INDEX api_gym_name_trgm_idx ON api_gym USING GIN (name gin_trgm_ops)')
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS api_gym_fts')
+    elif connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS api_gym_search_idx')
+        schema_editor.execute('DROP INDEX IF EXISTS api_gym_name_trgm_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_gym_review_claims'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.5 on 2026-10-19 14:28
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0018_gym_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gym',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(-90), django.core.validators.MaxValueValidator(90)]),
+        ),
+        migrations.AddField(
+            model_name='gym',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(-180), django.core.validators.MaxValueValidator(180)]),
+        ),
+        migrations.AddIndex(
+            model_name='gym',
+            index=models.Index(fields=['status', 'latitude', 'longitude'], name='api_gym_status_lat_lng_idx'),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.5 on 2026-10-19 14:31
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0019_gym_coordinates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resource', models.CharField(choices=[('memberships', 'Memberships'), ('notices', 'Notices'), ('plans', 'Membership plans'), ('attendance', 'Attendance')], max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('gym_id', models.BigIntegerField(blank=True, null=True)),
+                ('member_id', models.BigIntegerField(blank=True, null=True)),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['member', 'created_at'], name='api_attendance_member_new_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['gym', 'created_at'], name='api_attendance_gym_new_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='membership',
+            index=models.Index(fields=['member', 'updated_at'], name='api_membership_member_upd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='membership',
+            index=models.Index(fields=['gym', 'updated_at'], name='api_membership_gym_upd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='membershipplan',
+            index=models.Index(fields=['gym', 'updated_at'], name='api_plan_gym_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notice',
+            index=models.Index(fields=['gym', 'updated_at'], name='api_notice_gym_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='synctombstone',
+            index=models.Index(fields=['gym_id', 'deleted_at'], name='api_tombstone_gym_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='synctombstone',
+            index=models.Index(fields=['member_id', 'deleted_at'], name='api_tombstone_member_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='synctombstone',
+            index=models.Index(fields=['deleted_at'], name='api_tombstone_deleted_idx'),
+        ),
+    ]
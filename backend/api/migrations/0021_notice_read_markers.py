@@ -0,0 +1,41 @@
+# Generated by Django 5.2.5 on 2026-10-19 14:34
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0020_sync_tombstones'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NoticeReadMarker',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_read_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='notice',
+            index=models.Index(fields=['gym', 'is_active', 'id'], name='api_notice_gym_active_id_idx'),
+        ),
+        migrations.AddField(
+            model_name='noticereadmarker',
+            name='gym',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notice_read_markers', to='api.gym'),
+        ),
+        migrations.AddField(
+            model_name='noticereadmarker',
+            name='member',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notice_read_markers', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterUniqueTogether(
+            name='noticereadmarker',
+            unique_together={('member', 'gym')},
+        ),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 5.2.5 on 2026-10-19 14:35
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def backfill_publish_window(apps, schema_editor):
+    Notice = apps.get_model('api', 'Notice')
+    NoticeReadMarker = apps.get_model('api', 'NoticeReadMarker')
+    # Existing notices were live from creation
+    Notice.objects.update(publish_at=models.F('created_at'))
+    # Read watermarks move from notice id to (publish_at, id)
+    NoticeReadMarker.objects.filter(last_read_id__gt=0).update(
+        last_read_at=models.Subquery(
+            Notice.objects.filter(gym_id=models.OuterRef('gym_id'), id__lte=models.OuterRef('last_read_id'))
+            .order_by('-id').values('publish_at')[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0021_notice_read_markers'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedNotice',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('notice_id', models.BigIntegerField(unique=True)),
+                ('title', models.CharField(max_length=200)),
+                ('message', models.TextField()),
+                ('created_at', models.DateTimeField()),
+                ('publish_at', models.DateTimeField()),
+                ('expire_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-expire_at'],
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name='notice',
+            name='api_notice_gym_active_id_idx',
+        ),
+        migrations.AddField(
+            model_name='notice',
+            name='expire_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='notice',
+            name='publish_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='noticereadmarker',
+            name='last_read_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='notice',
+            index=models.Index(fields=['gym', 'is_active', 'publish_at', 'id'], name='api_notice_gym_live_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notice',
+            index=models.Index(fields=['expire_at'], name='api_notice_expire_idx'),
+        ),
+        migrations.RunPython(backfill_publish_window, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='archivednotice',
+            name='gym',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_notices', to='api.gym'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.5 on 2026-10-19 14:46
+
+import datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0024_idempotency_keys'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gym',
+            name='checkin_key_version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AlterField(
+            model_name='attendance',
+            name='date',
+            field=models.DateField(default=datetime.date.today, editable=False),
+        ),
+    ]
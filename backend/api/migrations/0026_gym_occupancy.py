@@ -0,0 +1,35 @@
+# Generated by Django 5.2.5 on 2026-10-19 14:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0025_checkin_passes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendance',
+            name='checked_out_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='GymOccupancyHour',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField(help_text='Start of the hour')),
+                ('checkins', models.IntegerField(default=0)),
+                ('checkouts', models.IntegerField(default=0)),
+                ('peak', models.IntegerField(default=0)),
+                ('occupancy', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('gym', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='occupancy_hours', to='api.gym')),
+            ],
+            options={
+                'unique_together': {('gym', 'hour')},
+            },
+        ),
+    ]
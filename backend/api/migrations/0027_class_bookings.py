@@ -0,0 +1,66 @@
+# Generated by Django 5.2.5 on 2026-10-19 14:50
+
+import django.core.validators
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0026_gym_occupancy'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClassSession',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=200)),
+                ('description', models.TextField(blank=True)),
+                ('instructor', models.CharField(blank=True, max_length=200)),
+                ('starts_at', models.DateTimeField()),
+                ('ends_at', models.DateTimeField()),
+                ('capacity', models.PositiveIntegerField(validators=[django.core.validators.MinValueValidator(1)])),
+                ('booked_count', models.IntegerField(default=0)),
+                ('is_cancelled', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('gym', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='class_sessions', to='api.gym')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ClassBooking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('booked', 'Booked'), ('waitlisted', 'Waitlisted'), ('cancelled', 'Cancelled')], max_length=20)),
+                ('queued_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('member', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='class_bookings', to=settings.AUTH_USER_MODEL)),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bookings', to='api.classsession')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='classsession',
+            index=models.Index(fields=['gym', 'starts_at'], name='api_class_gym_starts_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='classsession',
+            constraint=models.CheckConstraint(condition=models.Q(('booked_count__gte', 0), ('booked_count__lte', models.F('capacity'))), name='api_class_booked_within_capacity'),
+        ),
+        migrations.AddIndex(
+            model_name='classbooking',
+            index=models.Index(fields=['session', 'status', 'queued_at'], name='api_booking_waitlist_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='classbooking',
+            index=models.Index(fields=['member', 'status'], name='api_booking_member_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='classbooking',
+            unique_together={('session', 'member')},
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.5 on 2026-10-19 14:55
+
+import datetime
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Value
+from django.db.models.functions import TruncMonth, TruncWeek
+
+
+def populate_scores(apps, schema_editor):
+    Attendance = apps.get_model('api', 'Attendance')
+    LeaderboardScore = apps.get_model('api', 'LeaderboardScore')
+
+    starts = {
+        'week': TruncWeek('date'),
+        'month': TruncMonth('date'),
+        'all': Value(datetime.date(2000, 1, 1), output_field=models.DateField()),
+    }
+    scores = []
+    for period, start in starts.items():
+        rows = Attendance.objects.values('gym_id', 'member_id', start=start).annotate(checkins=Count('id')).order_by()
+        scores.extend(
+            LeaderboardScore(gym_id=row['gym_id'], member_id=row['member_id'], period=period,
+                             period_start=row['start'], checkins=row['checkins'])
+            for row in rows.iterator(chunk_size=5000)
+        )
+    LeaderboardScore.objects.bulk_create(scores, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0027_class_bookings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('week', 'Week'), ('month', 'Month'), ('all', 'All time')], max_length=10)),
+                ('period_start', models.DateField(help_text='Monday of the week, first of the month, or ALL_TIME_START')),
+                ('checkins', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('gym', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_scores', to='api.gym')),
+                ('member', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_scores', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['gym', 'period', 'period_start', 'checkins', 'member'], name='api_lbscore_rank_idx')],
+                'unique_together': {('gym', 'period', 'period_start', 'member')},
+            },
+        ),
+        migrations.RunPython(populate_scores, migrations.RunPython.noop),
+    ]
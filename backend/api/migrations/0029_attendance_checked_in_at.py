@@ -0,0 +1,35 @@
+# Generated by Django 5.2.5 on 2026-10-19 15:03
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import F
+
+
+def copy_created_at(apps, schema_editor):
+    Attendance = apps.get_model('api', 'Attendance')
+    Attendance.objects.update(checked_in_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0028_leaderboard_scores'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendance',
+            name='checked_in_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.RunPython(copy_created_at, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='attendancedailyrollup',
+            name='hourly_checkins',
+            field=models.JSONField(default=list, help_text='24 check-in counts indexed by hour of checked_in_at'),
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['checked_in_at'], name='api_attendance_checked_in_idx'),
+        ),
+    ]
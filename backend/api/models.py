@@ -1,6 +1,7 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.utils import timezone
 from datetime import date, timedelta
 
 
@@ -35,11 +36,34 @@ class Gym(models.Model):
     owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='gyms')
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     rejection_reason = models.TextField(blank=True, null=True)
+    # Admin review queue: a pending gym is claimed by one reviewer at a time until the claim expires.
+    review_claimed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='claimed_gym_reviews')
+    review_claimed_at = models.DateTimeField(blank=True, null=True)
+    # Filled from the address by settings.GYM_GEOCODER when not given explicitly (see api/geo.py)
+    latitude = models.FloatField(blank=True, null=True, validators=[MinValueValidator(-90), MaxValueValidator(90)])
+    longitude = models.FloatField(blank=True, null=True, validators=[MinValueValidator(-180), MaxValueValidator(180)])
+    # Version of the key kiosks verify check-in passes with (see api/checkin_passes.py); bumped to rotate it.
+    checkin_key_version = models.PositiveIntegerField(default=1)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='api_gym_status_created_idx'),
+            # Bounding-box pre-filter for nearest-gym lookups
+            models.Index(fields=['status', 'latitude', 'longitude'], name='api_gym_status_lat_lng_idx'),
+        ]
+    
     def __str__(self):
         return self.name
+    
+    def save(self, *args, **kwargs):
+        if self.latitude is None or self.longitude is None:
+            from .geo import geocode
+            point = geocode(self.address)
+            if point:
+                self.latitude, self.longitude = point
+        super().save(*args, **kwargs)
 
 
 class MembershipPlan(models.Model):
@@ -53,6 +77,9 @@ class MembershipPlan(models.Model):
     
     class Meta:
         unique_together = ['gym', 'duration_months']
+        indexes = [
+            models.Index(fields=['gym', 'updated_at'], name='api_plan_gym_updated_idx'),
+        ]
     
     def __str__(self):
         return f"{self.gym.name} - {self.duration_months} Months"
@@ -64,6 +91,7 @@ class Membership(models.Model):
         ('approved', 'Approved'),
         ('rejected', 'Rejected'),
         ('terminated', 'Terminated'),
+        ('expired', 'Expired'),
     ]
     
     member = models.ForeignKey(User, on_delete=models.CASCADE, related_name='memberships')
@@ -75,24 +103,72 @@ class Membership(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, null=True, blank=True)
     updated_at = models.DateTimeField(auto_now=True, null=True, blank=True)
     
+    class Meta:
+        indexes = [
+            # Used by the expire_memberships sweeper to find approved rows past end_date.
+            models.Index(fields=['status', 'end_date'], name='api_membership_status_end_idx'),
+            # Delta sync (api/sync.py) reads changes per member and per gym.
+            models.Index(fields=['member', 'updated_at'], name='api_membership_member_upd_idx'),
+            models.Index(fields=['gym', 'updated_at'], name='api_membership_gym_upd_idx'),
+        ]
+    
+    @classmethod
+    def expire_overdue(cls, today=None, batch_size=500):
+        """
+        Move approved memberships whose end_date has passed to 'expired'.
+        
+        Each batch is a single UPDATE guarded by status='approved', so running
+        this concurrently on several nodes, or repeatedly, never double-applies.
+        Returns the number of memberships this call expired.
+        """
+        from django.utils import timezone
+        from .caching import invalidate_gym_caches
+        
+        today = today or timezone.localdate()
+        overdue = cls.objects.filter(status='approved', end_date__lt=today)
+        expired = 0
+        while True:
+            batch = list(overdue.order_by('end_date').values_list('id', 'gym_id')[:batch_size])
+            if not batch:
+                break
+            ids = [membership_id for membership_id, _ in batch]
+            updated = cls.objects.filter(id__in=ids, status='approved').update(
+                status='expired',
+                updated_at=timezone.now()
+            )
+            expired += updated
+            MemberRiskScore.objects.filter(membership_id__in=ids).delete()
+            invalidate_gym_caches(gym_id for _, gym_id in batch)
+        return expired
+    
     def __str__(self):
         return f"{self.member.first_name} - {self.gym.name}"
 
 class Attendance(models.Model):
     member = models.ForeignKey(User, on_delete=models.CASCADE, related_name='attendances')
     gym = models.ForeignKey(Gym, on_delete=models.CASCADE, related_name='attendances')
-    date = models.DateField(auto_now_add=True)
+    # Day of the visit; only set explicitly for kiosk scans uploaded after the fact.
+    date = models.DateField(default=date.today, editable=False)
     streak_count = models.IntegerField(default=1)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Time of the visit; earlier than created_at for kiosk scans uploaded after the fact.
+    checked_in_at = models.DateTimeField(default=timezone.now)
+    # Set when the member checks out; visits left open stop counting towards occupancy (see api/occupancy.py).
+    checked_out_at = models.DateTimeField(blank=True, null=True)
     
     class Meta:
         unique_together = ['member', 'gym', 'date']
+        indexes = [
+            models.Index(fields=['member', 'created_at'], name='api_attendance_member_new_idx'),
+            models.Index(fields=['gym', 'created_at'], name='api_attendance_gym_new_idx'),
+            # Open visits for live occupancy (api/occupancy.py).
+            models.Index(fields=['checked_in_at'], name='api_attendance_checked_in_idx'),
+        ]
     
     def save(self, *args, **kwargs):
         if not self.pk:  # Only on creation
-            # Check if there's an attendance record for yesterday
-            from datetime import date, timedelta
-            yesterday = date.today() - timedelta(days=1)
+            # Check if there's an attendance record for the day before
+            yesterday = self.date - timedelta(days=1)
             try:
                 yesterday_attendance = Attendance.objects.get(
                     member=self.member,
@@ -122,6 +198,16 @@ class Attendance(models.Model):
                 else:
                     # No previous attendance, start new streak
                     self.streak_count = 1
+            from django.db import transaction
+            from .occupancy import record_checkin
+            # The row and everything derived from it commit together, or not at all.
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+                AttendanceDailyRollup.record_checkin(self)
+                AttendanceBitmap.set_day(self.member_id, self.gym_id, self.date)
+                LeaderboardScore.record_checkin(self)
+                record_checkin(self.gym_id, self.checked_in_at)
+            return
         super().save(*args, **kwargs)
     
     @classmethod
@@ -154,6 +240,327 @@ class Attendance(models.Model):
     def __str__(self):
         return f"{self.member.first_name} - {self.gym.name} - {self.date}"
 
+class AttendanceDailyRollup(models.Model):
+    """Per-gym, per-day check-in totals so trend charts never scan raw Attendance rows."""
+    gym = models.ForeignKey(Gym, on_delete=models.CASCADE, related_name='daily_rollups')
+    date = models.DateField()
+    checkins = models.IntegerField(default=0)
+    unique_members = models.IntegerField(default=0)
+    hourly_checkins = models.JSONField(default=list, help_text="24 check-in counts indexed by hour of checked_in_at")
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ['gym', 'date']
+    
+    @classmethod
+    def record_checkin(cls, attendance):
+        """Fold one new attendance row into its day's rollup."""
+        from django.db import IntegrityError, transaction
+        from django.db.models import F
+        from django.utils import timezone
+        
+        hour = timezone.localtime(attendance.checked_in_at).hour
+        rollup = cls.objects.filter(gym_id=attendance.gym_id, date=attendance.date)
+        with transaction.atomic():
+            # Attendance is unique per member, gym and day, so every new row is also a new member.
+            counted = rollup.update(
+                checkins=F('checkins') + 1,
+                unique_members=F('unique_members') + 1,
+                updated_at=timezone.now()
+            )
+            if not counted:
+                hourly = [0] * 24
+                hourly[hour] = 1
+                try:
+                    with transaction.atomic():
+                        cls.objects.create(
+                            gym_id=attendance.gym_id,
+                            date=attendance.date,
+                            checkins=1,
+                            unique_members=1,
+                            hourly_checkins=hourly
+                        )
+                    return
+                except IntegrityError:
+                    # Another check-in created the day's row first.
+                    rollup.update(
+                        checkins=F('checkins') + 1,
+                        unique_members=F('unique_members') + 1,
+                        updated_at=timezone.now()
+                    )
+            # The UPDATE above holds the row's write lock until commit (on SQLite, the
+            # database's), so this read-modify-write of the JSON list cannot interleave.
+            row = rollup.select_for_update().get()
+            hourly = row.hourly_checkins or [0] * 24
+            hourly[hour] += 1
+            row.hourly_checkins = hourly
+            row.save(update_fields=['hourly_checkins'])
+    
+    @classmethod
+    def rebuild(cls, gym_id=None, since=None):
+        """Recompute rollups from Attendance, optionally for one gym or from a date onwards."""
+        from django.db import transaction
+        from django.db.models import Count
+        from django.db.models.functions import ExtractHour
+        
+        attendances = Attendance.objects.all()
+        if gym_id:
+            attendances = attendances.filter(gym_id=gym_id)
+        if since:
+            attendances = attendances.filter(date__gte=since)
+        
+        rollups = {}
+        buckets = attendances.values('gym_id', 'date', hour=ExtractHour('checked_in_at')).annotate(
+            checkins=Count('id'),
+        ).order_by()
+        for bucket in buckets:
+            key = (bucket['gym_id'], bucket['date'])
+            rollup = rollups.setdefault(key, cls(
+                gym_id=bucket['gym_id'], date=bucket['date'], hourly_checkins=[0] * 24
+            ))
+            rollup.hourly_checkins[bucket['hour'] or 0] += bucket['checkins']
+            rollup.checkins += bucket['checkins']
+        
+        members = attendances.values('gym_id', 'date').annotate(members=Count('member_id', distinct=True)).order_by()
+        for row in members:
+            rollups[(row['gym_id'], row['date'])].unique_members = row['members']
+        
+        stale = cls.objects.all()
+        if gym_id:
+            stale = stale.filter(gym_id=gym_id)
+        if since:
+            stale = stale.filter(date__gte=since)
+        with transaction.atomic():
+            stale.delete()
+            cls.objects.bulk_create(rollups.values(), batch_size=1000)
+        return len(rollups)
+    
+    def __str__(self):
+        return f"{self.gym.name} - {self.date} - {self.checkins}"
+
+class AttendanceBitmap(models.Model):
+    """
+    One bit per calendar day a member attended a gym, one row per year.
+    
+    Kept in step with Attendance so streaks, counts and heatmaps are bit
+    operations on a few bytes (see api.attendance_bits) instead of row scans.
+    """
+    member = models.ForeignKey(User, on_delete=models.CASCADE, related_name='attendance_bitmaps')
+    gym = models.ForeignKey(Gym, on_delete=models.CASCADE, related_name='attendance_bitmaps')
+    year = models.IntegerField()
+    bits = models.BinaryField(default=bytes(46), help_text="366-bit little-endian bitmap, bit 0 is January 1st")
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ['member', 'gym', 'year']
+    
+    @classmethod
+    def set_day(cls, member_id, gym_id, day, attended=True):
+        from django.db import transaction
+        from . import attendance_bits
+        
+        with transaction.atomic():
+            bitmap, _ = cls.objects.select_for_update().get_or_create(
+                member_id=member_id,
+                gym_id=gym_id,
+                year=day.year
+            )
+            bits = attendance_bits.from_bytes(bitmap.bits)
+            mask = 1 << attendance_bits.day_index(day)
+            bits = bits | mask if attended else bits & ~mask
+            bitmap.bits = attendance_bits.to_bytes(bits)
+            bitmap.save(update_fields=['bits', 'updated_at'])
+    
+    @classmethod
+    def year_bits(cls, member_id, gym_id, years=None):
+        """Return ``{year: bits}`` for a member at a gym."""
+        from . import attendance_bits
+        
+        bitmaps = cls.objects.filter(member_id=member_id, gym_id=gym_id)
+        if years is not None:
+            bitmaps = bitmaps.filter(year__in=years)
+        return {
+            year: attendance_bits.from_bytes(bits)
+            for year, bits in bitmaps.values_list('year', 'bits')
+        }
+    
+    @classmethod
+    def history(cls, member_id, gym_id):
+        """Return ``(history, origin)`` spanning every stored year; see attendance_bits.combine_years."""
+        from . import attendance_bits
+        
+        return attendance_bits.combine_years(cls.year_bits(member_id, gym_id))
+    
+    @classmethod
+    def gym_histories(cls, gym_id, member_ids=None):
+        """Return ``{member_id: (history, origin)}`` for every member (or just ``member_ids``) with attendance at a gym, in one query."""
+        from . import attendance_bits
+        
+        bitmaps = cls.objects.filter(gym_id=gym_id)
+        if member_ids is not None:
+            bitmaps = bitmaps.filter(member_id__in=member_ids)
+        year_bits = {}
+        for member_id, year, bits in bitmaps.values_list('member_id', 'year', 'bits'):
+            year_bits.setdefault(member_id, {})[year] = attendance_bits.from_bytes(bits)
+        return {member_id: attendance_bits.combine_years(years) for member_id, years in year_bits.items()}
+    
+    @classmethod
+    def build_from_attendance(cls, attendances):
+        """Build unsaved bitmaps keyed by ``(member_id, gym_id, year)`` from Attendance rows."""
+        from . import attendance_bits
+        
+        bits = {}
+        for member_id, gym_id, day in attendances.values_list('member_id', 'gym_id', 'date').iterator(chunk_size=5000):
+            key = (member_id, gym_id, day.year)
+            bits[key] = bits.get(key, 0) | (1 << attendance_bits.day_index(day))
+        return {
+            key: cls(member_id=key[0], gym_id=key[1], year=key[2], bits=attendance_bits.to_bytes(value))
+            for key, value in bits.items()
+        }
+    
+    @classmethod
+    def rebuild(cls, gym_id=None):
+        """Recreate bitmaps from the Attendance table, optionally for one gym."""
+        from django.db import transaction
+        
+        attendances = Attendance.objects.all()
+        bitmaps = cls.objects.all()
+        if gym_id:
+            attendances = attendances.filter(gym_id=gym_id)
+            bitmaps = bitmaps.filter(gym_id=gym_id)
+        
+        rebuilt = cls.build_from_attendance(attendances)
+        with transaction.atomic():
+            bitmaps.delete()
+            cls.objects.bulk_create(rebuilt.values(), batch_size=1000)
+        return len(rebuilt)
+    
+    def __str__(self):
+        return f"{self.member.first_name} - {self.gym.name} - {self.year}"
+
+class LeaderboardScore(models.Model):
+    """
+    Check-ins per member at a gym for one leaderboard period (see api/leaderboard.py).
+    
+    Kept in step with Attendance so the database ranks a gym's board from at
+    most one row per member, and a member's rank is a count over an index.
+    """
+    PERIOD_CHOICES = [
+        ('week', 'Week'),
+        ('month', 'Month'),
+        ('all', 'All time'),
+    ]
+    # period_start of the all-time board.
+    ALL_TIME_START = date(2000, 1, 1)
+    
+    gym = models.ForeignKey(Gym, on_delete=models.CASCADE, related_name='leaderboard_scores')
+    member = models.ForeignKey(User, on_delete=models.CASCADE, related_name='leaderboard_scores')
+    period = models.CharField(max_length=10, choices=PERIOD_CHOICES)
+    period_start = models.DateField(help_text="Monday of the week, first of the month, or ALL_TIME_START")
+    checkins = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ['gym', 'period', 'period_start', 'member']
+        indexes = [
+            # Covers ranking: top-N walks it backwards, "my rank" counts the entries above a score.
+            models.Index(fields=['gym', 'period', 'period_start', 'checkins', 'member'], name='api_lbscore_rank_idx'),
+        ]
+    
+    @classmethod
+    def period_start_for(cls, period, day):
+        if period == 'week':
+            return day - timedelta(days=day.weekday())
+        if period == 'month':
+            return day.replace(day=1)
+        return cls.ALL_TIME_START
+    
+    @classmethod
+    def record_checkin(cls, attendance):
+        """Count one new attendance row towards its week, month and all-time boards."""
+        from django.db import IntegrityError, transaction
+        from django.db.models import F
+        
+        for period, _ in cls.PERIOD_CHOICES:
+            score = cls.objects.filter(
+                gym_id=attendance.gym_id,
+                member_id=attendance.member_id,
+                period=period,
+                period_start=cls.period_start_for(period, attendance.date)
+            )
+            if score.update(checkins=F('checkins') + 1, updated_at=timezone.now()):
+                continue
+            try:
+                with transaction.atomic():
+                    cls.objects.create(
+                        gym_id=attendance.gym_id,
+                        member_id=attendance.member_id,
+                        period=period,
+                        period_start=cls.period_start_for(period, attendance.date),
+                        checkins=1
+                    )
+            except IntegrityError:
+                # Another check-in created the row first.
+                score.update(checkins=F('checkins') + 1, updated_at=timezone.now())
+    
+    @classmethod
+    def rebuild(cls, gym_id=None):
+        """Recompute every board from the Attendance table, optionally for one gym."""
+        from django.db import transaction
+        from django.db.models import Count, Value
+        from django.db.models.functions import TruncMonth, TruncWeek
+        
+        attendances = Attendance.objects.all()
+        scores = cls.objects.all()
+        if gym_id:
+            attendances = attendances.filter(gym_id=gym_id)
+            scores = scores.filter(gym_id=gym_id)
+        
+        starts = {
+            'week': TruncWeek('date'),
+            'month': TruncMonth('date'),
+            'all': Value(cls.ALL_TIME_START, output_field=models.DateField()),
+        }
+        rebuilt = []
+        with transaction.atomic():
+            # Delete before counting, in the same transaction: the delete's locks (SQLite's
+            # database lock, or the deleted rows' locks elsewhere) hold back check-ins that
+            # would otherwise land between the count and the insert and be lost.
+            scores.delete()
+            for period, start in starts.items():
+                rows = attendances.values('gym_id', 'member_id', start=start).annotate(checkins=Count('id')).order_by()
+                rebuilt.extend(
+                    cls(gym_id=row['gym_id'], member_id=row['member_id'], period=period,
+                        period_start=row['start'], checkins=row['checkins'])
+                    for row in rows.iterator(chunk_size=5000)
+                )
+            cls.objects.bulk_create(rebuilt, batch_size=1000)
+        return len(rebuilt)
+    
+    def __str__(self):
+        return f"{self.member.first_name} - {self.gym.name} - {self.period} {self.period_start}: {self.checkins}"
+
+class MemberRiskScore(models.Model):
+    """Latest churn-risk score for an approved membership, refreshed by the score_at_risk_members job."""
+    membership = models.OneToOneField(Membership, on_delete=models.CASCADE, related_name='risk_score')
+    gym = models.ForeignKey(Gym, on_delete=models.CASCADE, related_name='risk_scores')
+    member = models.ForeignKey(User, on_delete=models.CASCADE, related_name='risk_scores')
+    score = models.FloatField(help_text="0 (engaged) to 1 (likely to churn)")
+    days_since_last_visit = models.IntegerField(null=True, blank=True)
+    visits_last_4_weeks = models.IntegerField(default=0)
+    visits_last_12_weeks = models.IntegerField(default=0)
+    current_streak = models.IntegerField(default=0)
+    longest_recent_streak = models.IntegerField(default=0)
+    computed_at = models.DateTimeField()
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['gym', '-score'], name='api_risk_gym_score_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.member.first_name} - {self.gym.name} - {self.score:.2f}"
+
 class Notice(models.Model):
     gym = models.ForeignKey(Gym, on_delete=models.CASCADE, related_name='notices')
     title = models.CharField(max_length=200)
@@ -161,12 +568,91 @@ class Notice(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
+    # A notice is live from publish_at until expire_at (open-ended when empty)
+    publish_at = models.DateTimeField(default=timezone.now)
+    expire_at = models.DateTimeField(blank=True, null=True)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['gym', 'updated_at'], name='api_notice_gym_updated_idx'),
+            # Live notices of a gym: range scan on publish_at, also the member feed order
+            models.Index(fields=['gym', 'is_active', 'publish_at', 'id'], name='api_notice_gym_live_idx'),
+            # archive_expired_notices sweeper
+            models.Index(fields=['expire_at'], name='api_notice_expire_idx'),
+        ]
     
     def __str__(self):
         return f"{self.gym.name} - {self.title}"
+    
+    @classmethod
+    def live(cls, now=None):
+        now = now or timezone.now()
+        return cls.objects.filter(is_active=True, publish_at__lte=now).filter(
+            models.Q(expire_at__isnull=True) | models.Q(expire_at__gt=now)
+        )
+    
+    @classmethod
+    def archive_expired(cls, before, batch_size=500):
+        """Move notices that expired before ``before`` into ArchivedNotice, a batch per transaction."""
+        from django.db import transaction
+        
+        archived = 0
+        while True:
+            with transaction.atomic():
+                batch = list(cls.objects.filter(expire_at__lt=before).order_by('expire_at')[:batch_size])
+                if not batch:
+                    return archived
+                ArchivedNotice.objects.bulk_create([
+                    ArchivedNotice(
+                        notice_id=notice.id,
+                        gym_id=notice.gym_id,
+                        title=notice.title,
+                        message=notice.message,
+                        created_at=notice.created_at,
+                        publish_at=notice.publish_at,
+                        expire_at=notice.expire_at,
+                    )
+                    for notice in batch
+                ])
+                cls.objects.filter(id__in=[notice.id for notice in batch]).delete()
+            archived += len(batch)
+
+
+class ArchivedNotice(models.Model):
+    """Expired notices moved out of the live Notice table by archive_expired_notices."""
+    notice_id = models.BigIntegerField(unique=True)
+    gym = models.ForeignKey(Gym, on_delete=models.CASCADE, related_name='archived_notices')
+    title = models.CharField(max_length=200)
+    message = models.TextField()
+    created_at = models.DateTimeField()
+    publish_at = models.DateTimeField()
+    expire_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-expire_at']
+    
+    def __str__(self):
+        return f"{self.gym.name} - {self.title} (archived)"
+
+
+class NoticeReadMarker(models.Model):
+    """
+    A member has read every notice of a gym up to and including the one at
+    ``(last_read_at, last_read_id)`` in feed order, i.e. by publish_at then id.
+    """
+    member = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notice_read_markers')
+    gym = models.ForeignKey(Gym, on_delete=models.CASCADE, related_name='notice_read_markers')
+    last_read_at = models.DateTimeField(blank=True, null=True)
+    last_read_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ['member', 'gym']
+    
+    def __str__(self):
+        return f"{self.member.first_name} - {self.gym.name} - read up to {self.last_read_id}"
 
 class ExerciseRoutine(models.Model):
     EXPERIENCE_LEVELS = [
@@ -206,3 +692,169 @@ class GymApprovalHistory(models.Model):
     
     def __str__(self):
         return f"{self.gym.name} - {self.action} by {self.admin.get_full_name()} on {self.created_at.strftime('%Y-%m-%d')}"
+
+
+class SyncTombstone(models.Model):
+    """Record of a deleted row, so delta-sync clients can drop it (see api/sync.py)."""
+    RESOURCE_CHOICES = [
+        ('memberships', 'Memberships'),
+        ('notices', 'Notices'),
+        ('plans', 'Membership plans'),
+        ('attendance', 'Attendance'),
+    ]
+    
+    resource = models.CharField(max_length=20, choices=RESOURCE_CHOICES)
+    object_id = models.BigIntegerField()
+    # Plain ids rather than foreign keys: the gym or member may be the thing that was deleted.
+    gym_id = models.BigIntegerField(null=True, blank=True)
+    member_id = models.BigIntegerField(null=True, blank=True)
+    deleted_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['gym_id', 'deleted_at'], name='api_tombstone_gym_idx'),
+            models.Index(fields=['member_id', 'deleted_at'], name='api_tombstone_member_idx'),
+            models.Index(fields=['deleted_at'], name='api_tombstone_deleted_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.resource} #{self.object_id} deleted {self.deleted_at:%Y-%m-%d %H:%M}"
+
+
+class Task(models.Model):
+    """A unit of background work for the DB-backed queue in api/tasks.py."""
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+    
+    name = models.CharField(max_length=200, help_text="Registered task name, see api.tasks.task")
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=5)
+    # Not picked up before run_at; retries push it out with exponential backoff.
+    run_at = models.DateTimeField(default=timezone.now)
+    # Visibility timeout: a running task whose worker vanished is picked up again after locked_until.
+    locked_until = models.DateTimeField(blank=True, null=True)
+    locked_by = models.CharField(max_length=100, blank=True)
+    lock_token = models.CharField(max_length=32, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_at'], name='api_task_status_run_idx'),
+            models.Index(fields=['status', 'locked_until'], name='api_task_status_lock_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.name} #{self.id} ({self.status})"
+
+
+class IdempotencyKey(models.Model):
+    """The stored outcome of a request sent with an Idempotency-Key header, see api/idempotency.py."""
+    STATUS_CHOICES = [
+        ('processing', 'Processing'),
+        ('completed', 'Completed'),
+    ]
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='idempotency_keys')
+    key = models.CharField(max_length=255)
+    # SHA-256 of method, path and body: reusing a key for a different request is rejected.
+    request_hash = models.CharField(max_length=64)
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=500)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='processing')
+    response_status = models.IntegerField(blank=True, null=True)
+    response_body = models.TextField(blank=True)
+    # Held by the request executing the view; a request that died is taken over after locked_until.
+    lock_token = models.CharField(max_length=32, blank=True)
+    locked_until = models.DateTimeField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+    
+    class Meta:
+        unique_together = ['user', 'key']
+    
+    def __str__(self):
+        return f"{self.method} {self.path} [{self.key}] ({self.status})"
+
+
+class GymOccupancyHour(models.Model):
+    """Occupancy of a gym during one hour, flushed from the live cache counters by api/occupancy.py."""
+    gym = models.ForeignKey(Gym, on_delete=models.CASCADE, related_name='occupancy_hours')
+    hour = models.DateTimeField(help_text="Start of the hour")
+    checkins = models.IntegerField(default=0)
+    checkouts = models.IntegerField(default=0)
+    # Highest and latest occupancy seen by the flushes during the hour
+    peak = models.IntegerField(default=0)
+    occupancy = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ['gym', 'hour']
+    
+    def __str__(self):
+        return f"{self.gym} {self.hour:%Y-%m-%d %H:00}: {self.occupancy}"
+
+
+class ClassSession(models.Model):
+    """A limited-capacity session at a gym (a spin class, a PT slot) that members book, see api/bookings.py."""
+    gym = models.ForeignKey(Gym, on_delete=models.CASCADE, related_name='class_sessions')
+    title = models.CharField(max_length=200)
+    description = models.TextField(blank=True)
+    instructor = models.CharField(max_length=200, blank=True)
+    starts_at = models.DateTimeField()
+    ends_at = models.DateTimeField()
+    capacity = models.PositiveIntegerField(validators=[MinValueValidator(1)])
+    # Seats taken; only changed by conditional UPDATEs in api/bookings.py, never read-modify-write.
+    booked_count = models.IntegerField(default=0)
+    is_cancelled = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['gym', 'starts_at'], name='api_class_gym_starts_idx'),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(booked_count__gte=0) & models.Q(booked_count__lte=models.F('capacity')),
+                name='api_class_booked_within_capacity',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.title} at {self.gym} ({self.starts_at:%Y-%m-%d %H:%M})"
+
+
+class ClassBooking(models.Model):
+    STATUS_CHOICES = [
+        ('booked', 'Booked'),
+        ('waitlisted', 'Waitlisted'),
+        ('cancelled', 'Cancelled'),
+    ]
+    
+    session = models.ForeignKey(ClassSession, on_delete=models.CASCADE, related_name='bookings')
+    member = models.ForeignKey(User, on_delete=models.CASCADE, related_name='class_bookings')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES)
+    # Waitlist order; reset when a cancelled booking is made again.
+    queued_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ['session', 'member']
+        indexes = [
+            models.Index(fields=['session', 'status', 'queued_at'], name='api_booking_waitlist_idx'),
+            models.Index(fields=['member', 'status'], name='api_booking_member_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.member.username} - {self.session} ({self.status})"
@@ -0,0 +1,108 @@
+"""
+Member notice feed with read tracking.
+
+Members only see live notices (``Notice.live()``: active, published, not yet
+expired). The feed is ordered by ``(publish_at, id)`` so a scheduled notice
+lands at the end of the feed when it goes live, not at its creation-time id.
+
+Read state is a watermark per (member, gym): every notice of the gym up to and
+including ``(last_read_at, last_read_id)`` in feed order counts as read, so
+the badge poll is one COUNT over the ``(gym, is_active, publish_at, id)`` index.
+"""
+
+from django.db.models import BooleanField, DateTimeField, ExpressionWrapper, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from datetime import datetime, timezone as dt_timezone
+
+from .fast_serializers import NoticeValuesSerializer
+from .models import ArchivedNotice, Membership, Notice, NoticeReadMarker
+
+
+BEGINNING = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def member_gym_ids(user):
+    return Membership.objects.filter(member=user, status='approved').values('gym_id')
+
+
+def member_notices(user):
+    return Notice.live().filter(gym_id__in=member_gym_ids(user))
+
+
+def _after(published, notice_id):
+    """Notices after ``(published, notice_id)`` in feed order."""
+    return Q(publish_at__gt=published) | Q(publish_at=published, id__gt=notice_id)
+
+
+def _unread(user):
+    marker = NoticeReadMarker.objects.filter(member=user, gym_id=OuterRef('gym_id'))
+    read_at = Coalesce(Subquery(marker.values('last_read_at')[:1]), Value(BEGINNING), output_field=DateTimeField())
+    read_id = Coalesce(Subquery(marker.values('last_read_id')[:1]), Value(0))
+    return _after(read_at, read_id)
+
+
+def _position(notice_id):
+    """Feed position ``(publish_at, id)`` of a notice, archived ones included."""
+    published = Notice.objects.filter(id=notice_id).values_list('publish_at', flat=True).first()
+    if published is None:
+        published = ArchivedNotice.objects.filter(notice_id=notice_id).values_list('publish_at', flat=True).first()
+    return (published, notice_id) if published is not None else None
+
+
+def unread_count(user):
+    return member_notices(user).filter(_unread(user)).count()
+
+
+class NoticeFeedValuesSerializer(NoticeValuesSerializer):
+    columns = NoticeValuesSerializer.columns + (('is_read', 'is_read'),)
+
+
+def feed(user, after=None, limit=50):
+    """Up to ``limit`` live notices following notice ``after`` in feed order, and whether more follow."""
+    notices = member_notices(user)
+    if after:
+        position = _position(after)
+        # A cursor notice that has since been deleted falls back to id order.
+        notices = notices.filter(_after(*position) if position else Q(id__gt=after))
+
+    notices = notices.annotate(
+        is_read=ExpressionWrapper(~_unread(user), output_field=BooleanField())
+    ).order_by('publish_at', 'id')
+    rows = NoticeFeedValuesSerializer(notices[:limit + 1]).data
+    return rows[:limit], len(rows) > limit
+
+
+def mark_read(user, up_to=None, gym_id=None):
+    """
+    Move the member's watermarks forward to notice ``up_to`` (default: the newest
+    live notice) for one gym or all of their gyms. Watermarks never move backwards.
+    """
+    notices = member_notices(user)
+    if gym_id is not None:
+        notices = notices.filter(gym_id=gym_id)
+    if up_to is not None:
+        position = _position(up_to)
+        if position is None:
+            return 0
+        notices = notices.exclude(_after(*position))
+
+    gym_ids = set(notices.values_list('gym_id', flat=True).distinct())
+    if not gym_ids:
+        return 0
+
+    NoticeReadMarker.objects.bulk_create(
+        [NoticeReadMarker(member=user, gym_id=gym) for gym in gym_ids],
+        ignore_conflicts=True,
+    )
+    now = timezone.now()
+    moved = 0
+    for gym in gym_ids:
+        published, notice_id = notices.filter(gym_id=gym).order_by('-publish_at', '-id').values_list('publish_at', 'id')[0]
+        # Conditional UPDATE keeps concurrent mark-read calls from moving a watermark back.
+        moved += NoticeReadMarker.objects.filter(member=user, gym_id=gym).filter(
+            Q(last_read_at__isnull=True)
+            | Q(last_read_at__lt=published)
+            | Q(last_read_at=published, last_read_id__lt=notice_id)
+        ).update(last_read_at=published, last_read_id=notice_id, updated_at=now)
+    return moved
@@ -0,0 +1,191 @@
+"""
+Live gym occupancy: who is on the floor right now.
+
+A visit starts at check-in (a new Attendance row) and ends at check-out
+(``Attendance.checked_out_at``). Members who never check out stop counting
+after ``OCCUPANCY_MAX_VISIT_HOURS``.
+
+Check-in and check-out adjust a per-gym counter in the cache with
+``incr``/``decr`` once the transaction commits, so reading the occupancy is
+one cache lookup. The adjustments are atomic on Redis or Memcached; on the
+database cache concurrent ones can be lost until the next flush resets the
+counter (the system checks warn about this, api.W001). Every minute
+``flush_occupancy`` (queued from cron with ``enqueue_task flush_occupancy``):
+
+* recounts the check-ins and check-outs of the current and previous hour,
+  and of any older hour a kiosk uploaded scans for since, from Attendance
+  into ``GymOccupancyHour`` rows;
+* records the hour's peak and latest occupancy there;
+* resets each counter to the number of open visits in the database. That
+  drops visits that timed out, and repairs a counter lost to an eviction or
+  a restart.
+
+A counter missing from the cache is rebuilt from the database on first use.
+Counters are shared between workers only on a shared cache (see CACHES in
+settings); the hourly history never depends on the cache.
+"""
+
+from datetime import datetime, time, timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from .models import Attendance, Gym, GymOccupancyHour
+
+
+FLUSH_LOCK = 'occupancy:flush'
+
+
+def _max_visit():
+    return timedelta(hours=getattr(settings, 'OCCUPANCY_MAX_VISIT_HOURS', 3))
+
+
+def _hour(moment):
+    return timezone.localtime(moment).replace(minute=0, second=0, microsecond=0)
+
+
+def _current_key(gym_id):
+    return f'occupancy:{gym_id}'
+
+
+def open_visits(now=None):
+    """Visits started within the maximum visit length and not checked out yet."""
+    now = now or timezone.now()
+    return Attendance.objects.filter(checked_out_at__isnull=True, checked_in_at__gte=now - _max_visit())
+
+
+def _adjust(gym_id, delta):
+    key = _current_key(gym_id)
+    try:
+        if delta > 0:
+            cache.incr(key, delta)
+        else:
+            cache.decr(key, -delta)
+    except ValueError:
+        # Not cached: count from the database, which already includes this event.
+        cache.add(key, open_visits().filter(gym_id=gym_id).count(), None)
+
+
+def record_checkin(gym_id, checked_in_at):
+    def count():
+        now = timezone.now()
+        # A kiosk scan uploaded long after the visit is history, not occupancy.
+        if checked_in_at >= now - _max_visit():
+            _adjust(gym_id, 1)
+    transaction.on_commit(count)
+
+
+def record_checkout(gym_id, checked_in_at, checked_out_at):
+    def count():
+        # Visits older than the maximum length were already dropped from the counter.
+        if checked_in_at >= checked_out_at - _max_visit():
+            _adjust(gym_id, -1)
+    transaction.on_commit(count)
+
+
+def current(gym_id):
+    """Members on the floor at ``gym_id``, or ``None`` for an unknown gym."""
+    occupancy = cache.get(_current_key(gym_id))
+    if occupancy is None:
+        if not Gym.objects.filter(id=gym_id).exists():
+            return None
+        occupancy = open_visits().filter(gym_id=gym_id).count()
+        cache.add(_current_key(gym_id), occupancy, None)
+    return max(occupancy, 0)
+
+
+def flush(now=None):
+    """Recount the current and previous hour into GymOccupancyHour and re-sync the counters; returns the rows written."""
+    # Two flushes at once would race on the same hour rows.
+    if not cache.add(FLUSH_LOCK, 1, 300):
+        return 0
+    try:
+        return _flush(now or timezone.now())
+    finally:
+        cache.delete(FLUSH_LOCK)
+
+
+def _hourly(attendances, field):
+    """``{(gym_id, hour): count}`` of ``attendances`` bucketed by the local hour of ``field``."""
+    rows = attendances.values('gym_id', bucket=TruncHour(field)).annotate(total=Count('id')).order_by()
+    return {(row['gym_id'], _hour(row['bucket'])): row['total'] for row in rows}
+
+
+def _flush(now):
+    this_hour = _hour(now)
+    since = this_hour - timedelta(hours=1)
+    end = this_hour + timedelta(hours=1)
+
+    # Hours to recount: the last two, plus older ones a kiosk uploaded scans for since then.
+    late = _hourly(Attendance.objects.filter(created_at__gte=since, checked_in_at__lt=since), 'checked_in_at')
+    gym_ids = list(Gym.objects.values_list('id', flat=True))
+    recount = {(gym_id, hour) for gym_id in gym_ids for hour in (since, this_hour)} | set(late)
+    oldest = min(hour for _, hour in recount) if recount else since
+
+    checkins = _hourly(Attendance.objects.filter(checked_in_at__gte=oldest, checked_in_at__lt=end), 'checked_in_at')
+    checkouts = _hourly(Attendance.objects.filter(checked_out_at__gte=since, checked_out_at__lt=end), 'checked_out_at')
+    cached = cache.get_many([_current_key(gym_id) for gym_id in gym_ids])
+    live = dict(open_visits(now).values('gym_id').annotate(total=Count('id')).values_list('gym_id', 'total'))
+
+    changes = {}
+    for key in recount:
+        if checkins.get(key) or checkouts.get(key):
+            changes[key] = {'in': checkins.get(key, 0), 'out': checkouts.get(key, 0)}
+    for gym_id in gym_ids:
+        occupancy = live.get(gym_id, 0)
+        # Counters are only shared between processes on a shared cache; the database count is authoritative.
+        cache.set(_current_key(gym_id), occupancy, None)
+        seen = max(cached.get(_current_key(gym_id)) or 0, occupancy)
+        changes.setdefault((gym_id, this_hour), {'in': 0, 'out': 0}).update(occupancy=occupancy, seen=seen)
+
+    existing = {
+        (row.gym_id, row.hour): row
+        for row in GymOccupancyHour.objects.filter(
+            gym_id__in={gym_id for gym_id, _ in recount}, hour__gte=oldest, hour__lt=end
+        )
+    }
+    created, updated = [], []
+    for key in recount:
+        row = existing.get(key)
+        change = changes.get(key)
+        if row is None:
+            if change is None or not (change['in'] or change['out'] or change.get('seen')):
+                continue
+            row = GymOccupancyHour(gym_id=key[0], hour=key[1])
+            created.append(row)
+        else:
+            updated.append(row)
+        change = change or {'in': 0, 'out': 0}
+        # Recounted from Attendance, so flushing again (or after a missed run) never double-counts.
+        row.checkins = change['in']
+        row.checkouts = change['out']
+        if 'occupancy' in change:
+            row.occupancy = change['occupancy']
+            row.peak = max(row.peak, change['seen'])
+        row.updated_at = now
+
+    if not created and not updated:
+        return 0
+    with transaction.atomic():
+        GymOccupancyHour.objects.bulk_create(created)
+        GymOccupancyHour.objects.bulk_update(updated, ['checkins', 'checkouts', 'occupancy', 'peak', 'updated_at'])
+    return len(created) + len(updated)
+
+
+def history(gym_id, day):
+    """The 24 hours of ``day`` (in the current time zone) with what was flushed for each."""
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    rows = {
+        row['hour']: row
+        for row in GymOccupancyHour.objects.filter(
+            gym_id=gym_id, hour__gte=start, hour__lt=start + timedelta(days=1)
+        ).values('hour', 'checkins', 'checkouts', 'peak', 'occupancy')
+    }
+    hours = []
+    for offset in range(24):
+        hour = start + timedelta(hours=offset)
+        hours.append(rows.get(hour, {'hour': hour, 'checkins': 0, 'checkouts': 0, 'peak': 0, 'occupancy': 0}))
+    return hours
@@ -0,0 +1,132 @@
+"""
+Admin review queue for pending gyms.
+
+Reviewers claim a batch of pending gyms before working on them so two admins
+never act on the same gym. Claims expire after ``GYM_REVIEW_CLAIM_SECONDS`` so
+an abandoned batch goes back to the queue.
+"""
+
+from datetime import timedelta
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Gym, GymApprovalHistory
+
+
+def claim_ttl():
+    return timedelta(seconds=getattr(settings, 'GYM_REVIEW_CLAIM_SECONDS', 900))
+
+
+def not_claimed_by_others(reviewer, now):
+    """Gyms that are unclaimed, claimed by ``reviewer`` or whose claim has expired."""
+    return (
+        Q(review_claimed_by__isnull=True)
+        | Q(review_claimed_by=reviewer)
+        | Q(review_claimed_at__lt=now - claim_ttl())
+    )
+
+
+def claimable(reviewer, now):
+    """Pending gyms that ``reviewer`` may claim or review."""
+    return Gym.objects.filter(status='pending').filter(not_claimed_by_others(reviewer, now))
+
+
+def claim_pending_gyms(reviewer, limit):
+    """Claim up to ``limit`` pending gyms, oldest first, and return the reviewer's claimed gyms."""
+    now = timezone.now()
+    with transaction.atomic():
+        candidates = claimable(reviewer, now).order_by('created_at', 'id')
+        if connection.features.has_select_for_update_skip_locked:
+            # Rows another reviewer is claiming right now are skipped instead of waited on.
+            candidates = candidates.select_for_update(skip_locked=True)
+        ids = list(candidates.values_list('id', flat=True)[:limit])
+        # Re-checking the claim condition in the UPDATE keeps this safe on databases
+        # without row locks (SQLite): a gym claimed in the meantime is simply not updated.
+        claimable(reviewer, now).filter(id__in=ids).update(
+            review_claimed_by=reviewer,
+            review_claimed_at=now
+        )
+    return claimed_gyms(reviewer)
+
+
+def claimed_gyms(reviewer):
+    return Gym.objects.filter(
+        status='pending',
+        review_claimed_by=reviewer,
+        review_claimed_at__gte=timezone.now() - claim_ttl()
+    ).select_related('owner').order_by('created_at', 'id')
+
+
+def release_claims(reviewer, ids=None):
+    gyms = Gym.objects.filter(review_claimed_by=reviewer)
+    if ids is not None:
+        gyms = gyms.filter(id__in=ids)
+    return gyms.update(review_claimed_by=None, review_claimed_at=None)
+
+
+def _review_update(action, notes, now):
+    update = {
+        'status': {'approve': 'approved', 'reject': 'rejected'}[action],
+        'review_claimed_by': None,
+        'review_claimed_at': None,
+        'updated_at': now,
+    }
+    if action == 'reject':
+        update['rejection_reason'] = notes
+    return update
+
+
+def review_gym(reviewer, gym_id, action, notes=''):
+    """
+    Approve or reject one gym unless another reviewer holds a live claim on it.
+
+    Unlike ``bulk_review`` this may also change a gym that was already
+    reviewed. Returns whether the gym was changed.
+    """
+    now = timezone.now()
+    update = _review_update(action, notes, now)
+    with transaction.atomic():
+        # The claim condition is part of the UPDATE, so it holds without row locks (SQLite).
+        if not Gym.objects.filter(id=gym_id).filter(not_claimed_by_others(reviewer, now)).update(**update):
+            return False
+        GymApprovalHistory.objects.create(gym_id=gym_id, admin=reviewer, action=update['status'], notes=notes)
+    return True
+
+
+def bulk_review(reviewer, ids, action, notes=''):
+    """
+    Approve or reject many pending gyms at once.
+
+    Only gyms that are still pending and not under another reviewer's live claim
+    are changed. Returns ``{gym_id: outcome}`` in the order of ``ids``.
+    """
+    now = timezone.now()
+    update = _review_update(action, notes, now)
+    new_status = update['status']
+    ids = list(dict.fromkeys(ids))
+
+    with transaction.atomic():
+        # One conditional UPDATE per gym, written before anything is read: a gym claimed
+        # or reviewed concurrently is simply not updated, we know exactly which rows
+        # changed, and SQLite never has to upgrade a read lock to a write lock.
+        reviewed = {gym_id for gym_id in ids if claimable(reviewer, now).filter(id=gym_id).update(**update)}
+
+        GymApprovalHistory.objects.bulk_create([
+            GymApprovalHistory(gym_id=gym_id, admin=reviewer, action=new_status, notes=notes)
+            for gym_id in ids if gym_id in reviewed
+        ])
+        statuses = dict(Gym.objects.filter(id__in=ids).exclude(id__in=reviewed).values_list('id', 'status'))
+
+    results = []
+    for gym_id in ids:
+        if gym_id in reviewed:
+            results.append({'id': gym_id, 'result': new_status})
+        elif gym_id not in statuses:
+            results.append({'id': gym_id, 'result': 'not_found'})
+        elif statuses[gym_id] != 'pending':
+            results.append({'id': gym_id, 'result': 'skipped', 'error': f'Gym is already {statuses[gym_id]}'})
+        else:
+            results.append({'id': gym_id, 'result': 'skipped', 'error': 'Gym is claimed by another reviewer'})
+    return results
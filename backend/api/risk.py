@@ -0,0 +1,149 @@
+"""
+Churn-risk scoring for approved members, computed for a whole gym at once.
+
+Features come from the attendance bitmaps as NumPy day arrays:
+
+* recency         - days since the last visit, saturating at four weeks
+* frequency drop  - how far the weekly visit rate over the last 4 weeks fell
+                    below the rate over the last 12 weeks
+* streak decay    - how far the current streak fell short of the longest
+                    streak in the last 12 weeks
+
+The score is a weighted sum in [0, 1]; higher means more likely to churn.
+"""
+
+from django.db import transaction
+from django.utils import timezone
+import numpy as np
+
+from .cohorts import load_attendance_days
+from .models import Membership, MemberRiskScore
+
+
+WINDOW_DAYS = 84  # 12 weeks
+RECENT_DAYS = 28  # 4 weeks
+WEIGHTS = {'recency': 0.4, 'frequency_drop': 0.4, 'streak_decay': 0.2}
+
+
+def member_features(member_ids, attendance_members, attendance_days, start_days, today):
+    """
+    Compute per-member features as arrays aligned with ``member_ids`` (sorted, unique).
+
+    ``start_days`` holds each member's membership start as days since epoch and is
+    used as the "last visit" for members who never checked in.
+    """
+    n = len(member_ids)
+    today = int(today)
+
+    position = np.clip(np.searchsorted(member_ids, attendance_members), 0, max(n - 1, 0))
+    known = (member_ids[position] == attendance_members) if n else np.zeros(0, dtype=bool)
+    position, days = position[known], attendance_days[known].astype(np.int64)
+    in_range = days <= today
+    position, days = position[in_range], days[in_range]
+
+    last_visit = np.full(n, -1, dtype=np.int64)
+    np.maximum.at(last_visit, position, days)
+    last_visit = np.where(last_visit >= 0, last_visit, start_days)
+    days_since = today - last_visit
+
+    age = today - days
+    visits_4w = np.bincount(position[age < RECENT_DAYS], minlength=n)
+    visits_12w = np.bincount(position[age < WINDOW_DAYS], minlength=n)
+
+    # Runs of consecutive days inside the 12-week window, per member.
+    window = age < WINDOW_DAYS
+    run_members, run_days = position[window], days[window]
+    order = np.lexsort((run_days, run_members))
+    run_members, run_days = run_members[order], run_days[order]
+    longest = np.zeros(n, dtype=np.int64)
+    current = np.zeros(n, dtype=np.int64)
+    if len(run_days):
+        breaks = np.concatenate((
+            [True],
+            (run_members[1:] != run_members[:-1]) | (np.diff(run_days) != 1),
+        ))
+        starts = np.flatnonzero(breaks)
+        lengths = np.diff(np.append(starts, len(run_days)))
+        ends = starts + lengths - 1
+        np.maximum.at(longest, run_members[starts], lengths)
+        # A streak is still current if its last day is today or yesterday.
+        live = run_days[ends] >= today - 1
+        current[run_members[starts][live]] = lengths[live]
+
+    return {
+        'days_since_last_visit': days_since,
+        'visits_last_4_weeks': visits_4w,
+        'visits_last_12_weeks': visits_12w,
+        'current_streak': current,
+        'longest_recent_streak': longest,
+    }
+
+
+def risk_scores(features):
+    recency = np.clip(features['days_since_last_visit'] / RECENT_DAYS, 0, 1)
+
+    rate_4w = features['visits_last_4_weeks'] / (RECENT_DAYS / 7)
+    rate_12w = features['visits_last_12_weeks'] / (WINDOW_DAYS / 7)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        frequency_drop = np.where(rate_12w > 0, np.clip(1 - rate_4w / rate_12w, 0, 1), 1.0)
+        streak_decay = np.where(
+            features['longest_recent_streak'] > 0,
+            1 - features['current_streak'] / features['longest_recent_streak'],
+            1.0,
+        )
+
+    return (
+        WEIGHTS['recency'] * recency
+        + WEIGHTS['frequency_drop'] * frequency_drop
+        + WEIGHTS['streak_decay'] * streak_decay
+    )
+
+
+def score_gym(gym_id, today=None):
+    """Score every approved membership of a gym and replace its stored scores. Returns the row count."""
+    today = today or timezone.localdate()
+    today_day = np.datetime64(today, 'D').astype(np.int64)
+
+    rows = list(
+        Membership.objects.filter(gym_id=gym_id, status='approved')
+        .order_by('member_id', 'id')
+        .values_list('id', 'member_id', 'start_date', 'created_at')
+    )
+    computed_at = timezone.now()
+    if not rows:
+        MemberRiskScore.objects.filter(gym_id=gym_id).delete()
+        return 0
+
+    # One score per member; keep the first approved membership if there are several.
+    seen = set()
+    rows = [row for row in rows if not (row[1] in seen or seen.add(row[1]))]
+    membership_ids = [row[0] for row in rows]
+    member_ids = np.fromiter((row[1] for row in rows), dtype=np.int64, count=len(rows))
+    start_days = np.array(
+        [row[2] or (row[3].date() if row[3] else today) for row in rows], dtype='datetime64[D]'
+    ).astype(np.int64)
+
+    years = [today.year - 1, today.year]
+    attendance_members, attendance_days = load_attendance_days(gym_id, years=years)
+    features = member_features(member_ids, attendance_members, attendance_days, start_days, today_day)
+    scores = risk_scores(features)
+
+    results = [
+        MemberRiskScore(
+            membership_id=membership_ids[i],
+            gym_id=gym_id,
+            member_id=int(member_ids[i]),
+            score=round(float(scores[i]), 4),
+            days_since_last_visit=int(features['days_since_last_visit'][i]),
+            visits_last_4_weeks=int(features['visits_last_4_weeks'][i]),
+            visits_last_12_weeks=int(features['visits_last_12_weeks'][i]),
+            current_streak=int(features['current_streak'][i]),
+            longest_recent_streak=int(features['longest_recent_streak'][i]),
+            computed_at=computed_at,
+        )
+        for i in range(len(rows))
+    ]
+    with transaction.atomic():
+        MemberRiskScore.objects.filter(gym_id=gym_id).delete()
+        MemberRiskScore.objects.bulk_create(results, batch_size=1000)
+    return len(results)
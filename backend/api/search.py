@@ -0,0 +1,154 @@
+"""
+Ranked full-text search over gym name, address and description.
+
+The backend is picked from the database in use:
+
+* SQLite  - an FTS5 table (``api_gym_fts``, created by migration 0018) kept in
+            sync from Gym post_save/post_delete signals and ranked with bm25().
+* Postgres - a weighted tsvector expression with a matching GIN index, ranked
+            with ts_rank_cd, plus a trigram match on the name for typos.
+* anything else, or SQLite built without FTS5 - an icontains fallback.
+
+Name matches weigh more than address matches, which weigh more than description matches.
+"""
+
+from django.db import connection
+import re
+
+from .models import Gym
+
+
+FTS_TABLE = 'api_gym_fts'
+# bm25 column weights for (name, address, description)
+FTS_WEIGHTS = (10.0, 4.0, 1.0)
+
+PG_VECTOR = (
+    "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(address, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'C')"
+)
+
+_backend = None
+
+
+def backend():
+    global _backend
+    if _backend is None:
+        if connection.vendor == 'postgresql':
+            _backend = 'postgres'
+        elif connection.vendor == 'sqlite' and FTS_TABLE in connection.introspection.table_names():
+            _backend = 'fts5'
+        else:
+            _backend = 'basic'
+    return _backend
+
+
+def _terms(query):
+    return re.findall(r'\w+', query.lower())
+
+
+def _fts_query(terms):
+    # Quote every term so user input can't inject FTS5 syntax; prefix-match the last one as the user types.
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+def index_gym(gym):
+    if backend() != 'fts5':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [gym.pk])
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, name, address, description) VALUES (%s, %s, %s, %s)',
+            [gym.pk, gym.name, gym.address, gym.description or '']
+        )
+
+
+def unindex_gym(gym_id):
+    if backend() != 'fts5':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [gym_id])
+
+
+def rebuild_index():
+    """Repopulate the FTS5 table from the gym table. Returns the number of indexed gyms."""
+    if backend() != 'fts5':
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, name, address, description) "
+            f"SELECT id, name, address, coalesce(description, '') FROM api_gym"
+        )
+        cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+    return Gym.objects.count()
+
+
+def _search_fts5(terms, limit, offset):
+    match = _fts_query(terms)
+    weights = ', '.join(str(weight) for weight in FTS_WEIGHTS)
+    # CROSS JOIN pins the FTS table as the outer loop; otherwise SQLite may scan
+    # api_gym and run the MATCH once per gym.
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT COUNT(*) FROM {FTS_TABLE} f CROSS JOIN api_gym g ON g.id = f.rowid "
+            f"WHERE {FTS_TABLE} MATCH %s AND g.status = 'approved'",
+            [match]
+        )
+        total = cursor.fetchone()[0]
+        cursor.execute(
+            f"SELECT f.rowid, bm25({FTS_TABLE}, {weights}) AS score FROM {FTS_TABLE} f "
+            f"CROSS JOIN api_gym g ON g.id = f.rowid "
+            f"WHERE {FTS_TABLE} MATCH %s AND g.status = 'approved' "
+            f"ORDER BY score LIMIT %s OFFSET %s",
+            [match, limit, offset]
+        )
+        # bm25 is lower-is-better; flip it so every backend reports higher-is-better.
+        ranked = [(gym_id, -score) for gym_id, score in cursor.fetchall()]
+    return total, ranked
+
+
+def _search_postgres(terms, limit, offset):
+    tsquery = ' & '.join(f'{term}:*' for term in terms)
+    name_query = ' '.join(terms)
+    where = (
+        f"status = 'approved' AND (({PG_VECTOR}) @@ to_tsquery('english', %s) OR name %% %s)"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT COUNT(*) FROM api_gym WHERE {where}', [tsquery, name_query])
+        total = cursor.fetchone()[0]
+        cursor.execute(
+            f"SELECT id, ts_rank_cd({PG_VECTOR}, to_tsquery('english', %s)) + similarity(name, %s) AS score "
+            f"FROM api_gym WHERE {where} ORDER BY score DESC, id LIMIT %s OFFSET %s",
+            [tsquery, name_query, tsquery, name_query, limit, offset]
+        )
+        ranked = list(cursor.fetchall())
+    return total, ranked
+
+
+def _search_basic(terms, limit, offset):
+    from django.db.models import Q
+
+    gyms = Gym.objects.filter(status='approved')
+    for term in terms:
+        gyms = gyms.filter(Q(name__icontains=term) | Q(address__icontains=term) | Q(description__icontains=term))
+    total = gyms.count()
+    ids = gyms.order_by('name', 'id').values_list('id', flat=True)[offset:offset + limit]
+    return total, [(gym_id, None) for gym_id in ids]
+
+
+def search_gyms(query, limit=20, offset=0):
+    """
+    Return ``(total, [(gym, score), ...])`` for approved gyms matching ``query``, best first.
+    """
+    terms = _terms(query)
+    if not terms:
+        return 0, []
+
+    search = {'fts5': _search_fts5, 'postgres': _search_postgres}.get(backend(), _search_basic)
+    total, ranked = search(terms, limit, offset)
+
+    gyms = Gym.objects.select_related('owner').in_bulk([gym_id for gym_id, _ in ranked])
+    return total, [(gyms[gym_id], score) for gym_id, score in ranked if gym_id in gyms]
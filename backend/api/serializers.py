@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from django.contrib.auth import authenticate
-from .models import User, Gym, MembershipPlan, Membership, Attendance, Notice, ExerciseRoutine, GymApprovalHistory
+from django.utils import timezone
+from .models import User, Gym, MembershipPlan, Membership, Attendance, Notice, ExerciseRoutine, GymApprovalHistory, ClassSession, ClassBooking
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -53,8 +54,15 @@ class GymSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Gym
-        fields = ['id', 'name', 'address', 'phone', 'email', 'description', 'owner', 'owner_name', 'status', 'rejection_reason', 'created_at']
+        fields = ['id', 'name', 'address', 'phone', 'email', 'description', 'latitude', 'longitude', 'owner', 'owner_name', 'status', 'rejection_reason', 'created_at']
         read_only_fields = ['owner', 'status', 'rejection_reason', 'created_at']
+    
+    def update(self, instance, validated_data):
+        # A new address without explicit coordinates is geocoded again on save
+        if 'address' in validated_data and validated_data['address'] != instance.address:
+            if 'latitude' not in validated_data and 'longitude' not in validated_data:
+                instance.latitude = instance.longitude = None
+        return super().update(instance, validated_data)
 
 
 class MembershipPlanSerializer(serializers.ModelSerializer):
@@ -94,11 +102,60 @@ class NoticeSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Notice
-        fields = ['id', 'gym', 'gym_name', 'title', 'message', 'created_at', 'created_at_formatted', 'is_active']
+        fields = ['id', 'gym', 'gym_name', 'title', 'message', 'created_at', 'created_at_formatted', 'is_active', 'publish_at', 'expire_at']
         read_only_fields = ['created_at', 'created_at_formatted']
     
     def get_created_at_formatted(self, obj):
         return obj.created_at.strftime('%B %d, %Y at %I:%M %p')
+    
+    def validate(self, attrs):
+        now = timezone.now()
+        publish_at = attrs.get('publish_at')
+        if publish_at is not None and publish_at < now and (self.instance is None or publish_at != self.instance.publish_at):
+            # Backdating would slip the notice in behind members' feed cursors and read watermarks
+            attrs['publish_at'] = now
+        
+        publish_at = attrs.get('publish_at') or (self.instance.publish_at if self.instance else now)
+        expire_at = attrs['expire_at'] if 'expire_at' in attrs else (self.instance.expire_at if self.instance else None)
+        if expire_at is not None and expire_at <= publish_at:
+            raise serializers.ValidationError({'expire_at': 'Expiry must be after the publish time'})
+        return attrs
+
+
+class ClassSessionSerializer(serializers.ModelSerializer):
+    gym_name = serializers.CharField(source='gym.name', read_only=True)
+    seats_left = serializers.SerializerMethodField()
+    my_booking_status = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = ClassSession
+        fields = ['id', 'gym', 'gym_name', 'title', 'description', 'instructor', 'starts_at', 'ends_at',
+                  'capacity', 'booked_count', 'seats_left', 'is_cancelled', 'my_booking_status', 'created_at']
+        read_only_fields = ['gym', 'booked_count', 'created_at']
+    
+    def get_seats_left(self, obj):
+        return max(obj.capacity - obj.booked_count, 0)
+    
+    def get_my_booking_status(self, obj):
+        # Annotated by the list view for members
+        return getattr(obj, 'my_booking_status', None)
+    
+    def validate(self, attrs):
+        starts_at = attrs.get('starts_at', self.instance.starts_at if self.instance else None)
+        ends_at = attrs.get('ends_at', self.instance.ends_at if self.instance else None)
+        if starts_at and ends_at and ends_at <= starts_at:
+            raise serializers.ValidationError({'ends_at': 'A class must end after it starts'})
+        return attrs
+
+
+class ClassBookingSerializer(serializers.ModelSerializer):
+    member_name = serializers.CharField(source='member.get_full_name', read_only=True)
+    session_title = serializers.CharField(source='session.title', read_only=True)
+    
+    class Meta:
+        model = ClassBooking
+        fields = ['id', 'session', 'session_title', 'member', 'member_name', 'status', 'queued_at', 'created_at']
+        read_only_fields = fields
 
 
 class ExerciseRoutineSerializer(serializers.ModelSerializer):
@@ -131,6 +188,7 @@ class LeaderboardEntrySerializer(serializers.Serializer):
     longest_streak = serializers.IntegerField()
     attendance_percentage = serializers.FloatField()
     rank = serializers.IntegerField()
+    dense_rank = serializers.IntegerField()
 
 
 class GymAttendanceStatsSerializer(serializers.Serializer):
@@ -142,6 +200,15 @@ class GymAttendanceStatsSerializer(serializers.Serializer):
     recent_attendance = AttendanceSerializer(many=True)
 
 
+class KioskScanSerializer(serializers.Serializer):
+    token = serializers.CharField(max_length=512, help_text="The check-in pass as scanned")
+    scanned_at = serializers.DateTimeField()
+
+
+class KioskScanBatchSerializer(serializers.Serializer):
+    scans = KioskScanSerializer(many=True, allow_empty=False, max_length=500)
+
+
 class GymApprovalHistorySerializer(serializers.ModelSerializer):
     gym_name = serializers.CharField(source='gym.name', read_only=True)
     admin_name = serializers.CharField(source='admin.get_full_name', read_only=True)
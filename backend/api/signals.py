@@ -0,0 +1,33 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Attendance, Gym, Membership, MembershipPlan, Notice
+from . import search
+from . import sync
+
+
+@receiver(post_save, sender=Gym)
+def index_gym_for_search(sender, instance, **kwargs):
+    search.index_gym(instance)
+
+
+@receiver(post_delete, sender=Gym)
+def remove_gym_from_search(sender, instance, **kwargs):
+    search.unindex_gym(instance.pk)
+
+
+# Tombstones for delta sync; cascaded deletes (e.g. a whole gym) fire these per row too.
+SYNCED_MODELS = {
+    Membership: 'memberships',
+    Notice: 'notices',
+    MembershipPlan: 'plans',
+    Attendance: 'attendance',
+}
+
+
+def record_sync_tombstone(sender, instance, **kwargs):
+    sync.record_deletion(SYNCED_MODELS[sender], instance)
+
+
+for model in SYNCED_MODELS:
+    post_delete.connect(record_sync_tombstone, sender=model, dispatch_uid=f'sync_tombstone_{model.__name__}')
@@ -0,0 +1,231 @@
+"""
+Delta sync: everything that changed for a user since a cursor.
+
+A cursor is an opaque string encoding a point in time. Each call returns the
+rows of every resource whose change timestamp falls in ``(since, until]``,
+the ids deleted in that window (from ``SyncTombstone``), and ``until`` as the
+next cursor. Without a cursor the response is a full snapshot.
+
+``until`` trails the clock by ``SYNC_SETTLE_SECONDS`` so rows stamped just
+before a slow transaction commits are not skipped. Large windows are cut into
+pages of about ``SYNC_PAGE_SIZE`` rows per resource; ``has_more`` tells the
+client to call again with the returned cursor straight away.
+
+Rows are sent whole, so clients simply upsert by id. A page boundary may send
+a row twice, never zero times. When a member's membership changes, the
+notices and plans of that gym are resent in full, since rows that predate the
+cursor may only now be in scope. When the change takes the gym out of scope
+(the membership is rejected, expires or is deleted), their ids are sent as
+deleted instead.
+"""
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from .fast_serializers import AttendanceValuesSerializer, MembershipValuesSerializer, NoticeValuesSerializer
+from .models import Attendance, Membership, MembershipPlan, Notice, SyncTombstone
+from .serializers import MembershipPlanSerializer
+
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+ONE_TICK = timedelta(microseconds=1)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(moment):
+    return str((moment - EPOCH) // ONE_TICK)
+
+
+def decode_cursor(cursor):
+    try:
+        return EPOCH + int(cursor) * ONE_TICK
+    except (TypeError, ValueError, OverflowError):
+        raise InvalidCursor('Malformed sync cursor')
+
+
+def _member_gym_ids(user, status=None):
+    memberships = Membership.objects.filter(member=user)
+    if status:
+        memberships = memberships.filter(status=status)
+    return memberships.values('gym_id')
+
+
+def _memberships(user):
+    if user.user_type == 'member':
+        return Membership.objects.filter(member=user)
+    if user.user_type == 'gym_owner':
+        return Membership.objects.filter(gym__owner=user)
+    return Membership.objects.all()
+
+
+def _notices(user):
+    # Inactive, scheduled and expired notices are synced too: the client shows a
+    # notice from is_active, publish_at and expire_at, which change without an update.
+    if user.user_type == 'member':
+        return Notice.objects.filter(gym_id__in=_member_gym_ids(user, 'approved'))
+    if user.user_type == 'gym_owner':
+        return Notice.objects.filter(gym__owner=user)
+    return Notice.objects.all()
+
+
+def _plans(user):
+    if user.user_type == 'member':
+        return MembershipPlan.objects.filter(gym_id__in=_member_gym_ids(user))
+    if user.user_type == 'gym_owner':
+        return MembershipPlan.objects.filter(gym__owner=user)
+    return MembershipPlan.objects.all()
+
+
+def _attendance(user):
+    if user.user_type == 'member':
+        return Attendance.objects.filter(member=user)
+    if user.user_type == 'gym_owner':
+        return Attendance.objects.filter(gym__owner=user)
+    return Attendance.objects.all()
+
+
+def _tombstones(user):
+    if user.user_type == 'member':
+        return SyncTombstone.objects.filter(
+            Q(resource__in=['memberships', 'attendance'], member_id=user.id)
+            | Q(resource__in=['notices', 'plans'], gym_id__in=_member_gym_ids(user))
+        )
+    if user.user_type == 'gym_owner':
+        return SyncTombstone.objects.filter(gym_id__in=user.gyms.values('id'))
+    return SyncTombstone.objects.all()
+
+
+def _dropped_gyms(user, since, until, status=None):
+    """Gyms whose membership changed or was deleted in ``(since, until]`` and no longer has one (with ``status``)."""
+    changed = Membership.objects.filter(member=user, updated_at__gt=since, updated_at__lte=until).values_list('gym_id', flat=True)
+    removed = SyncTombstone.objects.filter(
+        resource='memberships', member_id=user.id, deleted_at__gt=since, deleted_at__lte=until
+    ).values_list('gym_id', flat=True)
+    in_scope = _member_gym_ids(user, status).values_list('gym_id', flat=True)
+    return set(changed).union(removed).difference(in_scope)
+
+
+def _plan_rows(queryset):
+    return MembershipPlanSerializer(queryset.select_related('gym'), many=True).data
+
+
+# name -> (scope, change timestamp field, serializer); attendance rows are synced as created
+# (their only later change, checked_out_at, is not part of the synced row).
+RESOURCES = {
+    'memberships': (_memberships, 'updated_at', lambda queryset: MembershipValuesSerializer(queryset).data),
+    'notices': (_notices, 'updated_at', lambda queryset: NoticeValuesSerializer(queryset).data),
+    'plans': (_plans, 'updated_at', _plan_rows),
+    'attendance': (_attendance, 'created_at', lambda queryset: AttendanceValuesSerializer(queryset).data),
+}
+
+
+def _window(queryset, field, since, until, resend=None):
+    in_window = Q(**{f'{field}__lte': until})
+    if since is not None:
+        changed = Q(**{f'{field}__gt': since})
+        if resend is not None:
+            changed |= resend
+        in_window &= changed
+    else:
+        # Rows saved before the timestamp column existed only show up in the initial snapshot.
+        in_window |= Q(**{f'{field}__isnull': True})
+    return queryset.filter(in_window)
+
+
+def _page_end(queryset, field, since, until, limit):
+    """Latest timestamp that keeps this resource's page within ``limit`` rows."""
+    first_left_out = (
+        _window(queryset, field, since, until)
+        .filter(**{f'{field}__isnull': False})
+        .order_by(field, 'id')
+        .values_list(field, flat=True)[limit:limit + 1]
+    )
+    first_left_out = next(iter(first_left_out), None)
+    if first_left_out is None:
+        return until
+    end = first_left_out - ONE_TICK
+    if since is not None and end <= since:
+        # More than ``limit`` rows share one timestamp; send them all rather than stall.
+        return first_left_out
+    return end
+
+
+def changes(user, cursor=None):
+    now = timezone.now()
+    until = now - timedelta(seconds=getattr(settings, 'SYNC_SETTLE_SECONDS', 5))
+    limit = getattr(settings, 'SYNC_PAGE_SIZE', 500)
+    since = decode_cursor(cursor) if cursor else None
+
+    # Deletions older than the tombstone retention are gone, so an older cursor needs a fresh snapshot.
+    retention = timedelta(days=getattr(settings, 'SYNC_TOMBSTONE_DAYS', 30))
+    reset = since is not None and since < now - retention
+    if reset:
+        since = None
+
+    if since is not None and since >= until:
+        return {
+            'cursor': encode_cursor(since),
+            'has_more': False,
+            'reset': False,
+            **{name: {'updated': [], 'deleted': []} for name in RESOURCES},
+        }
+
+    scoped = {name: (scope(user), field, serialize) for name, (scope, field, serialize) in RESOURCES.items()}
+    tombstones = _tombstones(user)
+
+    page_ends = [_page_end(queryset, field, since, until, limit) for queryset, field, _ in scoped.values()]
+    if since is not None:
+        page_ends.append(_page_end(tombstones, 'deleted_at', since, until, limit))
+    page_end = min(page_ends)
+
+    deleted = {name: [] for name in RESOURCES}
+    if since is not None:
+        for resource, object_id in _window(tombstones, 'deleted_at', since, page_end).values_list('resource', 'object_id'):
+            deleted[resource].append(object_id)
+
+    resend = {}
+    if since is not None and user.user_type == 'member':
+        rejoined = Membership.objects.filter(member=user, updated_at__gt=since, updated_at__lte=page_end).values('gym_id')
+        resend = {'notices': Q(gym_id__in=rejoined), 'plans': Q(gym_id__in=rejoined)}
+        # Rows of a gym that left the member's scope no longer change for them; tell the client to drop them.
+        for name, model, status in (('notices', Notice, 'approved'), ('plans', MembershipPlan, None)):
+            dropped = _dropped_gyms(user, since, page_end, status)
+            if dropped:
+                deleted[name].extend(model.objects.filter(gym_id__in=dropped).values_list('id', flat=True))
+                # Rows deleted along with the membership (a cascade) left no tombstone in scope.
+                deleted[name].extend(
+                    _window(SyncTombstone.objects.filter(resource=name, gym_id__in=dropped), 'deleted_at', since, page_end)
+                    .exclude(object_id__in=deleted[name])
+                    .values_list('object_id', flat=True)
+                )
+
+    response = {
+        'cursor': encode_cursor(page_end),
+        'has_more': page_end < until,
+        'reset': reset,
+    }
+    for name, (queryset, field, serialize) in scoped.items():
+        rows = _window(queryset, field, since, page_end, resend.get(name)).order_by(field, 'id')
+        response[name] = {'updated': serialize(rows), 'deleted': deleted[name]}
+    return response
+
+
+def record_deletion(resource, instance):
+    SyncTombstone.objects.create(
+        resource=resource,
+        object_id=instance.pk,
+        gym_id=instance.gym_id,
+        member_id=getattr(instance, 'member_id', None),
+    )
+
+
+def prune_tombstones(now=None):
+    now = now or timezone.now()
+    cutoff = now - timedelta(days=getattr(settings, 'SYNC_TOMBSTONE_DAYS', 30))
+    deleted, _ = SyncTombstone.objects.filter(deleted_at__lt=cutoff).delete()
+    return deleted
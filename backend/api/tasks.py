@@ -0,0 +1,184 @@
+"""
+Lightweight DB-backed task queue: no broker, just the ``Task`` table.
+
+Register work with ``@task`` and enqueue it from anywhere::
+
+    @task(max_attempts=3)
+    def warm_cache(gym_id):
+        ...
+
+    warm_cache.enqueue(gym_id)          # or enqueue('<module>.warm_cache', args=[gym_id])
+
+Enqueuing inside a transaction commits the task together with the data it
+refers to, or not at all. ``manage.py run_worker`` claims due tasks and runs
+them on a thread or process pool.
+
+* Claiming marks a batch ``running`` with a lock token and a visibility
+  timeout (``locked_until``). Postgres skips rows other workers hold with
+  SKIP LOCKED; elsewhere the claim UPDATE re-checks the condition, so two
+  workers never claim the same task.
+* A worker that dies leaves its tasks ``running``; once ``locked_until``
+  passes they are claimed again. Tasks must therefore be idempotent.
+* A task that raises is retried after ``TASK_RETRY_BACKOFF_SECONDS * 2**(attempt-1)``
+  (capped at ``TASK_RETRY_BACKOFF_MAX_SECONDS``, with jitter) until it has used
+  ``max_attempts``, then marked ``failed`` with the traceback in ``last_error``.
+* Results are written only while the worker still holds the lock token, so a
+  worker that overran its timeout cannot overwrite a newer attempt.
+"""
+
+from contextlib import nullcontext
+from datetime import timedelta
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+import logging
+import random
+import traceback
+import uuid
+
+from .models import Task
+
+
+logger = logging.getLogger(__name__)
+
+REGISTRY = {}
+
+
+class TaskSpec:
+    def __init__(self, func, max_attempts=None, timeout=None):
+        self.func = func
+        self.max_attempts = max_attempts
+        self.timeout = timeout
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def task(name=None, max_attempts=None, timeout=None):
+    """Register a function as a task. ``timeout`` (seconds) overrides TASK_VISIBILITY_TIMEOUT."""
+    def register(func):
+        task_name = name or f'{func.__module__}.{func.__name__}'
+        REGISTRY[task_name] = TaskSpec(func, max_attempts, timeout)
+        func.task_name = task_name
+        func.enqueue = lambda *args, **kwargs: enqueue(task_name, args=args, kwargs=kwargs)
+        return func
+    return register
+
+
+def enqueue(name, args=(), kwargs=None, delay=None, run_at=None, max_attempts=None):
+    """Queue a registered task. ``args``/``kwargs`` must be JSON serializable."""
+    if name not in REGISTRY:
+        raise KeyError(f'Unknown task {name!r}')
+    spec = REGISTRY[name]
+    if run_at is None:
+        run_at = timezone.now() + timedelta(seconds=delay or 0)
+    return Task.objects.create(
+        name=name,
+        args=list(args),
+        kwargs=kwargs or {},
+        run_at=run_at,
+        max_attempts=max_attempts or spec.max_attempts or _setting('TASK_MAX_ATTEMPTS', 5),
+    )
+
+
+def _claimable(now):
+    return Task.objects.filter(
+        Q(status='queued', run_at__lte=now)
+        | Q(status='running', locked_until__lt=now)
+    )
+
+
+def claim(worker, limit):
+    """Claim up to ``limit`` due tasks for ``worker``; returns ``[(task_id, lock_token)]``."""
+    now = timezone.now()
+    token = uuid.uuid4().hex
+    skip_locked = connection.features.has_select_for_update_skip_locked
+    # Without SKIP LOCKED the SELECT stays outside a transaction: SQLite cannot upgrade a
+    # read lock to a write lock while another worker writes, and fails instead of waiting.
+    with transaction.atomic() if skip_locked else nullcontext():
+        candidates = _claimable(now).order_by('run_at', 'id')
+        if skip_locked:
+            candidates = candidates.select_for_update(skip_locked=True)
+        ids = list(candidates.values_list('id', flat=True)[:limit])
+        if not ids:
+            return []
+        _claimable(now).filter(id__in=ids).update(
+            status='running',
+            attempts=F('attempts') + 1,
+            locked_until=now + timedelta(seconds=_setting('TASK_VISIBILITY_TIMEOUT', 300)),
+            locked_by=worker,
+            lock_token=token,
+            updated_at=now,
+        )
+    return [(task_id, token) for task_id in Task.objects.filter(id__in=ids, lock_token=token).values_list('id', flat=True)]
+
+
+def backoff(attempt):
+    base = _setting('TASK_RETRY_BACKOFF_SECONDS', 10)
+    delay = min(base * 2 ** (attempt - 1), _setting('TASK_RETRY_BACKOFF_MAX_SECONDS', 3600))
+    # Jitter spreads out retries of tasks that failed together (e.g. a database blip).
+    return delay * random.uniform(0.8, 1.2)
+
+
+def _finish(task_id, token, **fields):
+    now = timezone.now()
+    return Task.objects.filter(id=task_id, lock_token=token, status='running').update(
+        locked_until=None, lock_token='', updated_at=now, **fields
+    )
+
+
+def execute(task_id, token):
+    """Run one claimed task; safe to call from a worker thread or a child process."""
+    close_old_connections()
+    try:
+        task = Task.objects.filter(id=task_id, lock_token=token, status='running').first()
+        if task is None:
+            return 'lost'
+
+        spec = REGISTRY.get(task.name)
+        if spec is None:
+            _finish(task_id, token, status='failed', finished_at=timezone.now(), last_error=f'Unknown task {task.name!r}')
+            logger.error('Unknown task', extra={'task_id': task_id, 'task': task.name})
+            return 'failed'
+
+        if task.attempts > task.max_attempts:
+            # Every attempt so far ran past its visibility timeout without finishing.
+            _finish(task_id, token, status='failed', finished_at=timezone.now(), last_error='Timed out on every attempt')
+            logger.error('Task timed out on every attempt', extra={'task_id': task_id, 'task': task.name})
+            return 'failed'
+
+        if spec.timeout:
+            Task.objects.filter(id=task_id, lock_token=token).update(
+                locked_until=timezone.now() + timedelta(seconds=spec.timeout)
+            )
+
+        try:
+            spec.func(*task.args, **task.kwargs)
+        except Exception:
+            error = traceback.format_exc()
+            if task.attempts >= task.max_attempts:
+                _finish(task_id, token, status='failed', finished_at=timezone.now(), last_error=error)
+                logger.exception('Task failed permanently', extra={'task_id': task_id, 'task': task.name, 'attempts': task.attempts})
+                return 'failed'
+            _finish(
+                task_id, token,
+                status='queued',
+                run_at=timezone.now() + timedelta(seconds=backoff(task.attempts)),
+                last_error=error,
+            )
+            logger.warning('Task failed, will retry', extra={'task_id': task_id, 'task': task.name, 'attempts': task.attempts})
+            return 'retry'
+
+        _finish(task_id, token, status='succeeded', finished_at=timezone.now(), last_error='')
+        logger.info('Task succeeded', extra={'task_id': task_id, 'task': task.name, 'attempts': task.attempts})
+        return 'succeeded'
+    finally:
+        close_old_connections()
+
+
+def prune_finished(older_than):
+    """Delete succeeded tasks finished before ``older_than``; failed ones are kept for inspection."""
+    deleted, _ = Task.objects.filter(status='succeeded', finished_at__lt=older_than).delete()
+    return deleted
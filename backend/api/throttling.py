@@ -0,0 +1,201 @@
+"""
+Sliding-window rate limits for expensive endpoints.
+
+A view opts in with ``throttle_scope`` and the throttles it wants::
+
+    class LoginView(APIView):
+        throttle_scope = 'login'
+        throttle_classes = [IPRateThrottle, UsernameRateThrottle]
+
+Each throttle reads its rate from ``REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']``
+under ``'<scope>.<kind>'`` (``'login.ip': '30/min'``); a scope without a rate
+for that kind is not limited. Rates use DRF's ``<requests>/<s|min|hour|day>``.
+
+Requests are counted per fixed window in the cache and the previous window's
+count is weighted by how much of it still overlaps the sliding window, which
+needs two keys per client instead of a timestamp list. A view's throttles
+are checked together: the request is counted against all of them only when
+none blocks it, so blocked requests use up no quota. Counting uses
+``cache.add`` and ``cache.incr`` only, so limits hold across workers on a
+shared cache with atomic increments (Redis, Memcached; the system checks warn
+about any other). Blocked requests get 429 with a ``Retry-After`` header from
+DRF. Retries that an ``@idempotent`` view will replay from their
+Idempotency-Key are not counted (see api/idempotency.py).
+"""
+
+from django.core.cache import caches
+from django.conf import settings
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+import hashlib
+import math
+import time
+
+from .idempotency import answers_from_key
+
+
+def _cache():
+    return caches[getattr(settings, 'THROTTLE_CACHE', 'default')]
+
+
+def _incr(cache, key, window):
+    # Kept for two windows: the next window still weighs this one.
+    cache.add(key, 0, 2 * window)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Evicted between add and incr.
+        cache.add(key, 0, 2 * window)
+        return cache.incr(key)
+
+
+def _decr(cache, key):
+    try:
+        cache.decr(key)
+    except ValueError:
+        pass
+
+
+def parse_rate(rate):
+    """``'5/min'`` -> ``(5, 60)``; ``None`` means unlimited."""
+    if rate is None:
+        return None
+    num, period = rate.split('/')
+    return int(num), {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}[period[0]]
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    kind = None
+
+    def get_ident_for(self, request, view):
+        """The client this throttle counts, or ``None`` to let the request through."""
+        raise NotImplementedError
+
+    def get_rate(self, view):
+        scope = getattr(view, 'throttle_scope', None)
+        if not scope:
+            return None
+        return api_settings.DEFAULT_THROTTLE_RATES.get(f'{scope}.{self.kind}')
+
+    def counter_for(self, request, view):
+        """``(limit, window, key prefix)`` when this throttle counts the request, else ``None``."""
+        rate = parse_rate(self.get_rate(view))
+        if rate is None:
+            return None
+        ident = self.get_ident_for(request, view)
+        if ident is None:
+            return None
+        limit, window = rate
+        return limit, window, f'throttle:{view.throttle_scope}.{self.kind}:{ident}'
+
+    def allow_request(self, request, view):
+        # DRF asks each throttle in turn. The first one asked decides for all of the view's
+        # sliding-window throttles at once, and the others read its verdict.
+        verdicts = getattr(request, '_sliding_window_verdicts', None)
+        if verdicts is None:
+            verdicts = _verdicts(request, view)
+            request._sliding_window_verdicts = verdicts
+        self.retry_after = verdicts.get(self.kind)
+        return self.retry_after is None
+
+    @staticmethod
+    def _retry_after(limit, window, previous, count, elapsed):
+        """Seconds until one more request fits in the sliding window."""
+        room = limit - count - 1
+        if room >= 0 and previous:
+            # Fits later in this window, once enough of the previous window has slid out.
+            fraction = 1 - room / previous
+        else:
+            # Only fits in the next window, where this window's count becomes the weighted one.
+            fraction = 1 + (1 - (limit - 1) / count if count > limit - 1 else 0)
+        return max(1, math.ceil((fraction - elapsed) * window))
+
+    def wait(self):
+        return self.retry_after
+
+
+def _verdicts(request, view):
+    """
+    ``{kind: retry_after}`` for the view's sliding-window throttles that block
+    the request. When none does, the request is counted against all of them.
+    """
+    limits = []
+    for throttle in view.get_throttles():
+        if isinstance(throttle, SlidingWindowThrottle):
+            limit = throttle.counter_for(request, view)
+            if limit is not None:
+                limits.append((throttle, *limit))
+    # DRF throttles before the view's @idempotent replay; a retry that is answered from its key runs nothing.
+    if not limits or answers_from_key(request, view):
+        return {}
+
+    cache = _cache()
+    now = time.time()
+    windows = []
+    for throttle, limit, window, prefix in limits:
+        current = int(now // window)
+        windows.append((
+            throttle, limit, window, f'{prefix}:{current}',
+            cache.get(f'{prefix}:{current - 1}', 0), now / window - current,
+        ))
+
+    # Every limit is checked before the request is counted against any, so a
+    # request that one throttle blocks uses none of the others' quota.
+    blocked = {}
+    for throttle, limit, window, key, previous, elapsed in windows:
+        count = cache.get(key, 0)
+        if previous * (1 - elapsed) + count + 1 > limit:
+            blocked[throttle.kind] = throttle._retry_after(limit, window, previous, count, elapsed)
+    if blocked:
+        return blocked
+
+    # Other workers may have counted requests since: if one limit is now over,
+    # the request is taken back from every counter it was added to.
+    counted = []
+    for throttle, limit, window, key, previous, elapsed in windows:
+        count = _incr(cache, key, window)
+        counted.append(key)
+        if previous * (1 - elapsed) + count > limit:
+            blocked[throttle.kind] = throttle._retry_after(limit, window, previous, count - 1, elapsed)
+            break
+    if blocked:
+        for key in counted:
+            _decr(cache, key)
+    return blocked
+
+
+class UserRateThrottle(SlidingWindowThrottle):
+    """Per authenticated user; anonymous clients are counted by IP address."""
+    kind = 'user'
+
+    def get_ident_for(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return request.user.pk
+        return f'ip-{self.get_ident(request)}'
+
+
+class IPRateThrottle(SlidingWindowThrottle):
+    kind = 'ip'
+
+    def get_ident_for(self, request, view):
+        return self.get_ident(request)
+
+
+class UsernameRateThrottle(SlidingWindowThrottle):
+    """Per username tried, so one account cannot be guessed at from many addresses."""
+    kind = 'username'
+
+    def get_ident_for(self, request, view):
+        username = request.data.get('username') if hasattr(request.data, 'get') else None
+        if not isinstance(username, str) or not username:
+            return None
+        # Hashed: usernames may contain characters that are not valid in cache keys.
+        return hashlib.sha1(username.strip().lower().encode()).hexdigest()
+
+
+class GymRateThrottle(SlidingWindowThrottle):
+    """Per gym in the URL, shared by everyone hitting that gym."""
+    kind = 'gym'
+
+    def get_ident_for(self, request, view):
+        return view.kwargs.get('gym_id')
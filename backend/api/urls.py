@@ -9,9 +9,13 @@ urlpatterns = [
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('profile/', views.UserProfileView.as_view(), name='user-profile'),
     path('profile/update/', views.UserProfileUpdateView.as_view(), name='user-profile-update'),
+    path('home/', views.MemberHomeView.as_view(), name='member-home'),
 
     path('gyms/', views.GymListView.as_view(), name='gym-list'),
+    path('gyms/search/', views.GymSearchView.as_view(), name='gym-search'),
+    path('gyms/nearby/', views.NearbyGymsView.as_view(), name='gym-nearby'),
     path('gyms/my/', views.GymOwnerListView.as_view(), name='gym-owner-list'),
+    path('gyms/my/dashboard/', views.OwnerDashboardView.as_view(), name='owner-dashboard'),
     path('gyms/create/', views.GymCreateView.as_view(), name='gym-create'),
     path('gyms/<int:pk>/', views.GymDetailView.as_view(), name='gym-detail'),
     path('gyms/<int:pk>/update/', views.GymUpdateView.as_view(), name='gym-update'),
@@ -19,10 +23,27 @@ urlpatterns = [
     # Gym attendance endpoints (for frontend compatibility)
     path('gyms/<int:gym_id>/attendance/stats/', views.MemberAttendanceStatsView.as_view(), name='member-attendance-stats-alt'),
     path('gyms/<int:gym_id>/attendance/leaderboard/', views.GymLeaderboardView.as_view(), name='gym-leaderboard-alt'),
+    path('gyms/<int:gym_id>/attendance/leaderboard/me/', views.GymLeaderboardRankView.as_view(), name='gym-leaderboard-rank'),
     path('gyms/<int:gym_id>/attendance/mark/', views.MarkAttendanceView.as_view(), name='mark-attendance-alt'),
+    path('gyms/<int:gym_id>/attendance/check-out/', views.CheckOutView.as_view(), name='attendance-check-out'),
+    path('gyms/<int:gym_id>/occupancy/', views.GymOccupancyView.as_view(), name='gym-occupancy'),
+    path('gyms/<int:gym_id>/occupancy/history/', views.GymOccupancyHistoryView.as_view(), name='gym-occupancy-history'),
+    path('gyms/<int:gym_id>/attendance/pass/', views.CheckinPassView.as_view(), name='checkin-pass'),
+    path('gyms/<int:gym_id>/kiosk/keys/', views.KioskKeysView.as_view(), name='kiosk-keys'),
+    path('gyms/<int:gym_id>/kiosk/scans/', views.KioskScanUploadView.as_view(), name='kiosk-scans'),
     path('gyms/<int:gym_id>/attendance/check-today/', views.CheckTodayAttendanceView.as_view(), name='check-today-attendance'),
     path('gyms/<int:gym_id>/attendance/history/', views.AttendanceHistoryView.as_view(), name='attendance-history'),
+    path('gyms/<int:gym_id>/attendance/heatmap/', views.AttendanceHeatmapView.as_view(), name='attendance-heatmap'),
     path('gyms/<int:gym_id>/attendance/analytics/', views.GymAttendanceStatsView.as_view(), name='gym-attendance-analytics-alt'),
+    path('gyms/<int:gym_id>/attendance/trends/', views.GymAttendanceTrendsView.as_view(), name='gym-attendance-trends'),
+    path('gyms/<int:gym_id>/analytics/cohorts/', views.GymCohortRetentionView.as_view(), name='gym-cohort-retention'),
+    path('gyms/<int:gym_id>/analytics/at-risk/', views.GymAtRiskMembersView.as_view(), name='gym-at-risk-members'),
+
+    path('gyms/<int:gym_id>/classes/', views.ClassSessionListCreateView.as_view(), name='class-session-list'),
+    path('classes/<int:pk>/update/', views.ClassSessionUpdateView.as_view(), name='class-session-update'),
+    path('classes/<int:pk>/book/', views.ClassBookView.as_view(), name='class-book'),
+    path('classes/<int:pk>/cancel/', views.ClassCancelBookingView.as_view(), name='class-cancel-booking'),
+    path('classes/<int:pk>/bookings/', views.ClassBookingListView.as_view(), name='class-bookings'),
 
     path('gyms/<int:gym_id>/plans/', views.MembershipPlanListView.as_view(), name='membership-plan-list'),
     path('gyms/<int:gym_id>/plans/create/', views.MembershipPlanCreateView.as_view(), name='membership-plan-create'),
@@ -35,6 +56,7 @@ urlpatterns = [
     path('membership-requests/<int:pk>/approve/', views.MembershipApproveView.as_view(), name='membership-approve'),
     path('membership-requests/<int:pk>/reject/', views.MembershipRejectView.as_view(), name='membership-reject'),
     path('memberships/', views.MembershipListView.as_view(), name='membership-list'),
+    path('memberships/bulk-decision/', views.MembershipBulkDecisionView.as_view(), name='membership-bulk-decision'),
     path('memberships/<int:pk>/approve/', views.MembershipApproveView.as_view(), name='membership-approve-alt'),
     path('memberships/<int:pk>/reject/', views.MembershipRejectView.as_view(), name='membership-reject-alt'),
     path('memberships/<int:pk>/terminate/', views.MembershipTerminateView.as_view(), name='membership-terminate'),
@@ -50,6 +72,8 @@ urlpatterns = [
 
     path('admin/gyms/pending/', views.AdminPendingGymsView.as_view(), name='admin-pending-gyms'),
     path('admin/gyms/all/', views.AdminAllGymsView.as_view(), name='admin-all-gyms'),
+    path('admin/gyms/review-queue/', views.AdminReviewQueueView.as_view(), name='admin-review-queue'),
+    path('admin/gyms/bulk-review/', views.AdminBulkReviewGymsView.as_view(), name='admin-bulk-review-gyms'),
     path('admin/gyms/<int:gym_id>/approve/', views.AdminApproveGymView.as_view(), name='admin-approve-gym'),
     path('admin/gyms/<int:gym_id>/reject/', views.AdminRejectGymView.as_view(), name='admin-reject-gym'),
     path('admin/approval-stats/', views.AdminApprovalStatsView.as_view(), name='admin-approval-stats'),
@@ -57,8 +81,18 @@ urlpatterns = [
     # Notice endpoints
     path('notices/', views.NoticeListView.as_view(), name='notice-list'),
     path('notices/create/', views.NoticeCreateView.as_view(), name='notice-create'),
+    path('notices/feed/', views.NoticeFeedView.as_view(), name='notice-feed'),
+    path('notices/unread-count/', views.NoticeUnreadCountView.as_view(), name='notice-unread-count'),
+    path('notices/mark-read/', views.NoticeMarkReadView.as_view(), name='notice-mark-read'),
     path('notices/<int:notice_id>/', views.NoticeDetailView.as_view(), name='notice-detail'),
 
+    # Delta sync (?cursor=<cursor from the previous response>)
+    path('sync/', views.SyncView.as_view(), name='sync'),
+
+    # Export endpoints (?start=YYYY-MM-DD&end=YYYY-MM-DD&gym=<id>)
+    path('exports/attendance.<str:export_format>', views.AttendanceExportView.as_view(), name='attendance-export'),
+    path('exports/memberships.<str:export_format>', views.MembershipExportView.as_view(), name='membership-export'),
+
     # Exercise routine endpoints
     path('exercise-routines/', views.ExerciseRoutineListView.as_view(), name='exercise-routine-list'),
     path('exercise-routines/create/', views.ExerciseRoutineCreateView.as_view(), name='exercise-routine-create'),
@@ -7,27 +7,59 @@ from django.contrib.auth import login, logout
 from django.shortcuts import get_object_or_404
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
+from django.utils import timezone
 from datetime import date, timedelta
-from django.db.models import Count, Q, Avg
-from .models import User, Gym, MembershipPlan, Membership, Attendance, Notice, ExerciseRoutine
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Avg
+from .models import (
+    User, Gym, MembershipPlan, Membership, Attendance, AttendanceDailyRollup, AttendanceBitmap,
+    MemberRiskScore, Notice, ExerciseRoutine, ClassSession, ClassBooking
+)
 from .serializers import (
     UserSerializer, UserRegistrationSerializer, UserLoginSerializer,
     GymSerializer, MembershipPlanSerializer, MembershipSerializer,
     AttendanceSerializer, NoticeSerializer, ExerciseRoutineSerializer,
-    AttendanceStatsSerializer, LeaderboardEntrySerializer, GymAttendanceStatsSerializer
+    AttendanceStatsSerializer, LeaderboardEntrySerializer, GymAttendanceStatsSerializer,
+    KioskScanBatchSerializer, ClassSessionSerializer, ClassBookingSerializer
+)
+from .fast_serializers import (
+    MembershipValuesSerializer, AttendanceValuesSerializer, NoticeValuesSerializer, full_name
 )
+from . import exports
+from . import attendance_bits
+from . import cohorts
+from .caching import invalidate_gym_caches
+from . import reviews
+from . import search
+from . import geo
+from . import sync
+from . import home
+from . import dashboard
+from . import notices as notice_feed
+from . import checkin_passes
+from . import occupancy
+from . import bookings
+from .leaderboard import PERIODS as LEADERBOARD_PERIODS, gym_leaderboard, member_rank
+from .idempotency import idempotent
+from .throttling import GymRateThrottle, IPRateThrottle, UserRateThrottle, UsernameRateThrottle
 from rest_framework.permissions import IsAuthenticated
 from django.conf import settings
 import json
+import logging
 import requests
 
 
+logger = logging.getLogger(__name__)
+
+
 @method_decorator(csrf_exempt, name='dispatch')
 class RegisterView(APIView):
     permission_classes = [permissions.AllowAny]
+    throttle_scope = 'register'
+    throttle_classes = [IPRateThrottle]
     
     def post(self, request):
-        print(f"Registration attempt - Data received: {request.data}")
+        logger.debug('Registration attempt', extra={'payload': request.data})
         
         serializer = UserRegistrationSerializer(data=request.data)
         if serializer.is_valid():
@@ -42,17 +74,18 @@ class RegisterView(APIView):
                 }
             }, status=status.HTTP_201_CREATED)
         else:
-            print(f"Registration serializer errors: {serializer.errors}")
+            logger.info('Registration rejected', extra={'errors': serializer.errors})
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
 @method_decorator(csrf_exempt, name='dispatch')
 class LoginView(APIView):
     permission_classes = [permissions.AllowAny]
+    throttle_scope = 'login'
+    throttle_classes = [IPRateThrottle, UsernameRateThrottle]
     
     def post(self, request):
-        print(f"Login attempt - Data received: {request.data}")
-        print(f"Content-Type: {request.content_type}")
+        logger.debug('Login attempt', extra={'payload': request.data, 'content_type': request.content_type})
         
         serializer = UserLoginSerializer(data=request.data)
         if serializer.is_valid():
@@ -67,7 +100,7 @@ class LoginView(APIView):
                 }
             })
         else:
-            print(f"Serializer errors: {serializer.errors}")
+            logger.info('Login rejected', extra={'errors': serializer.errors})
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
@@ -114,6 +147,76 @@ class GymListView(generics.ListAPIView):
         return Gym.objects.filter(status='approved')
 
 
+class GymSearchView(APIView):
+    """Ranked full-text search over approved gyms: ?q=&page=&page_size="""
+    permission_classes = [permissions.AllowAny]
+    
+    MAX_PAGE_SIZE = 50
+    
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({'error': 'Please provide a search query with ?q='}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            page = max(int(request.query_params.get('page', 1)), 1)
+            page_size = min(max(int(request.query_params.get('page_size', 20)), 1), self.MAX_PAGE_SIZE)
+        except ValueError:
+            return Response({'error': 'page and page_size must be numbers'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        total, ranked = search.search_gyms(query, limit=page_size, offset=(page - 1) * page_size)
+        gyms = [gym for gym, _ in ranked]
+        results = GymSerializer(gyms, many=True).data
+        for result, (_, score) in zip(results, ranked):
+            result['score'] = round(score, 4) if score is not None else None
+        
+        return Response({
+            'query': query,
+            'count': total,
+            'page': page,
+            'page_size': page_size,
+            'results': results,
+        })
+
+
+class NearbyGymsView(APIView):
+    """Approved gyms nearest to ?lat=&lng=, within ?radius_km= (default 10), up to ?limit="""
+    permission_classes = [permissions.AllowAny]
+    
+    MAX_RADIUS_KM = 100
+    MAX_LIMIT = 100
+    
+    def get(self, request):
+        try:
+            latitude = float(request.query_params['lat'])
+            longitude = float(request.query_params['lng'])
+            radius_km = float(request.query_params.get('radius_km', 10))
+            limit = int(request.query_params.get('limit', 20))
+        except KeyError:
+            return Response({'error': 'lat and lng are required'}, status=status.HTTP_400_BAD_REQUEST)
+        except ValueError:
+            return Response({'error': 'lat, lng, radius_km and limit must be numbers'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            return Response({'error': 'lat must be within [-90, 90] and lng within [-180, 180]'}, status=status.HTTP_400_BAD_REQUEST)
+        if not 0 < radius_km <= self.MAX_RADIUS_KM:
+            return Response({'error': f'radius_km must be between 0 and {self.MAX_RADIUS_KM}'}, status=status.HTTP_400_BAD_REQUEST)
+        limit = min(max(limit, 1), self.MAX_LIMIT)
+        
+        total, nearest = geo.nearest_gyms(latitude, longitude, radius_km=radius_km, limit=limit)
+        gyms = Gym.objects.select_related('owner').in_bulk([gym_id for gym_id, _ in nearest])
+        results = []
+        for gym_id, distance in nearest:
+            data = GymSerializer(gyms[gym_id]).data
+            data['distance_km'] = round(distance, 3)
+            results.append(data)
+        
+        return Response({
+            'count': total,
+            'radius_km': radius_km,
+            'results': results,
+        })
+
+
 class GymOwnerListView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     
@@ -127,7 +230,18 @@ class GymOwnerListView(APIView):
         return Response(serializer.data)
 
 
+class OwnerDashboardView(APIView):
+    """Owner's gyms with SQL-annotated counters, plan-wise member distribution and pending requests."""
+    
+    def get(self, request):
+        if request.user.user_type != 'gym_owner':
+            return Response({'error': 'Sorry, this section is only for gym owners.'}, status=status.HTTP_403_FORBIDDEN)
+        
+        return Response(dashboard.owner_dashboard(request.user))
+
+
 class GymCreateView(APIView):
+    @idempotent
     def post(self, request):
         if request.user.user_type != 'gym_owner':
             return Response({'error': 'Only gym owners can create gyms'}, status=status.HTTP_403_FORBIDDEN)
@@ -166,21 +280,18 @@ class GymCreateView(APIView):
                     }
                 }, status=status.HTTP_400_BAD_REQUEST)
         
-        print(f"Gym creation attempt - Data received: {request.data}")
-        print(f"User: {request.user.username} (ID: {request.user.id})")
-        print(f"User type: {request.user.user_type}")
+        logger.debug('Gym creation attempt', extra={'payload': request.data, 'user_id': request.user.id})
         
         serializer = GymSerializer(data=request.data)
         if serializer.is_valid():
-            print("Serializer is valid, creating gym...")
             gym = serializer.save(owner=request.user)
-            print(f"Gym created successfully: {gym.name} (ID: {gym.id})")
+            logger.info('Gym created', extra={'gym_id': gym.id, 'user_id': request.user.id})
             return Response({
                 'message': 'Gym created successfully and pending approval',
                 'gym': serializer.data
             }, status=status.HTTP_201_CREATED)
         else:
-            print(f"Gym serializer errors: {serializer.errors}")
+            logger.info('Gym creation rejected', extra={'errors': serializer.errors, 'user_id': request.user.id})
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
@@ -210,23 +321,19 @@ class MembershipPlanListView(APIView):
 
 
 class MembershipPlanCreateView(APIView):
+    @idempotent
     def post(self, request, gym_id):
-        print(f"Membership plan creation attempt - Gym ID: {gym_id}")
-        print(f"User: {request.user.username} (ID: {request.user.id})")
-        print(f"User type: {request.user.user_type}")
-        print(f"Data received: {request.data}")
+        logger.debug('Membership plan creation attempt', extra={'gym_id': gym_id, 'user_id': request.user.id, 'payload': request.data})
         
         gym = get_object_or_404(Gym, id=gym_id, owner=request.user)
-        print(f"Gym found: {gym.name} (ID: {gym.id})")
         
         serializer = MembershipPlanSerializer(data=request.data)
         if serializer.is_valid():
-            print("Plan serializer is valid, creating plan...")
             plan = serializer.save(gym=gym)
-            print(f"Plan created successfully: {plan.duration_months} months - ₹{plan.price}")
+            logger.info('Membership plan created', extra={'gym_id': gym.id, 'plan_id': plan.id})
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         else:
-            print(f"Plan serializer errors: {serializer.errors}")
+            logger.info('Membership plan creation rejected', extra={'gym_id': gym.id, 'errors': serializer.errors})
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
@@ -273,26 +380,22 @@ class MembershipPlanDeleteView(APIView):
 
 
 class MembershipRequestView(APIView):
+    @idempotent
     def post(self, request, gym_id, pk):
-        print(f"Membership request attempt - Gym ID: {gym_id}, Plan ID: {pk}")
-        print(f"User: {request.user.username} (ID: {request.user.id})")
-        print(f"User type: {request.user.user_type}")
+        logger.debug('Membership request attempt', extra={'gym_id': gym_id, 'plan_id': pk, 'user_id': request.user.id})
         
         if request.user.user_type != 'member':
-            print("Error: User is not a member")
             return Response({'error': 'Only members can request memberships'}, status=status.HTTP_403_FORBIDDEN)
         
         try:
             gym = get_object_or_404(Gym, id=gym_id, status='approved')
-            print(f"MembershipRequestView - Gym found: {gym.name} (ID: {gym.id})")
             
             plan = get_object_or_404(MembershipPlan, id=pk, gym=gym, is_active=True)
-            print(f"MembershipRequestView - Plan found: {plan.duration_months} months - ₹{plan.price}")
             
             # Check if membership already exists
             existing_membership = Membership.objects.filter(plan=plan, member=request.user, gym=gym).first()
             if existing_membership:
-                print(f"MembershipRequestView - Error: Membership already exists - Status: {existing_membership.status}")
+                logger.info('Duplicate membership request', extra={'membership_id': existing_membership.id, 'membership_status': existing_membership.status})
                 return Response({'error': 'You already have a membership request for this gym'}, status=status.HTTP_400_BAD_REQUEST)
             
             membership = Membership.objects.create(
@@ -301,36 +404,32 @@ class MembershipRequestView(APIView):
                 plan=plan,
                 status='pending'
             )
-            print(f"MembershipRequestView - Membership created successfully: {membership.id}")
+            logger.info('Membership requested', extra={'membership_id': membership.id})
             
             serializer = MembershipSerializer(membership)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         except Exception as e:
-            print(f"MembershipRequestView - Error in membership request: {str(e)}")
+            logger.exception('Membership request failed', extra={'gym_id': gym_id, 'plan_id': pk})
             return Response({'error': 'Failed to create membership request'}, status=status.HTTP_400_BAD_REQUEST)
 
 
 class MembershipRequestFromPlanView(APIView):
+    @idempotent
     def post(self, request, gym_id, pk):
-        print(f"Membership request from plan - Gym ID: {gym_id}, Plan ID: {pk}")
-        print(f"User: {request.user.username} (ID: {request.user.id})")
-        print(f"User type: {request.user.user_type}")
+        logger.debug('Membership request from plan attempt', extra={'gym_id': gym_id, 'plan_id': pk, 'user_id': request.user.id})
         
         if request.user.user_type != 'member':
-            print("Error: User is not a member")
             return Response({'error': 'Only members can request memberships'}, status=status.HTTP_403_FORBIDDEN)
         
         try:
             gym = get_object_or_404(Gym, id=gym_id, status='approved')
-            print(f"MembershipRequestFromPlanView - Gym found: {gym.name} (ID: {gym.id})")
             
             plan = get_object_or_404(MembershipPlan, id=pk, gym=gym, is_active=True)
-            print(f"MembershipRequestFromPlanView - Plan found: {plan.duration_months} months - ₹{plan.price}")
             
             # Check if membership already exists
             existing_membership = Membership.objects.filter(plan=plan, member=request.user, gym=gym).first()
             if existing_membership:
-                print(f"MembershipRequestFromPlanView - Error: Membership already exists - Status: {existing_membership.status}")
+                logger.info('Duplicate membership request', extra={'membership_id': existing_membership.id, 'membership_status': existing_membership.status})
                 return Response({'error': 'You already have a membership request for this gym'}, status=status.HTTP_400_BAD_REQUEST)
             
             membership = Membership.objects.create(
@@ -339,7 +438,7 @@ class MembershipRequestFromPlanView(APIView):
                 plan=plan,
                 status='pending'
             )
-            print(f"MembershipRequestFromPlanView - Membership created successfully: {membership.id}")
+            logger.info('Membership requested', extra={'membership_id': membership.id})
             
             serializer = MembershipSerializer(membership)
             return Response({
@@ -347,7 +446,7 @@ class MembershipRequestFromPlanView(APIView):
                 'membership': serializer.data
             }, status=status.HTTP_201_CREATED)
         except Exception as e:
-            print(f"MembershipRequestFromPlanView - Error in membership request: {str(e)}")
+            logger.exception('Membership request failed', extra={'gym_id': gym_id, 'plan_id': pk})
             return Response({'error': 'Failed to create membership request'}, status=status.HTTP_400_BAD_REQUEST)
 
 
@@ -360,7 +459,7 @@ class MembershipListView(APIView):
         else:
             memberships = Membership.objects.all()
         
-        serializer = MembershipSerializer(memberships, many=True)
+        serializer = MembershipValuesSerializer(memberships)
         return Response(serializer.data)
 
 
@@ -402,8 +501,92 @@ class MembershipTerminateView(APIView):
         return Response({'message': 'Membership terminated successfully'})
 
 
+class MembershipBulkDecisionView(APIView):
+    """Approve, reject or terminate many memberships in one transaction, reporting an outcome per id."""
+    
+    MAX_IDS = 1000
+    # action -> (statuses it can be applied to, resulting status)
+    ACTIONS = {
+        'approve': (['pending'], 'approved'),
+        'reject': (['pending'], 'rejected'),
+        'terminate': (['approved'], 'terminated'),
+    }
+    
+    def post(self, request):
+        if request.user.user_type != 'gym_owner':
+            return Response({'error': 'Only gym owners can decide on memberships'}, status=status.HTTP_403_FORBIDDEN)
+        
+        action = request.data.get('action')
+        ids = request.data.get('ids')
+        if action not in self.ACTIONS:
+            return Response({'error': f'action must be one of {", ".join(self.ACTIONS)}'}, status=status.HTTP_400_BAD_REQUEST)
+        if not isinstance(ids, list) or not ids:
+            return Response({'error': 'ids must be a non-empty list of membership ids'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(ids) > self.MAX_IDS:
+            return Response({'error': f'At most {self.MAX_IDS} memberships can be decided at once'}, status=status.HTTP_400_BAD_REQUEST)
+        # Strictly ints: int() would turn True, 1.9 or "1" into an id the client did not mean.
+        if not all(isinstance(membership_id, int) and not isinstance(membership_id, bool) for membership_id in ids):
+            return Response({'error': 'ids must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+        ids = list(dict.fromkeys(ids))
+        
+        allowed_statuses, new_status = self.ACTIONS[action]
+        today = date.today()
+        results = {}
+        changed = []
+        
+        with transaction.atomic():
+            # Ownership, current status and plan duration all come back in this one query.
+            memberships = {
+                membership.id: membership
+                for membership in Membership.objects.select_for_update(of=('self',)).select_related('plan').filter(
+                    id__in=ids,
+                    gym__owner=request.user
+                )
+            }
+            
+            for membership_id in ids:
+                membership = memberships.get(membership_id)
+                if membership is None:
+                    results[membership_id] = {'id': membership_id, 'result': 'not_found'}
+                    continue
+                if membership.status not in allowed_statuses:
+                    results[membership_id] = {
+                        'id': membership_id,
+                        'result': 'skipped',
+                        'error': f'Cannot {action} a membership that is {membership.status}'
+                    }
+                    continue
+                if action == 'approve':
+                    if membership.plan is None:
+                        results[membership_id] = {'id': membership_id, 'result': 'skipped', 'error': 'Membership has no plan'}
+                        continue
+                    membership.start_date = today
+                    membership.end_date = today + timedelta(days=membership.plan.duration_months * 30)
+                membership.status = new_status
+                changed.append(membership)
+                results[membership_id] = {'id': membership_id, 'result': new_status}
+            
+            update_fields = ['status', 'updated_at']
+            if action == 'approve':
+                update_fields += ['start_date', 'end_date']
+            # bulk_update bypasses auto_now, so set the timestamp explicitly.
+            now = timezone.now()
+            for membership in changed:
+                membership.updated_at = now
+            Membership.objects.bulk_update(changed, update_fields, batch_size=500)
+        
+        invalidate_gym_caches(membership.gym_id for membership in changed)
+        
+        return Response({
+            'action': action,
+            'updated': len(changed),
+            'results': [results[membership_id] for membership_id in ids],
+        })
+
+
 # Attendance Views
 class MarkAttendanceView(APIView):
+    @idempotent
     def post(self, request, gym_id):
         if request.user.user_type != 'member':
             return Response({'error': 'Only members can mark attendance'}, status=status.HTTP_403_FORBIDDEN)
@@ -443,6 +626,135 @@ class MarkAttendanceView(APIView):
         }, status=status.HTTP_201_CREATED)
 
 
+class CheckOutView(APIView):
+    def post(self, request, gym_id):
+        if request.user.user_type != 'member':
+            return Response({'error': 'Only members can check out'}, status=status.HTTP_403_FORBIDDEN)
+        
+        now = timezone.now()
+        visit = Attendance.objects.filter(member=request.user, gym_id=gym_id, date=date.today())
+        # Conditional update: a repeated check-out neither moves the time nor counts twice.
+        if not visit.filter(checked_out_at__isnull=True).update(checked_out_at=now):
+            if visit.exists():
+                return Response({'error': 'Already checked out today'}, status=status.HTTP_400_BAD_REQUEST)
+            return Response({'error': 'Not checked in today'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        attendance = visit.select_related('member', 'gym').get()
+        occupancy.record_checkout(attendance.gym_id, attendance.checked_in_at, now)
+        return Response({
+            'message': 'Checked out successfully',
+            'attendance': AttendanceSerializer(attendance).data,
+            'checked_out_at': attendance.checked_out_at,
+        })
+
+
+class GymOccupancyView(APIView):
+    """Members on the floor right now; one cache lookup after the access check, so clients may poll it"""
+    
+    def get(self, request, gym_id):
+        if request.user.user_type == 'member':
+            get_object_or_404(Membership, member=request.user, gym_id=gym_id, status='approved')
+        elif request.user.user_type == 'gym_owner':
+            get_object_or_404(Gym, id=gym_id, owner=request.user)
+        
+        current = occupancy.current(gym_id)
+        if current is None:
+            return Response({'error': 'Gym not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response({'gym_id': gym_id, 'occupancy': current, 'as_of': timezone.now()})
+
+
+class GymOccupancyHistoryView(APIView):
+    """Hourly check-ins, check-outs, peak and closing occupancy for ?date= (default today)"""
+    
+    def get(self, request, gym_id):
+        if request.user.user_type == 'member':
+            get_object_or_404(Membership, member=request.user, gym_id=gym_id, status='approved')
+        elif request.user.user_type == 'gym_owner':
+            get_object_or_404(Gym, id=gym_id, owner=request.user)
+        else:
+            get_object_or_404(Gym, id=gym_id)
+        
+        try:
+            day = date.fromisoformat(request.query_params['date']) if 'date' in request.query_params else timezone.localdate()
+        except ValueError:
+            return Response({'error': 'date must be YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({'gym_id': gym_id, 'date': day, 'hours': occupancy.history(gym_id, day)})
+
+
+class CheckinPassView(APIView):
+    """A signed, short-lived check-in pass for the member's kiosk QR code (see api/checkin_passes.py)"""
+    
+    def get(self, request, gym_id):
+        if request.user.user_type != 'member':
+            return Response({'error': 'Only members can get check-in passes'}, status=status.HTTP_403_FORBIDDEN)
+        
+        membership = (
+            Membership.objects.filter(member=request.user, gym_id=gym_id, status='approved')
+            .select_related('gym')
+            .order_by('-start_date', '-id')
+            .first()
+        )
+        if membership is None:
+            return Response({'error': 'No active membership at this gym'}, status=status.HTTP_404_NOT_FOUND)
+        
+        token, checkin_pass = checkin_passes.issue(membership)
+        valid_from, valid_until = checkin_passes.pass_window(checkin_pass)
+        rotate = getattr(settings, 'CHECKIN_PASS_ROTATE_SECONDS', 30)
+        return Response({
+            'pass': token,
+            'valid_from': valid_from,
+            'valid_until': valid_until,
+            'refresh_at': valid_from + timedelta(seconds=rotate),
+        })
+
+
+class KioskKeysView(APIView):
+    """GET: the keys a gym's kiosk verifies check-in passes with; POST: rotate them"""
+    
+    def get_gym(self, request, gym_id):
+        if request.user.user_type != 'gym_owner':
+            return None
+        return get_object_or_404(Gym, id=gym_id, owner=request.user)
+    
+    def get(self, request, gym_id):
+        gym = self.get_gym(request, gym_id)
+        if gym is None:
+            return Response({'error': 'Only gym owners can set up kiosks'}, status=status.HTTP_403_FORBIDDEN)
+        return Response(checkin_passes.kiosk_keys(gym))
+    
+    def post(self, request, gym_id):
+        gym = self.get_gym(request, gym_id)
+        if gym is None:
+            return Response({'error': 'Only gym owners can set up kiosks'}, status=status.HTTP_403_FORBIDDEN)
+        Gym.objects.filter(id=gym.id).update(checkin_key_version=F('checkin_key_version') + 1)
+        gym.refresh_from_db(fields=['checkin_key_version'])
+        logger.info('Kiosk key rotated', extra={'gym_id': gym.id, 'key_version': gym.checkin_key_version})
+        return Response(checkin_passes.kiosk_keys(gym))
+
+
+class KioskScanUploadView(APIView):
+    """A batch of check-in passes a gym's kiosk accepted while scanning, recorded as attendance"""
+    
+    def post(self, request, gym_id):
+        if request.user.user_type != 'gym_owner':
+            return Response({'error': 'Only gym owners can upload kiosk scans'}, status=status.HTTP_403_FORBIDDEN)
+        gym = get_object_or_404(Gym, id=gym_id, owner=request.user)
+        
+        serializer = KioskScanBatchSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        result = checkin_passes.record_scans(gym, serializer.validated_data['scans'])
+        logger.info('Kiosk scans uploaded', extra={
+            'gym_id': gym.id,
+            'scans': len(serializer.validated_data['scans']),
+            'recorded': result['recorded'],
+            'rejected': len(result['rejected']),
+        })
+        return Response(result)
+
+
 class CheckTodayAttendanceView(APIView):
     def get(self, request, gym_id):
         if request.user.user_type != 'member':
@@ -470,6 +782,28 @@ class CheckTodayAttendanceView(APIView):
         })
 
 
+class MemberHomeView(APIView):
+    """
+    Member home screen in one round trip: memberships, today's check-in, stats,
+    recent history, leaderboard and notices for the active gym (?gym_id= to pick one).
+    """
+    
+    def get(self, request):
+        if request.user.user_type != 'member':
+            return Response({'error': 'Only members have a home screen'}, status=status.HTTP_403_FORBIDDEN)
+        
+        try:
+            gym_id = int(request.query_params['gym_id']) if request.query_params.get('gym_id') else None
+            leaderboard_size = min(max(int(request.query_params.get('leaderboard_size', 5)), 1), 50)
+        except ValueError:
+            return Response({'error': 'gym_id and leaderboard_size must be numbers'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        data = home.member_home(request.user, gym_id=gym_id, leaderboard_size=leaderboard_size)
+        if gym_id is not None and data['membership'] is None:
+            return Response({'error': 'No approved membership at this gym'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(data)
+
+
 class AttendanceHistoryView(APIView):
     def get(self, request, gym_id):
         if request.user.user_type != 'member':
@@ -491,7 +825,7 @@ class AttendanceHistoryView(APIView):
             date__gte=thirty_days_ago
         ).order_by('-date')
         
-        serializer = AttendanceSerializer(attendances, many=True)
+        serializer = AttendanceValuesSerializer(attendances)
         return Response(serializer.data)
 
 
@@ -522,45 +856,12 @@ class MemberAttendanceStatsView(APIView):
         # Calculate total days since membership
         total_days = (today - start_date).days + 1
         
-        # Get attendance data
-        attendances = Attendance.objects.filter(
-            member=request.user,
-            gym_id=gym_id
-        ).order_by('date')
-        
-        attended_days = attendances.count()
-        
-        # Calculate current streak
-        current_streak = 0
-        if attendances.exists():
-            latest_attendance = attendances.last()
-            current_date = latest_attendance.date
-            
-            while True:
-                if Attendance.objects.filter(
-                    member=request.user,
-                    gym_id=gym_id,
-                    date=current_date
-                ).exists():
-                    current_streak += 1
-                    current_date -= timedelta(days=1)
-                else:
-                    break
+        # Attendance history as one bitset (bit i = origin + i days), see api.attendance_bits
+        history, origin = AttendanceBitmap.history(request.user.id, gym_id)
         
-        # Calculate longest streak
-        longest_streak = 0
-        temp_streak = 0
-        prev_date = None
-        
-        for attendance in attendances:
-            if prev_date is None or (attendance.date - prev_date).days == 1:
-                temp_streak += 1
-            else:
-                longest_streak = max(longest_streak, temp_streak)
-                temp_streak = 1
-            prev_date = attendance.date
-        
-        longest_streak = max(longest_streak, temp_streak)
+        attended_days = attendance_bits.count_days(history)
+        current_streak = attendance_bits.current_streak(history)
+        longest_streak = attendance_bits.longest_streak(history)
         
         # Calculate attendance percentage
         attendance_percentage = (attended_days / total_days * 100) if total_days > 0 else 0
@@ -578,7 +879,53 @@ class MemberAttendanceStatsView(APIView):
         return Response(serializer.data)
 
 
+class AttendanceHeatmapView(APIView):
+    """Calendar heatmap and monthly counts for one year, computed from the member's attendance bitmap."""
+    MIN_YEAR = 1900
+    MAX_YEAR = 2100
+    
+    def get(self, request, gym_id):
+        if request.user.user_type != 'member':
+            return Response({'error': 'Only members can view their attendance heatmap'}, status=status.HTTP_403_FORBIDDEN)
+        
+        membership = get_object_or_404(
+            Membership, 
+            member=request.user, 
+            gym_id=gym_id, 
+            status='approved'
+        )
+        
+        try:
+            year = int(request.query_params.get('year', date.today().year))
+        except ValueError:
+            return Response({'error': 'year must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+        if not self.MIN_YEAR <= year <= self.MAX_YEAR:
+            return Response({'error': f'year must be between {self.MIN_YEAR} and {self.MAX_YEAR}'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        bits = AttendanceBitmap.year_bits(request.user.id, gym_id, years=[year]).get(year, 0)
+        origin = date(year, 1, 1)
+        
+        monthly_counts = []
+        for month in range(1, 13):
+            month_end = date(year, month + 1, 1) - timedelta(days=1) if month < 12 else date(year, 12, 31)
+            mask = attendance_bits.range_mask(origin, date(year, month, 1), month_end)
+            monthly_counts.append({'month': month, 'attended_days': attendance_bits.count_days(bits, mask)})
+        
+        return Response({
+            'year': year,
+            'total_attendance': attendance_bits.count_days(bits),
+            'longest_streak': attendance_bits.longest_streak(bits),
+            'monthly_counts': monthly_counts,
+            'days': attendance_bits.heatmap(bits, year),
+        })
+
+
 class GymLeaderboardView(APIView):
+    """Ranked board for ?period=week|month|all (default all), optionally only the top ?limit= members."""
+    throttle_scope = 'leaderboard'
+    throttle_classes = [UserRateThrottle, GymRateThrottle]
+    MAX_LIMIT = 500
+    
     def get(self, request, gym_id):
         # Check if user has access to this gym
         if request.user.user_type == 'member':
@@ -593,84 +940,39 @@ class GymLeaderboardView(APIView):
         else:
             return Response({'error': 'Access denied'}, status=status.HTTP_403_FORBIDDEN)
         
-        # Get all active members
-        active_memberships = Membership.objects.filter(
-            gym_id=gym_id,
-            status='approved'
-        )
+        period = request.query_params.get('period', 'all')
+        if period not in LEADERBOARD_PERIODS:
+            return Response({'error': f'period must be one of {", ".join(LEADERBOARD_PERIODS)}'}, status=status.HTTP_400_BAD_REQUEST)
+        limit = None
+        if 'limit' in request.query_params:
+            try:
+                limit = min(max(int(request.query_params['limit']), 1), self.MAX_LIMIT)
+            except ValueError:
+                return Response({'error': 'limit must be a number'}, status=status.HTTP_400_BAD_REQUEST)
         
-        leaderboard = []
-        
-        for membership in active_memberships:
-            member = membership.member
-            start_date = membership.start_date or membership.created_at.date()
-            today = date.today()
-            total_days = (today - start_date).days + 1
-            
-            # Get attendance data
-            attendances = Attendance.objects.filter(
-                member=member,
-                gym_id=gym_id
-            ).order_by('date')
-            
-            total_attendance = attendances.count()
-            
-            # Calculate current streak
-            current_streak = 0
-            if attendances.exists():
-                latest_attendance = attendances.last()
-                current_date = latest_attendance.date
-                
-                while True:
-                    if Attendance.objects.filter(
-                        member=member,
-                        gym_id=gym_id,
-                        date=current_date
-                    ).exists():
-                        current_streak += 1
-                        current_date -= timedelta(days=1)
-                    else:
-                        break
-            
-            # Calculate longest streak
-            longest_streak = 0
-            temp_streak = 0
-            prev_date = None
-            
-            for attendance in attendances:
-                if prev_date is None or (attendance.date - prev_date).days == 1:
-                    temp_streak += 1
-                else:
-                    longest_streak = max(longest_streak, temp_streak)
-                    temp_streak = 1
-                prev_date = attendance.date
-            
-            longest_streak = max(longest_streak, temp_streak)
-            
-            # Calculate attendance percentage
-            attendance_percentage = (total_attendance / total_days * 100) if total_days > 0 else 0
-            
-            leaderboard.append({
-                'member_id': member.id,
-                'member_name': member.get_full_name(),
-                'total_attendance': total_attendance,
-                'current_streak': current_streak,
-                'longest_streak': longest_streak,
-                'attendance_percentage': round(attendance_percentage, 2),
-                'rank': 0  # Will be set after sorting
-            })
-        
-        # Sort by total attendance (descending)
-        leaderboard.sort(key=lambda x: x['total_attendance'], reverse=True)
-        
-        # Assign ranks
-        for i, entry in enumerate(leaderboard):
-            entry['rank'] = i + 1
+        leaderboard = gym_leaderboard(gym_id, period=period, limit=limit)
         
         serializer = LeaderboardEntrySerializer(leaderboard, many=True)
         return Response(serializer.data)
 
 
+class GymLeaderboardRankView(APIView):
+    """The member's own place on the ?period= board, without loading the board."""
+    throttle_scope = 'leaderboard'
+    throttle_classes = [UserRateThrottle, GymRateThrottle]
+    
+    def get(self, request, gym_id):
+        if request.user.user_type != 'member':
+            return Response({'error': 'Only members have a leaderboard rank'}, status=status.HTTP_403_FORBIDDEN)
+        
+        get_object_or_404(Membership, member=request.user, gym_id=gym_id, status='approved')
+        period = request.query_params.get('period', 'all')
+        if period not in LEADERBOARD_PERIODS:
+            return Response({'error': f'period must be one of {", ".join(LEADERBOARD_PERIODS)}'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({'period': period, **member_rank(gym_id, request.user.id, period=period)})
+
+
 
 
 
@@ -703,41 +1005,7 @@ class GymAttendanceStatsView(APIView):
         ).order_by('-date', '-created_at')[:10]
         
         # Get top 5 attenders
-        top_attenders = []
-        active_memberships = Membership.objects.filter(
-            gym_id=gym_id,
-            status='approved'
-        )
-        
-        for membership in active_memberships:
-            member = membership.member
-            start_date = membership.start_date or membership.created_at.date()
-            total_days = (today - start_date).days + 1
-            
-            total_attendance = Attendance.objects.filter(
-                member=member,
-                gym_id=gym_id
-            ).count()
-            
-            attendance_percentage = (total_attendance / total_days * 100) if total_days > 0 else 0
-            
-            top_attenders.append({
-                'member_id': member.id,
-                'member_name': member.get_full_name(),
-                'total_attendance': total_attendance,
-                'current_streak': 0,  # Simplified for this view
-                'longest_streak': 0,  # Simplified for this view
-                'attendance_percentage': round(attendance_percentage, 2),
-                'rank': 0
-            })
-        
-        # Sort and get top 5
-        top_attenders.sort(key=lambda x: x['total_attendance'], reverse=True)
-        top_attenders = top_attenders[:5]
-        
-        # Assign ranks
-        for i, entry in enumerate(top_attenders):
-            entry['rank'] = i + 1
+        top_attenders = gym_leaderboard(gym_id, limit=5, today=today)
         
         # Serialize top_attenders using LeaderboardEntrySerializer
         top_attenders_serializer = LeaderboardEntrySerializer(top_attenders, many=True)
@@ -761,6 +1029,129 @@ class GymAttendanceStatsView(APIView):
         return Response(serializer.data)
 
 
+class GymAttendanceTrendsView(APIView):
+    """Daily/weekly/monthly check-in trends plus weekday and hourly distributions, read from rollups only."""
+    
+    PERIODS = ['daily', 'weekly', 'monthly']
+    WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+    
+    def get(self, request, gym_id):
+        if request.user.user_type != 'gym_owner':
+            return Response({'error': 'Only gym owners can view attendance trends'}, status=status.HTTP_403_FORBIDDEN)
+        
+        gym = get_object_or_404(Gym, id=gym_id, owner=request.user)
+        
+        period = request.query_params.get('period', 'daily')
+        if period not in self.PERIODS:
+            return Response({'error': f'period must be one of {", ".join(self.PERIODS)}'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            days = min(max(int(request.query_params.get('days', 90)), 1), 731)
+        except ValueError:
+            return Response({'error': 'days must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        today = date.today()
+        start_date = today - timedelta(days=days - 1)
+        rollups = AttendanceDailyRollup.objects.filter(
+            gym=gym,
+            date__gte=start_date,
+            date__lte=today
+        ).order_by('date').values_list('date', 'checkins', 'unique_members', 'hourly_checkins')
+        
+        buckets = {}
+        weekday_totals = [0] * 7
+        hourly_totals = [0] * 24
+        for day, checkins, unique_members, hourly in rollups:
+            if period == 'weekly':
+                bucket_start = day - timedelta(days=day.weekday())
+            elif period == 'monthly':
+                bucket_start = day.replace(day=1)
+            else:
+                bucket_start = day
+            bucket = buckets.setdefault(bucket_start, {'checkins': 0})
+            bucket['checkins'] += checkins
+            if period == 'daily':
+                # Daily uniques can't be summed into weekly/monthly uniques, so they are daily-only.
+                bucket['unique_members'] = unique_members
+            
+            weekday_totals[day.weekday()] += checkins
+            for hour, count in enumerate(hourly or []):
+                hourly_totals[hour] += count
+        
+        peak_hour = max(range(24), key=lambda hour: hourly_totals[hour]) if any(hourly_totals) else None
+        
+        return Response({
+            'gym_id': gym.id,
+            'period': period,
+            'start_date': start_date,
+            'end_date': today,
+            'series': [
+                {'period_start': bucket_start, **totals}
+                for bucket_start, totals in sorted(buckets.items())
+            ],
+            'weekday_distribution': [
+                {'weekday': name, 'checkins': weekday_totals[i]}
+                for i, name in enumerate(self.WEEKDAYS)
+            ],
+            'hourly_distribution': [
+                {'hour': hour, 'checkins': hourly_totals[hour]}
+                for hour in range(24)
+            ],
+            'peak_hour': peak_hour,
+        })
+
+
+class GymCohortRetentionView(APIView):
+    """Share of each month's joiners still checking in N months later (cached)."""
+    
+    def get(self, request, gym_id):
+        if request.user.user_type != 'gym_owner':
+            return Response({'error': 'Only gym owners can view cohort retention'}, status=status.HTTP_403_FORBIDDEN)
+        
+        gym = get_object_or_404(Gym, id=gym_id, owner=request.user)
+        
+        try:
+            months = min(max(int(request.query_params.get('months', 3)), 1), 24)
+        except ValueError:
+            return Response({'error': 'months must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({
+            'gym_id': gym.id,
+            'months': months,
+            'cohorts': cohorts.cached_cohort_retention(gym.id, months),
+        })
+
+
+class GymAtRiskMembersView(APIView):
+    """Approved members ordered by churn risk, as scored by the score_at_risk_members job."""
+    
+    def get(self, request, gym_id):
+        if request.user.user_type != 'gym_owner':
+            return Response({'error': 'Only gym owners can view at-risk members'}, status=status.HTTP_403_FORBIDDEN)
+        
+        gym = get_object_or_404(Gym, id=gym_id, owner=request.user)
+        
+        try:
+            limit = min(max(int(request.query_params.get('limit', 50)), 1), 500)
+            min_score = float(request.query_params.get('min_score', 0))
+        except ValueError:
+            return Response({'error': 'limit and min_score must be numbers'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        scores = MemberRiskScore.objects.filter(
+            gym=gym,
+            score__gte=min_score
+        ).order_by('-score').values(
+            'membership_id', 'member_id', 'score', 'days_since_last_visit',
+            'visits_last_4_weeks', 'visits_last_12_weeks', 'current_streak',
+            'longest_recent_streak', 'computed_at',
+            member_name=full_name('member'),
+        )[:limit]
+        
+        return Response({
+            'gym_id': gym.id,
+            'members': list(scores),
+        })
+
+
 class AdminPendingGymsView(APIView):
     def get(self, request):
         if request.user.user_type != 'admin':
@@ -777,17 +1168,9 @@ class AdminApproveGymView(APIView):
             return Response({'error': 'Only admins can approve gyms'}, status=status.HTTP_403_FORBIDDEN)
         
         gym = get_object_or_404(Gym, id=gym_id)
-        gym.status = 'approved'
-        gym.save()
-        
-        # Create approval history record
-        from .models import GymApprovalHistory
-        GymApprovalHistory.objects.create(
-            gym=gym,
-            admin=request.user,
-            action='approved',
-            notes=request.data.get('notes', '')
-        )
+        # Goes through the review queue's claim check, so a gym another admin has claimed is left to them.
+        if not reviews.review_gym(request.user, gym.id, 'approve', request.data.get('notes', '')):
+            return Response({'error': 'Gym is claimed by another reviewer'}, status=status.HTTP_409_CONFLICT)
         
         return Response({'message': 'Gym approved successfully'})
 
@@ -798,22 +1181,73 @@ class AdminRejectGymView(APIView):
             return Response({'error': 'Only admins can reject gyms'}, status=status.HTTP_403_FORBIDDEN)
         
         gym = get_object_or_404(Gym, id=gym_id)
-        gym.status = 'rejected'
-        gym.rejection_reason = request.data.get('notes', '')
-        gym.save()
-        
-        # Create rejection history record
-        from .models import GymApprovalHistory
-        GymApprovalHistory.objects.create(
-            gym=gym,
-            admin=request.user,
-            action='rejected',
-            notes=request.data.get('notes', '')
-        )
+        # Goes through the review queue's claim check, so a gym another admin has claimed is left to them.
+        if not reviews.review_gym(request.user, gym.id, 'reject', request.data.get('notes', '')):
+            return Response({'error': 'Gym is claimed by another reviewer'}, status=status.HTTP_409_CONFLICT)
         
         return Response({'message': 'Gym rejected successfully'})
 
 
+class AdminReviewQueueView(APIView):
+    """GET lists the gyms this admin has claimed; POST claims more; DELETE releases claims."""
+    
+    MAX_CLAIM = 100
+    
+    def get(self, request):
+        if request.user.user_type != 'admin':
+            return Response({'error': 'Only admins can review gyms'}, status=status.HTTP_403_FORBIDDEN)
+        
+        serializer = GymSerializer(reviews.claimed_gyms(request.user), many=True)
+        return Response(serializer.data)
+    
+    def post(self, request):
+        if request.user.user_type != 'admin':
+            return Response({'error': 'Only admins can review gyms'}, status=status.HTTP_403_FORBIDDEN)
+        
+        try:
+            limit = min(max(int(request.data.get('limit', 20)), 1), self.MAX_CLAIM)
+        except (TypeError, ValueError):
+            return Response({'error': 'limit must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        serializer = GymSerializer(reviews.claim_pending_gyms(request.user, limit), many=True)
+        return Response(serializer.data)
+    
+    def delete(self, request):
+        if request.user.user_type != 'admin':
+            return Response({'error': 'Only admins can review gyms'}, status=status.HTTP_403_FORBIDDEN)
+        
+        released = reviews.release_claims(request.user, request.data.get('ids'))
+        return Response({'message': f'Released {released} gyms back to the review queue', 'released': released})
+
+
+class AdminBulkReviewGymsView(APIView):
+    MAX_IDS = 500
+    
+    def post(self, request):
+        if request.user.user_type != 'admin':
+            return Response({'error': 'Only admins can review gyms'}, status=status.HTTP_403_FORBIDDEN)
+        
+        action = request.data.get('action')
+        ids = request.data.get('ids')
+        if action not in ['approve', 'reject']:
+            return Response({'error': 'action must be approve or reject'}, status=status.HTTP_400_BAD_REQUEST)
+        if not isinstance(ids, list) or not ids:
+            return Response({'error': 'ids must be a non-empty list of gym ids'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(ids) > self.MAX_IDS:
+            return Response({'error': f'At most {self.MAX_IDS} gyms can be reviewed at once'}, status=status.HTTP_400_BAD_REQUEST)
+        # Strictly ints: int() would turn True, 1.9 or "1" into an id the client did not mean.
+        if not all(isinstance(gym_id, int) and not isinstance(gym_id, bool) for gym_id in ids):
+            return Response({'error': 'ids must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+        ids = list(dict.fromkeys(ids))
+        
+        results = reviews.bulk_review(request.user, ids, action, request.data.get('notes', ''))
+        return Response({
+            'action': action,
+            'updated': sum(1 for result in results if result['result'] in ['approved', 'rejected']),
+            'results': results,
+        })
+
+
 class AdminApprovalStatsView(APIView):
     def get(self, request):
         if request.user.user_type != 'admin':
@@ -867,6 +1301,7 @@ class AdminAllGymsView(APIView):
 class NoticeCreateView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @idempotent
     def post(self, request):
         if request.user.user_type != 'gym_owner':
             return Response({'error': 'Only gym owners can create notices'}, status=403)
@@ -899,16 +1334,64 @@ class NoticeListView(APIView):
             notices = Notice.objects.filter(gym__in=gyms, is_active=True)
         elif user.user_type == 'member':
             # Members see notices for gyms they're members of
-            memberships = Membership.objects.filter(member=user, status='approved')
-            gym_ids = [membership.gym.id for membership in memberships]
-            notices = Notice.objects.filter(gym_id__in=gym_ids, is_active=True)
+            notices = notice_feed.member_notices(user)
         else:
             # Admin sees all notices
             notices = Notice.objects.filter(is_active=True)
         
-        serializer = NoticeSerializer(notices, many=True)
+        serializer = NoticeValuesSerializer(notices)
         return Response(serializer.data)
 
+class NoticeFeedView(APIView):
+    """Member's live notices following notice ?after= (oldest first), each flagged is_read."""
+    permission_classes = [IsAuthenticated]
+    
+    MAX_LIMIT = 100
+    
+    def get(self, request):
+        if request.user.user_type != 'member':
+            return Response({'error': 'Only members have a notice feed'}, status=status.HTTP_403_FORBIDDEN)
+        try:
+            after = int(request.query_params['after']) if request.query_params.get('after') else None
+            limit = min(max(int(request.query_params.get('limit', 50)), 1), self.MAX_LIMIT)
+        except ValueError:
+            return Response({'error': 'after and limit must be numbers'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        results, has_more = notice_feed.feed(request.user, after=after, limit=limit)
+        return Response({
+            'results': results,
+            'last_id': results[-1]['id'] if results else after,
+            'has_more': has_more,
+        })
+
+
+class NoticeUnreadCountView(APIView):
+    """Badge poll: a single COUNT of notices above the member's read watermarks."""
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        if request.user.user_type != 'member':
+            return Response({'error': 'Only members have unread notices'}, status=status.HTTP_403_FORBIDDEN)
+        return Response({'unread_count': notice_feed.unread_count(request.user)})
+
+
+class NoticeMarkReadView(APIView):
+    """Mark notices read up to {"up_to": <notice id>} (default: all), optionally for one {"gym": <id>}."""
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request):
+        if request.user.user_type != 'member':
+            return Response({'error': 'Only members can mark notices as read'}, status=status.HTTP_403_FORBIDDEN)
+        try:
+            up_to = int(request.data['up_to']) if request.data.get('up_to') is not None else None
+            gym_id = int(request.data['gym']) if request.data.get('gym') is not None else None
+        except (TypeError, ValueError):
+            return Response({'error': 'up_to and gym must be numbers'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        notice_feed.mark_read(request.user, up_to=up_to, gym_id=gym_id)
+        return Response({'unread_count': notice_feed.unread_count(request.user)})
+
+
 class NoticeDetailView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -953,9 +1436,118 @@ class NoticeDetailView(APIView):
         except Notice.DoesNotExist:
             return Response({'error': 'Notice not found'}, status=404)
 
+
+# Class Booking Views
+class ClassSessionListCreateView(APIView):
+    """GET: upcoming classes at a gym (?include_past=true for all); POST: the gym owner schedules one"""
+    
+    def get(self, request, gym_id):
+        sessions = ClassSession.objects.filter(gym_id=gym_id).select_related('gym').order_by('starts_at', 'id')
+        if request.user.user_type == 'member':
+            get_object_or_404(Membership, member=request.user, gym_id=gym_id, status='approved')
+            sessions = sessions.annotate(my_booking_status=Subquery(
+                ClassBooking.objects.filter(session=OuterRef('pk'), member=request.user).values('status')[:1]
+            ))
+        elif request.user.user_type == 'gym_owner':
+            get_object_or_404(Gym, id=gym_id, owner=request.user)
+        
+        if request.query_params.get('include_past') != 'true':
+            sessions = sessions.filter(ends_at__gt=timezone.now())
+        return Response(ClassSessionSerializer(sessions, many=True).data)
+    
+    @idempotent
+    def post(self, request, gym_id):
+        if request.user.user_type != 'gym_owner':
+            return Response({'error': 'Only gym owners can schedule classes'}, status=status.HTTP_403_FORBIDDEN)
+        gym = get_object_or_404(Gym, id=gym_id, owner=request.user)
+        
+        serializer = ClassSessionSerializer(data=request.data)
+        if serializer.is_valid():
+            serializer.save(gym=gym)
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class ClassSessionUpdateView(APIView):
+    def put(self, request, pk):
+        session = get_object_or_404(ClassSession, id=pk)
+        if request.user.user_type != 'gym_owner' or session.gym.owner != request.user:
+            return Response({'error': 'Only the gym owner can update this class'}, status=status.HTTP_403_FORBIDDEN)
+        
+        serializer = ClassSessionSerializer(session, data=request.data, partial=True)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        changes = dict(serializer.validated_data)
+        capacity = changes.pop('capacity', None)
+        if capacity is not None and capacity != session.capacity:
+            if not bookings.set_capacity(session, capacity):
+                return Response({'error': 'Capacity cannot be lower than the seats already booked'}, status=status.HTTP_400_BAD_REQUEST)
+        if changes:
+            # Never session.save(): it would write back a stale booked_count.
+            ClassSession.objects.filter(id=session.id).update(updated_at=timezone.now(), **changes)
+        session.refresh_from_db()
+        return Response(ClassSessionSerializer(session).data)
+
+
+class ClassBookView(APIView):
+    @idempotent
+    def post(self, request, pk):
+        if request.user.user_type != 'member':
+            return Response({'error': 'Only members can book classes'}, status=status.HTTP_403_FORBIDDEN)
+        session = get_object_or_404(ClassSession.objects.select_related('gym'), id=pk)
+        if not Membership.objects.filter(member=request.user, gym_id=session.gym_id, status='approved').exists():
+            return Response({'error': 'You need an active membership at this gym to book'}, status=status.HTTP_403_FORBIDDEN)
+        
+        try:
+            booking = bookings.book(session, request.user)
+        except bookings.BookingError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        logger.info('Class booked', extra={'session_id': session.id, 'booking_id': booking.id, 'booking_status': booking.status})
+        return Response({
+            'message': 'Class booked' if booking.status == 'booked' else 'Class is full; you are on the waitlist',
+            'booking': ClassBookingSerializer(booking).data,
+            'waitlist_position': bookings.waitlist_position(booking),
+        }, status=status.HTTP_201_CREATED)
+
+
+class ClassCancelBookingView(APIView):
+    def post(self, request, pk):
+        booking = get_object_or_404(ClassBooking.objects.select_related('session', 'member'), session_id=pk, member=request.user)
+        try:
+            promoted = bookings.cancel(booking)
+        except bookings.BookingError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        logger.info('Class booking cancelled', extra={'session_id': pk, 'booking_id': booking.id, 'promoted_booking_id': promoted})
+        return Response({'message': 'Booking cancelled', 'booking': ClassBookingSerializer(booking).data})
+
+
+class ClassBookingListView(APIView):
+    """The gym owner's roster for a class: booked members, then the waitlist in order"""
+    
+    def get(self, request, pk):
+        session = get_object_or_404(ClassSession, id=pk)
+        if request.user.user_type != 'gym_owner' or session.gym.owner != request.user:
+            return Response({'error': 'Only the gym owner can see bookings'}, status=status.HTTP_403_FORBIDDEN)
+        
+        rows = ClassBooking.objects.filter(session=session).exclude(status='cancelled').select_related('member', 'session').order_by('queued_at', 'id')
+        booked = [row for row in rows if row.status == 'booked']
+        waitlisted = [row for row in rows if row.status == 'waitlisted']
+        return Response({
+            'session': ClassSessionSerializer(session).data,
+            'booked': ClassBookingSerializer(booked, many=True).data,
+            'waitlist': ClassBookingSerializer(waitlisted, many=True).data,
+        })
+
+
 class ExerciseRoutineCreateView(APIView):
     permission_classes = [IsAuthenticated]
+    throttle_scope = 'routine_create'
+    throttle_classes = [UserRateThrottle]
     
+    @idempotent
     def post(self, request):
         if request.user.user_type != 'member':
             return Response({'error': 'Only members can create exercise routines'}, status=403)
@@ -1099,23 +1691,23 @@ class ExerciseRoutineCreateView(APIView):
                                 "note": "Response is not valid JSON"
                             }
                     else:
-                        print(f"Unexpected Gemini response structure: {result}")
+                        logger.warning('Unexpected Gemini response structure', extra={'response': result})
                         raise Exception("Gemini API returned invalid response format. Please try again.")
                 else:
-                    print(f"Gemini API returned no candidates: {result}")
+                    logger.warning('Gemini API returned no candidates', extra={'response': result})
                     raise Exception("Gemini API returned no response. Please try again.")
             else:
-                print(f"Gemini API error: {response.status_code} - {response.text}")
+                logger.error('Gemini API error', extra={'status_code': response.status_code, 'response': response.text})
                 raise Exception(f"Gemini API failed with status {response.status_code}. Please check your API key and try again.")
                 
         except requests.exceptions.Timeout:
-            print("Gemini API request timed out")
+            logger.error('Gemini API request timed out')
             raise Exception("Gemini API request timed out. Please try again.")
         except requests.exceptions.RequestException as e:
-            print(f"Gemini API request failed: {str(e)}")
+            logger.error('Gemini API request failed', extra={'error': str(e)})
             raise Exception(f"Gemini API request failed: {str(e)}")
         except Exception as e:
-            print(f"Unexpected error in Gemini API call: {str(e)}")
+            logger.exception('Unexpected error in Gemini API call')
             raise Exception(f"Unexpected error in Gemini API call: {str(e)}")
     
 
@@ -1149,3 +1741,60 @@ class ExerciseRoutineDetailView(APIView):
             return Response({'message': 'Exercise routine deleted successfully'}, status=204)
         except ExerciseRoutine.DoesNotExist:
             return Response({'error': 'Exercise routine not found'}, status=404)
+
+
+# Export views
+class AttendanceExportView(APIView):
+    def get(self, request, export_format):
+        if request.user.user_type not in ['gym_owner', 'admin']:
+            return Response({'error': 'Only gym owners and admins can export attendance'}, status=status.HTTP_403_FORBIDDEN)
+        if export_format not in exports.CONTENT_TYPES:
+            return Response({'error': 'Export format must be csv or ndjson'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            start, end = exports.parse_date_range(request.query_params)
+        except ValueError as e:
+            return Response({'error': f'Invalid date range: {e}'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            gym_id = exports.parse_gym(request.query_params)
+        except ValueError:
+            return Response({'error': 'gym must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        queryset = exports.attendance_queryset(request.user, gym_id, start, end)
+        return exports.stream_export(queryset, exports.ATTENDANCE_COLUMNS, export_format, f'attendance-{date.today():%Y%m%d}')
+
+
+class MembershipExportView(APIView):
+    def get(self, request, export_format):
+        if request.user.user_type not in ['gym_owner', 'admin']:
+            return Response({'error': 'Only gym owners and admins can export memberships'}, status=status.HTTP_403_FORBIDDEN)
+        if export_format not in exports.CONTENT_TYPES:
+            return Response({'error': 'Export format must be csv or ndjson'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            start, end = exports.parse_date_range(request.query_params)
+        except ValueError as e:
+            return Response({'error': f'Invalid date range: {e}'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            gym_id = exports.parse_gym(request.query_params)
+        except ValueError:
+            return Response({'error': 'gym must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        queryset = exports.membership_queryset(request.user, gym_id, start, end)
+        return exports.stream_export(queryset, exports.MEMBERSHIP_COLUMNS, export_format, f'memberships-{date.today():%Y%m%d}')
+
+
+class SyncView(APIView):
+    """
+    Changes since ?cursor= (omit for a full snapshot). Store the returned cursor
+    and send it next time; repeat immediately while has_more is true.
+    """
+    
+    def get(self, request):
+        try:
+            changes = sync.changes(request.user, request.query_params.get('cursor'))
+        except sync.InvalidCursor as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(changes)
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+from corsheaders.defaults import default_headers
 from pathlib import Path
 import os
 
@@ -48,6 +49,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.CorrelationIdMiddleware',
+    'api.middleware.CompressionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -106,6 +109,26 @@ DATABASES = {
     }
 }
 
+# Cache shared by every web process and the task worker (run_worker): gym cache versions
+# (api/caching.py), throttle counters and live occupancy must be seen by all of them, so a
+# per-process cache (LocMem) fails the system checks (api/checks.py). Set REDIS_URL in
+# production; otherwise a database table is used, created by migrate, whose increments
+# are not atomic, so throttle and occupancy counters can drift (the checks warn, api.W001).
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'api_cache',
+        }
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -153,6 +176,8 @@ CORS_ALLOWED_ORIGINS = [
     "http://127.0.0.1:5173",
     "http://127.0.0.1:5174",
 ]
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
+CORS_EXPOSE_HEADERS = ['Idempotent-Replayed', 'Retry-After']
 
 # REST Framework settings
 REST_FRAMEWORK = {
@@ -164,13 +189,120 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'api.renderers.FastJSONRenderer',
     ],
     'DEFAULT_PARSER_CLASSES': [
-        'rest_framework.parsers.JSONParser',
+        'api.renderers.FastJSONParser',
         'rest_framework.parsers.FormParser',
         'rest_framework.parsers.MultiPartParser',
     ],
+    # Sliding-window limits per '<throttle_scope>.<kind>', see api/throttling.py.
+    # They hold across workers through the shared default cache (CACHES above); exact
+    # under concurrent requests only with Redis or Memcached.
+    'DEFAULT_THROTTLE_RATES': {
+        'login.ip': '30/min',
+        'login.username': '10/min',
+        'register.ip': '10/hour',
+        'routine_create.user': '5/hour',
+        'leaderboard.user': '60/min',
+        'leaderboard.gym': '600/min',
+    },
+}
+
+
+# Response compression (api.middleware.CompressionMiddleware)
+# Brotli is negotiated when the optional `brotli` package is installed, gzip otherwise.
+API_COMPRESSION_MIN_SIZE = 1024  # bytes
+API_COMPRESSION_BROTLI_QUALITY = 5
+
+# Owner analytics
+COHORT_RETENTION_CACHE_SECONDS = 3600
+
+# Admin gym review queue: how long a reviewer's claim on a pending gym lasts
+GYM_REVIEW_CLAIM_SECONDS = 900
+
+# Gym coordinates: dotted path to a callable(address) -> (latitude, longitude) or None.
+# The default only uses coordinates in the address and a built-in city gazetteer;
+# GEOCODER_PLACES adds entries as {'city': ((lat, lng), {'locality': (lat, lng)})}.
+GYM_GEOCODER = 'api.geo.local_geocode'
+GEOCODER_PLACES = {}
+
+# Delta sync (api/sync.py): cursors trail the clock by SYNC_SETTLE_SECONDS so in-flight
+# transactions are not skipped; deletions are remembered for SYNC_TOMBSTONE_DAYS.
+SYNC_SETTLE_SECONDS = 5
+SYNC_PAGE_SIZE = 500
+SYNC_TOMBSTONE_DAYS = 30
+
+# Notices that expired this many days ago are moved to ArchivedNotice by archive_expired_notices
+NOTICE_ARCHIVE_AFTER_DAYS = 7
+
+# Background task queue (api/tasks.py, run with manage.py run_worker)
+TASK_VISIBILITY_TIMEOUT = 300
+TASK_MAX_ATTEMPTS = 5
+TASK_RETRY_BACKOFF_SECONDS = 10
+TASK_RETRY_BACKOFF_MAX_SECONDS = 3600
+TASK_RETENTION_DAYS = 7
+
+# Idempotency-Key header on create endpoints (api/idempotency.py): responses are replayed for
+# IDEMPOTENCY_KEY_TTL_SECONDS; a retry during the original gets 409, and the original holds
+# the key for at most IDEMPOTENCY_LOCK_SECONDS (longer than the Gemini timeout).
+IDEMPOTENCY_KEY_TTL_SECONDS = 24 * 60 * 60
+IDEMPOTENCY_LOCK_SECONDS = 120
+
+# Kiosk check-in passes (api/checkin_passes.py): a pass rotates every CHECKIN_PASS_ROTATE_SECONDS and
+# is valid for CHECKIN_PASS_TTL_SECONDS, give or take CHECKIN_PASS_LEEWAY_SECONDS of kiosk clock skew.
+# Kiosks must upload scans within CHECKIN_SCAN_MAX_AGE_DAYS.
+CHECKIN_PASS_ROTATE_SECONDS = 30
+CHECKIN_PASS_TTL_SECONDS = 90
+CHECKIN_PASS_LEEWAY_SECONDS = 30
+CHECKIN_SCAN_MAX_AGE_DAYS = 3
+
+# Live occupancy (api/occupancy.py): members who don't check out stop counting after this long
+OCCUPANCY_MAX_VISIT_HOURS = 3
+
+# Leaderboards (api/leaderboard.py): week and month scores are kept this long after the period starts
+LEADERBOARD_RETENTION_DAYS = 400
+
+
+# Logging
+# Records are written as JSON lines from a background QueueListener thread.
+# Sensitive request fields are redacted and noisy DEBUG events are sampled.
+LOG_LEVEL = os.environ.get('DJANGO_LOG_LEVEL', 'DEBUG' if DEBUG else 'INFO')
+LOG_DEBUG_SAMPLE_RATE = float(os.environ.get('LOG_DEBUG_SAMPLE_RATE', '0.1'))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'filters': {
+        'correlation_id': {
+            '()': 'api.log.CorrelationIdFilter',
+        },
+        'sampling': {
+            '()': 'api.log.LevelSamplingFilter',
+            'rates': {'DEBUG': LOG_DEBUG_SAMPLE_RATE},
+        },
+        'redact': {
+            '()': 'api.log.RedactingFilter',
+        },
+    },
+    'handlers': {
+        'async_json': {
+            '()': 'api.log.AsyncQueueHandler',
+            'filters': ['sampling', 'correlation_id', 'redact'],
+        },
+    },
+    'loggers': {
+        'api': {
+            'handlers': ['async_json'],
+            'level': LOG_LEVEL,
+            'propagate': False,
+        },
+        'django.request': {
+            'handlers': ['async_json'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
 }
 
 